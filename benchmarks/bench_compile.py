@@ -0,0 +1,36 @@
+"""Compare compiled expressions with the Stack-based postfix interpreter.
+
+Usage:
+    python -m benchmarks.bench_compile [calls]
+"""
+
+import sys
+import timeit
+
+from src.compiler import compile_expression, interpret_postfix
+from src.converters import infix_to_postfix, tokenize
+
+EXPRESSIONS = [
+    "A + B",
+    "(A + B) * (C - D) / E",
+    "A + (((B - C) * (D - E) + F) / G) ^ (H - J)",
+]
+
+
+def main(calls=100_000):
+    values = {name: 1.0 + i / 10 for i, name in enumerate("ABCDEFGHIJ")}
+    print(f"{'expression':<45} {'interpreted':>14} {'compiled':>14} {'speedup':>8}")
+    for expression in EXPRESSIONS:
+        tokens = tokenize(infix_to_postfix(expression))
+        function = compile_expression(expression)
+        arguments = [values[name] for name in function.variables]
+        assert abs(function(*arguments) - interpret_postfix(tokens, values)) < 1e-9
+
+        interpreted = timeit.timeit(lambda: interpret_postfix(tokens, values), number=calls)
+        compiled = timeit.timeit(lambda: function(*arguments), number=calls)
+        print(f"{expression:<45} {interpreted / calls * 1e9:>11.0f} ns {compiled / calls * 1e9:>11.0f} ns "
+              f"{interpreted / compiled:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,100 @@
+"""Compare lexing and conversion of single-letter operands with long names.
+
+The first table times lex, tokenize and infix_to_postfix on long expressions
+of single letters, names and numbers. The second compares lex with the
+baseline it replaced, a scan of one character per token (which is only
+right for single letters), to show what reading names costs on plain input.
+The third times the six converters on a sample expression from
+resources/data.
+
+Usage:
+    python -m benchmarks.bench_lexer [repeats] [--output PATH]
+    python -m benchmarks.bench_lexer --compare PATH [--threshold 0.1]
+
+The converter timings are a report like those of benchmarks.bench_scaling,
+and --output, --compare and --threshold work as they do there: --compare
+exits with status 1 when a converter's throughput fell by more than the
+threshold (a fraction). Timings are only comparable on the same machine.
+"""
+
+import argparse
+import sys
+import timeit
+
+from benchmarks.bench_scaling import add_baseline_arguments, describe_machine, finish, summarize
+from src import converters
+from src.converters import TOKEN_KINDS, infix_to_postfix, lex, tokenize
+
+LETTERS = " + ".join("ABCDEFGHIJ" * 20)
+NAMES = " + ".join(f"column_{i:04d}" for i in range(200))
+NUMBERS = " + ".join(f"{i}.{i % 7}" for i in range(200))
+# A line of resources/data/provided_infix_strings.txt
+SAMPLE = "A + (((B-C) * (D-E) + F)/G) ^ (H-J)"
+CONVERTERS = ('infix_to_postfix', 'infix_to_prefix', 'prefix_to_infix',
+              'prefix_to_postfix', 'postfix_to_infix', 'postfix_to_prefix')
+DEFAULT_REPEATS = 1000
+
+
+def baseline_tokens(expression):
+    """The tokenizer from before names and numbers: every known character is a token."""
+    return [char for char in expression if char in TOKEN_KINDS]
+
+
+def best_time(function, repeats):
+    """Seconds per call, the best of five runs of repeats calls."""
+    return min(timeit.repeat(function, number=repeats, repeat=5)) / repeats
+
+
+def time_converters(repeats=DEFAULT_REPEATS, expression=SAMPLE):
+    """
+    Time the six converters on expression and its prefix and postfix forms.
+    Returns a report in the format of benchmarks.bench_scaling, with one
+    size: the number of tokens of the expression.
+    """
+    forms = converters.convert_all(expression, 'infix')
+    forms['infix'] = expression
+    results = {}
+    for name in CONVERTERS:
+        function = getattr(converters, name)
+        notation = name.split('_to_')[0]
+        source = forms[notation]
+        tokens = len(converters.lex(source, notation))
+        results[name] = {str(tokens): summarize(1, tokens, [best_time(lambda: function(source), repeats)])}
+    return {'meta': describe_machine(expression=expression, repeats=repeats), 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lexer and the converters on plain input.")
+    parser.add_argument('repeats', type=int, nargs='?', default=DEFAULT_REPEATS,
+                        help=f"calls per measurement (default: {DEFAULT_REPEATS})")
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+    repeats = args.repeats
+
+    print(f"{'operands':<10} {'chars':>6} {'lex':>12} {'tokenize':>12} {'to postfix':>12}")
+    for label, expression in [("letters", LETTERS), ("names", NAMES), ("numbers", NUMBERS)]:
+        postfix = infix_to_postfix(expression)
+        timings = [
+            best_time(lambda: lex(expression), repeats),
+            best_time(lambda: tokenize(postfix), repeats),
+            best_time(lambda: infix_to_postfix(expression), repeats),
+        ]
+        print(f"{label:<10} {len(expression):>6} " + " ".join(f"{t * 1e6:>9.1f} us" for t in timings))
+
+    print(f"\n{'input':<10} {'chars':>6} {'lex':>12} {'baseline':>12} {'ratio':>7}")
+    for label, expression in [("letters", LETTERS), ("sample", SAMPLE)]:
+        current = best_time(lambda: lex(expression), repeats)
+        baseline = best_time(lambda: baseline_tokens(expression), repeats)
+        print(f"{label:<10} {len(expression):>6} {current * 1e6:>9.1f} us {baseline * 1e6:>9.1f} us "
+              f"{current / baseline:>6.2f}x")
+
+    report = time_converters(repeats)
+    print(f"\nConverters on {SAMPLE!r}:")
+    for name, sizes in report['results'].items():
+        for entry in sizes.values():
+            print(f"  {name:<18} {entry['seconds'] * 1e6:>9.1f} us")
+    return finish(report, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
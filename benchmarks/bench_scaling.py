@@ -0,0 +1,247 @@
+"""Measure how the six converters scale with the size of an expression.
+
+For every size (in tokens) a seeded batch of random expressions is generated
+(see benchmarks.generate) and converted by each converter. The results give
+the throughput in tokens per second and the median and 95th percentile
+latency per expression. A power law time ~ size^k is fitted to the latencies
+of the larger sizes, and a converter whose exponent k is clearly above 1 is
+flagged as superlinear.
+
+Usage:
+    python -m benchmarks.bench_scaling [--sizes 10 100 ...] [--output results.json]
+    python -m benchmarks.bench_scaling --output benchmarks/baseline.json
+    python -m benchmarks.bench_scaling --compare benchmarks/baseline.json [--threshold 0.1]
+
+With --compare the run exits with status 1 when a converter's throughput at
+some size fell by more than the threshold (a fraction) from the baseline, or
+when a converter became superlinear. Baselines are only comparable on the
+same machine.
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import sys
+import time
+
+from benchmarks.generate import SHAPES, generate_tree, emit_infix_minimal
+from src import converters
+from src.converters import emit_postfix, emit_prefix
+
+CONVERTERS = ('infix_to_postfix', 'infix_to_prefix', 'prefix_to_infix',
+              'prefix_to_postfix', 'postfix_to_infix', 'postfix_to_prefix')
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+# Each size gets about this many tokens in total, so small sizes are timed
+# over many expressions and the largest over one.
+TOKENS_PER_SIZE = 200_000
+DEFAULT_REPEATS = 3
+DEFAULT_THRESHOLD = 0.10
+# The power law is fitted to sizes from FIT_MIN_SIZE up, where the fixed
+# per-call overhead no longer dominates.
+FIT_MIN_SIZE = 1_000
+# Exponents above 1 + SUPERLINEAR_MARGIN are flagged.
+SUPERLINEAR_MARGIN = 0.15
+
+
+def make_inputs(size, seed=0, shape='random', tokens_per_size=TOKENS_PER_SIZE):
+    """Return {notation: [expression, ...]} for one size; every notation holds the same expressions."""
+    count = max(1, tokens_per_size // size)
+    inputs = {'infix': [], 'prefix': [], 'postfix': []}
+    for index in range(count):
+        tree = generate_tree(size, seed=seed * 1_000_003 + index, shape=shape)
+        inputs['infix'].append(emit_infix_minimal(tree, seed=index))
+        inputs['prefix'].append(emit_prefix(tree))
+        inputs['postfix'].append(emit_postfix(tree))
+    return inputs
+
+
+def time_converter(function, expressions, repeats=DEFAULT_REPEATS):
+    """Time function on every expression; returns the latencies (seconds) of the fastest repeat."""
+    best = None
+    clock = time.perf_counter
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            latencies = []
+            for expression in expressions:
+                start = clock()
+                function(expression)
+                latencies.append(clock() - start)
+            if best is None or sum(latencies) < sum(best):
+                best = latencies
+    finally:
+        if enabled:
+            gc.enable()
+    return best
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def fit_exponent(points):
+    """
+    Fit time = c * size^k to (size, seconds) points by least squares on the
+    logarithms and return k. Returns None with fewer than two sizes.
+    """
+    points = [(math.log(size), math.log(seconds)) for size, seconds in points if seconds > 0]
+    if len({x for x, _ in points}) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return covariance / variance
+
+
+def summarize(expressions, tokens, latencies):
+    """The result entry of one measurement, from the latencies (seconds) of its expressions."""
+    seconds = sum(latencies)
+    return {
+        'expressions': expressions,
+        'tokens': tokens,
+        'seconds': seconds,
+        'tokens_per_second': tokens / seconds,
+        'latency_median': _percentile(latencies, 0.5),
+        'latency_p95': _percentile(latencies, 0.95),
+    }
+
+
+def describe_machine(**settings):
+    """The 'meta' of a report: where and when it was measured, and the settings given."""
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        **settings,
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeats=DEFAULT_REPEATS, seed=0, shape='random',
+                   names=CONVERTERS, tokens_per_size=TOKENS_PER_SIZE, progress=None):
+    """
+    Run the benchmark and return the results as plain data (see the module docstring).
+    progress, if given, is called with a line of text after every measurement.
+    """
+    results = {name: {} for name in names}
+    for size in sizes:
+        inputs = make_inputs(size, seed=seed, shape=shape, tokens_per_size=tokens_per_size)
+        for name in names:
+            source = name.split('_to_')[0]
+            expressions = inputs[source]
+            tokens = sum(len(converters.lex(expression, source)) for expression in expressions)
+            latencies = time_converter(getattr(converters, name), expressions, repeats)
+            entry = results[name][str(size)] = summarize(len(expressions), tokens, latencies)
+            if progress is not None:
+                progress(f"{name:<18} {size:>9} tokens {entry['tokens_per_second']:>14,.0f} tokens/s "
+                         f"{entry['latency_median'] * 1e6:>14,.1f} us median")
+
+    scaling = {}
+    for name in names:
+        # No fit (None) without at least two sizes from FIT_MIN_SIZE up.
+        exponent = fit_exponent([(int(size), entry['latency_median']) for size, entry in results[name].items()
+                                 if int(size) >= FIT_MIN_SIZE])
+        scaling[name] = {
+            'exponent': exponent,
+            'superlinear': exponent is not None and exponent > 1 + SUPERLINEAR_MARGIN,
+        }
+    return {
+        'meta': describe_machine(seed=seed, shape=shape, repeats=repeats, tokens_per_size=tokens_per_size),
+        'results': results,
+        'scaling': scaling,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Return a description of every regression of current against baseline
+    (empty if none). Reports without 'scaling' are only compared on throughput.
+    """
+    regressions = []
+    for name, sizes in current['results'].items():
+        for size, entry in sizes.items():
+            before = baseline['results'].get(name, {}).get(size)
+            if before is None:
+                continue
+            ratio = entry['tokens_per_second'] / before['tokens_per_second']
+            if ratio < 1 - threshold:
+                regressions.append(f"{name} at {size} tokens: {ratio - 1:+.1%} throughput "
+                                   f"({before['tokens_per_second']:,.0f} -> {entry['tokens_per_second']:,.0f} tokens/s)")
+        was_superlinear = baseline.get('scaling', {}).get(name, {}).get('superlinear', False)
+        fit = current.get('scaling', {}).get(name)
+        if fit is not None and fit['superlinear'] and not was_superlinear:
+            regressions.append(f"{name} became superlinear: time ~ size^{fit['exponent']:.2f}")
+    return regressions
+
+
+def add_baseline_arguments(parser):
+    """Add the --output, --compare and --threshold options that finish handles."""
+    parser.add_argument('--output', metavar='PATH', help="write the results to PATH as JSON")
+    parser.add_argument('--compare', metavar='BASELINE', help="fail on regressions against a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"largest allowed drop in throughput, as a fraction (default: {DEFAULT_THRESHOLD})")
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def finish(report, args, baseline=None):
+    """
+    Save report to args.output, if given, and compare it with baseline, the
+    report loaded from args.compare. Returns the exit status: 1 if there
+    were regressions, else 0.
+    """
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+            file.write('\n')
+    if args.compare:
+        if baseline is None:
+            baseline = load_baseline(args.compare)
+        regressions = compare(baseline, report, args.threshold)
+        print()
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {args.compare}.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark how the converters scale with expression size.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="expression sizes in tokens (default: 10 to 10^6)")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help=f"runs per measurement; the fastest is kept (default: {DEFAULT_REPEATS})")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the expression generator (default: 0)")
+    parser.add_argument('--shape', choices=SHAPES, default='random', help="shape of the expression trees")
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        # Measure what the baseline measured, so the numbers are comparable.
+        baseline = load_baseline(args.compare)
+        args.seed = baseline['meta']['seed']
+        args.shape = baseline['meta']['shape']
+
+    report = run_benchmarks(args.sizes, repeats=args.repeats, seed=args.seed, shape=args.shape, progress=print)
+    print()
+    for name, fit in report['scaling'].items():
+        if fit['exponent'] is not None:
+            flag = "  SUPERLINEAR" if fit['superlinear'] else ""
+            print(f"{name:<18} time ~ size^{fit['exponent']:.2f}{flag}")
+    return finish(report, args, baseline)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
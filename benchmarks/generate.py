@@ -0,0 +1,141 @@
+"""Seeded random expressions for benchmarks.
+
+generate_tree builds a random ExpressionTree with a given number of tokens;
+generate_expression writes it in any notation. The same seed always gives
+the same expression, so benchmark runs on different machines or commits
+measure the same input.
+
+Usage:
+    python -m benchmarks.generate size [notation] [seed]
+"""
+
+import random
+import sys
+
+from src.converters import ASSOCIATIVITY, PRECEDENCE, ExpressionTree, emit_postfix, emit_prefix
+
+DEFAULT_OPERATORS = {'+': 1, '-': 1, '*': 1, '/': 1, '^': 1}
+SHAPES = ('random', 'balanced', 'left', 'right')
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def generate_tree(size, seed=0, shape='random', operators=None, names=False):
+    """
+    Build a random expression tree with about size tokens (operands and operators).
+
+    Args:
+        size (int): Number of tokens, at least 3; rounded down to an odd number
+        seed (int): Seed of the random number generator
+        shape (str): 'random', 'balanced' (depth about log2(size)), or
+            'left'/'right' (one chain, depth about size / 2)
+        operators (dict): Maps each binary operator to its relative weight
+        names (bool): Use multi-character names instead of single letters
+    Returns:
+        ExpressionTree: The generated tree
+    """
+    if size < 3:
+        raise ValueError(f"size must be at least 3; got {size}")
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape: {shape}; expected one of {SHAPES}")
+    rng = random.Random(seed)
+    operators = DEFAULT_OPERATORS if operators is None else operators
+    symbols = list(operators)
+    weights = [operators[symbol] for symbol in symbols]
+    count = (size + 1) // 2
+    if names:
+        operands = [f"x{rng.randrange(1000)}" for _ in range(count)]
+    else:
+        operands = [rng.choice(LETTERS) for _ in range(count)]
+    ops = rng.choices(symbols, weights, k=count - 1)
+
+    tree = ExpressionTree()
+    if shape == 'balanced':
+        level = [tree.add_operand(operand) for operand in operands]
+        ops.reverse()
+        while len(level) > 1:
+            paired = [tree.add_operator(ops.pop(), level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                paired.append(level[-1])
+            level = paired
+        tree.root = level[0]
+        return tree
+
+    # Build the tree in postfix order: after each operand, an operator is
+    # applied to the top two entries with probability apply_rate. 'left'
+    # applies whenever it can and 'right' only at the end.
+    apply_rate = {'random': 0.5, 'left': 1.0, 'right': 0.0}[shape]
+    stack = []
+    next_op = 0
+    for operand in operands:
+        stack.append(tree.add_operand(operand))
+        while len(stack) > 1 and rng.random() < apply_rate:
+            right = stack.pop()
+            stack.append(tree.add_operator(ops[next_op], stack.pop(), right))
+            next_op += 1
+    while len(stack) > 1:
+        right = stack.pop()
+        stack.append(tree.add_operator(ops[next_op], stack.pop(), right))
+        next_op += 1
+    tree.root = stack[0]
+    return tree
+
+
+def emit_infix_minimal(tree, paren_rate=0.0, seed=0):
+    """
+    Write a tree as infix with only the parentheses precedence and
+    associativity need; every other binary subexpression is parenthesized
+    anyway with probability paren_rate.
+    """
+    rng = random.Random(seed)
+    symbols, left, right = tree.symbols, tree.left, tree.right
+
+    def needs_parentheses(child, parent, is_right):
+        if left[child] < 0:
+            return False
+        child_precedence = PRECEDENCE[symbols[child]]
+        parent_precedence = PRECEDENCE[symbols[parent]]
+        if child_precedence != parent_precedence:
+            return child_precedence < parent_precedence
+        # Equal precedence: the child must be on the side the operator groups toward.
+        return is_right == (ASSOCIATIVITY[symbols[parent]] == 'left')
+
+    output = []
+    # Entries are node indices still to be written or literal text.
+    stack = [tree.root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            output.append(item)
+            continue
+        if left[item] < 0:
+            output.append(symbols[item])
+            continue
+        # Pushed in reverse: the right operand, the operator, then the left operand.
+        parts = []
+        for child, is_right in ((left[item], False), (right[item], True)):
+            if needs_parentheses(child, item, is_right) or (left[child] >= 0 and rng.random() < paren_rate):
+                parts.append([')', child, '('])
+            else:
+                parts.append([child])
+        stack.extend(parts[1])
+        stack.append(f" {symbols[item]} ")
+        stack.extend(parts[0])
+    return "".join(output)
+
+
+def generate_expression(size, notation='infix', seed=0, shape='random', operators=None,
+                        paren_rate=0.0, names=False):
+    """Return a random expression in the given notation; see generate_tree and emit_infix_minimal."""
+    tree = generate_tree(size, seed=seed, shape=shape, operators=operators, names=names)
+    if notation == 'infix':
+        return emit_infix_minimal(tree, paren_rate=paren_rate, seed=seed)
+    if notation == 'prefix':
+        return emit_prefix(tree)
+    if notation == 'postfix':
+        return emit_postfix(tree)
+    raise ValueError(f"Unknown expression type: {notation}")
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    print(generate_expression(int(arguments[0]), *arguments[1:2], *map(int, arguments[2:3])))
@@ -0,0 +1,125 @@
+"""This module converts batches of expressions, optionally across several processes.
+
+The conversion functions are pure, so a batch can be split across a process pool.
+Expressions are sent to the workers in chunks to keep the inter-process overhead
+low, and results come back in the same order as the input.
+"""
+
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from src import converters
+
+NOTATIONS = ('infix', 'prefix', 'postfix')
+DEFAULT_CHUNKSIZE = 256
+
+
+def _convert_one(expression, source_type, target_types, validation):
+    """
+    Convert a single expression and return its result record.
+    Invalid expressions are reported in the record instead of raising:
+    'error' holds the message, 'error_code' and 'error_position' say what
+    went wrong where (see converters.check_expression).
+    The converters are looked up on the module at call time, so an enabled
+    src.instrument.Instrumentation sees these calls.
+    """
+    if validation == 'trusted':
+        # Skip the checking pass; only an expression the parser rejects is checked.
+        try:
+            converted = converters.convert_all(expression, source_type, validation=validation)
+        except ValueError:
+            outcome = converters.try_convert_all(expression, source_type)
+        else:
+            return _record(converted, target_types)
+    else:
+        outcome = converters.try_convert_all(expression, source_type)
+    if outcome.ok:
+        return _record(outcome.output, target_types)
+    result = {target: None for target in target_types}
+    result['error'] = outcome.error
+    result['error_code'] = outcome.error_code
+    result['error_position'] = outcome.error_position
+    return result
+
+
+def _record(converted, target_types):
+    result = {target: converted[target] for target in target_types}
+    result['error'] = None
+    result['error_code'] = None
+    result['error_position'] = None
+    return result
+
+
+def _convert_item(item, target_types, validation):
+    """Convert one (expression, source_type) pair."""
+    expression, source_type = item
+    return _convert_one(expression, source_type, target_types, validation)
+
+
+def _check_notations(source_types, target_types):
+    for notation in list(source_types) + list(target_types):
+        if notation not in NOTATIONS:
+            raise ValueError(f"Unknown expression type: {notation}")
+
+
+class BatchConverter:
+    """
+    Converts lists of (expression, source_type) pairs, reusing one process pool.
+
+    Use it as a context manager so the worker processes are shut down when
+    the work is done. With workers=1 no pool is started.
+    """
+    def __init__(self, target_types=NOTATIONS, workers=1, chunksize=DEFAULT_CHUNKSIZE, validation='strict'):
+        self.target_types = tuple(target_types)
+        _check_notations([], self.target_types)
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1; got {workers}")
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be at least 1; got {chunksize}")
+        self.workers = workers
+        self.chunksize = chunksize
+        self._convert = functools.partial(_convert_item, target_types=self.target_types,
+                                          validation=validation)
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def convert(self, items):
+        """Convert (expression, source_type) pairs and return their results in input order."""
+        items = list(items)
+        _check_notations({source_type for _, source_type in items}, [])
+        if self._pool is None:
+            return [self._convert(item) for item in items]
+        # map keeps results in input order and ships chunksize items per task.
+        return list(self._pool.map(self._convert, items, chunksize=self.chunksize))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def convert_batch(expressions, source_type, target_types=NOTATIONS, workers=1,
+                  chunksize=DEFAULT_CHUNKSIZE, validation='strict'):
+    """
+    Convert many expressions of the same notation.
+
+    Args:
+        expressions (iterable): The expressions to convert
+        source_type (str): Notation of the expressions ('infix', 'prefix', or 'postfix')
+        target_types (iterable): Notations to produce for each expression
+        workers (int): Number of worker processes; 1 converts in this process
+        chunksize (int): Number of expressions sent to a worker at a time
+        validation (str): Validation level passed to the converters
+    Returns:
+        list: One dict per expression, in input order, mapping each target
+        notation to its converted string, and 'error', 'error_code' and
+        'error_position' to None or the error message, code and position
+    """
+    _check_notations([source_type], [])
+    with BatchConverter(target_types, workers=workers, chunksize=chunksize,
+                        validation=validation) as converter:
+        return converter.convert((expression, source_type) for expression in expressions)
@@ -0,0 +1,72 @@
+"""This module contains an opt-in, in-memory cache for the conversion functions.
+
+The conversion functions are pure, so repeated expressions can be answered from
+a cache. Keys are the expression after compact_whitespace, so inputs that only
+differ in whitespace the converters ignore share one entry. The expression
+itself is what gets converted, so the cache accepts and rejects exactly what
+convert does.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from src.converters import compact_whitespace, convert
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+DEFAULT_MAXSIZE = 4096
+
+
+class ConversionCache:
+    """
+    A bounded least-recently-used cache of conversion results.
+
+    Entries are keyed on (normalized_expression, source_type, target_type).
+    When the cache is full the least recently used entry is evicted. Failed
+    conversions are not cached; they raise ValueError every time.
+    The cache can be shared between threads.
+    """
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, validation='strict'):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1; got {maxsize}")
+        self.maxsize = maxsize
+        self.validation = validation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def convert(self, expression, source_type, target_type):
+        """Convert an expression, answering from the cache when possible."""
+        if not isinstance(expression, str):
+            raise ValueError(f"Expression must be a string; got {type(expression)}")
+        key = (compact_whitespace(expression), source_type, target_type)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            self._misses += 1
+        # Convert outside the lock so other threads are not held up.
+        result = convert(expression, source_type, target_type, validation=self.validation)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return result
+
+    def cache_info(self):
+        """Return the hit, miss and eviction counters and the current size."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self.maxsize, len(self._entries))
+
+    def cache_clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,164 @@
+"""This module puts expressions into a canonical form so equivalent expressions compare equal.
+
+canonicalize parses an expression and rebuilds its tree so that expressions
+that differ only in the order of the operands of a commutative operator
+(A + B and B + A) or in the grouping of a chain of one associative operator
+((A * B) * C and A * (B * C)) produce the same tree. fingerprint reduces that
+tree to a 64-bit integer, which can be used as a cache or deduplication key
+in place of the expression text.
+
+The canonical form only reorders and regroups; it never applies other
+algebra (A - A stays as it is), so equal fingerprints always mean the
+expressions are equal for every value of their variables, barring hash
+collisions.
+"""
+
+import hashlib
+from src.converters import ASSOCIATIVITY, COMMUTATIVE, PARSERS, ExpressionTree
+
+_MASK = (1 << 64) - 1
+
+
+def associative_operators():
+    """
+    The operators whose chains are flattened and regrouped. A commutative
+    operator qualifies when it groups left to right, so that A op B op C
+    already means the same as either grouping. Read from the registry on
+    every call, so redefining an operator takes effect.
+    """
+    return {op for op in COMMUTATIVE if ASSOCIATIVITY.get(op) == 'left'}
+
+
+def _mix(value):
+    """The splitmix64 finalizer: a fast 64-bit to 64-bit scramble."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+def _symbol_hash(symbol):
+    return int.from_bytes(hashlib.blake2b(symbol.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _combine(symbol_hash, left, right=0):
+    """Fingerprint of an operator node from its symbol and its children's fingerprints (right=0 if unary)."""
+    return _mix(symbol_hash ^ _mix(left ^ _mix(right + 0x9E3779B97F4A7C15)))
+
+
+def tree_fingerprints(tree):
+    """
+    Return the 64-bit structural fingerprint of every node of an ExpressionTree.
+
+    Two nodes have the same fingerprint when their subtrees are identical,
+    operand order included. Fingerprint a canonical tree to ignore order.
+    """
+    hashes = {}
+    fingerprints = []
+    for node, symbol in enumerate(tree.symbols):
+        symbol_hash = hashes.get(symbol)
+        if symbol_hash is None:
+            symbol_hash = hashes[symbol] = _symbol_hash(symbol)
+        if tree.left[node] < 0:
+            fingerprints.append(symbol_hash)
+        elif tree.right[node] < 0:
+            fingerprints.append(_combine(symbol_hash, fingerprints[tree.left[node]]))
+        else:
+            fingerprints.append(_combine(symbol_hash, fingerprints[tree.left[node]],
+                                         fingerprints[tree.right[node]]))
+    return fingerprints
+
+
+def _canonical_tree(tree):
+    """Build the canonical form of a parsed tree. Returns (canonical tree, fingerprint of its root)."""
+    symbols, left, right = tree.symbols, tree.left, tree.right
+    associative = associative_operators()
+    # A node is inside a chain when its parent is the same associative operator;
+    # such nodes are absorbed into the node at the top of the chain.
+    in_chain = [False] * len(tree)
+    for node in range(len(tree)):
+        if symbols[node] in associative and right[node] >= 0:
+            for child in (left[node], right[node]):
+                if symbols[child] == symbols[node] and right[child] >= 0:
+                    in_chain[child] = True
+
+    canonical = ExpressionTree()
+    hashes = {}
+    fingerprints = []
+    # Canonical node and sort key of every source node that is not inside a chain
+    mapped = [None] * len(tree)
+
+    def add(symbol, left_node=-1, right_node=-1):
+        symbol_hash = hashes.get(symbol)
+        if symbol_hash is None:
+            symbol_hash = hashes[symbol] = _symbol_hash(symbol)
+        if left_node < 0:
+            fingerprints.append(symbol_hash)
+            # Operands sort before operators, alphabetically
+            return canonical.add_operand(symbol), (0, symbol)
+        right_fingerprint = fingerprints[right_node] if right_node >= 0 else 0
+        fingerprints.append(_combine(symbol_hash, fingerprints[left_node], right_fingerprint))
+        return canonical.add_operator(symbol, left_node, right_node), (1, fingerprints[-1])
+
+    for node in range(len(tree)):
+        if in_chain[node]:
+            continue
+        symbol = symbols[node]
+        if left[node] < 0:
+            mapped[node] = add(symbol)
+        elif right[node] < 0:
+            mapped[node] = add(symbol, mapped[left[node]][0])
+        elif symbol in associative:
+            # Collect the operands of the whole chain, sort them and rebuild
+            # the chain left-deep, the way the parser groups it.
+            operands = []
+            stack = [node]
+            while stack:
+                item = stack.pop()
+                if item == node or in_chain[item]:
+                    stack.append(right[item])
+                    stack.append(left[item])
+                else:
+                    operands.append(mapped[item])
+            operands.sort(key=lambda entry: entry[1])
+            result = operands[0]
+            for operand in operands[1:]:
+                result = add(symbol, result[0], operand[0])
+            mapped[node] = result
+        else:
+            mapped[node] = add(symbol, mapped[left[node]][0], mapped[right[node]][0])
+    canonical.root = mapped[tree.root][0]
+    return canonical, fingerprints[canonical.root]
+
+
+def canonicalize(expression, notation='infix', validation='strict'):
+    """
+    Parse an expression and return its canonical ExpressionTree.
+
+    The operands of every chain of an associative operator (see
+    associative_operators) are collected, sorted (operands alphabetically,
+    then subexpressions by fingerprint) and regrouped left to right; every
+    other operator keeps its operand order.
+    Emit the result with any emitter, e.g. emit_infix(canonicalize("B + A")).
+
+    Args:
+        expression (str): The expression to canonicalize
+        notation (str): 'infix', 'prefix', or 'postfix'
+        validation (str): Validation level passed to the parser
+    Raises:
+        ValueError: If the expression is invalid or the notation is unknown
+    """
+    if notation not in PARSERS:
+        raise ValueError(f"Unknown expression type: {notation}")
+    return _canonical_tree(PARSERS[notation](expression, validation=validation))[0]
+
+
+def fingerprint(expression, notation='infix', validation='strict'):
+    """
+    Return a 64-bit fingerprint of an expression's canonical form.
+
+    Equivalent expressions (see canonicalize) have the same fingerprint in
+    any notation, so it can key a cache or collapse duplicates in a batch.
+    """
+    if notation not in PARSERS:
+        raise ValueError(f"Unknown expression type: {notation}")
+    return _canonical_tree(PARSERS[notation](expression, validation=validation))[1]
@@ -0,0 +1,114 @@
+"""This module contains the checkpoints that let a long batch run resume after a crash.
+
+A checkpoint records, for every input file, the number of input lines whose
+results have been written and the size of each of the file's output files
+at that moment. Outputs are flushed before the checkpoint that covers them
+is written, and the checkpoint itself is replaced atomically, so it never
+claims more than is on disk.
+
+To resume, every output is cut back to the size in the checkpoint and
+reading continues at the recorded line: results written after the last
+checkpoint are dropped and then written again, so no line is missing or
+written twice.
+"""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+DEFAULT_CHECKPOINT_PATH = 'outputs/checkpoint.json'
+# Expressions converted between two checkpoints of a file
+DEFAULT_CHECKPOINT_EVERY = 10_000
+CHECKPOINT_VERSION = 2
+# Write buffer of the files opened by open_output
+OUTPUT_BUFFER_SIZE = 1 << 16
+
+
+def open_output(path, offset=None, mode='w+', buffering=OUTPUT_BUFFER_SIZE):
+    """
+    Open an output file for writing, as text unless mode is binary. With an
+    offset, the file is cut back to offset bytes and reopened for appending
+    (and reading) instead of being started over.
+    """
+    binary = 'b' in mode
+    options = {'buffering': buffering} if binary else {'encoding': 'utf-8', 'buffering': buffering}
+    if offset is None:
+        return open(path, mode, **options)
+    with open(path, 'r+b') as file:
+        file.truncate(offset)
+    return open(path, 'a+b' if binary else 'a+', **options)
+
+
+def sync_output(file):
+    """Flush an output file to disk and return its size, the offset to resume it at."""
+    file.flush()
+    os.fsync(file.fileno())
+    return os.fstat(file.fileno()).st_size
+
+
+def write_atomic(path, text):
+    """Replace a file with text, so that readers see either the old or the new contents."""
+    path = Path(path)
+    temporary = path.with_name(path.name + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+class Checkpoint:
+    """
+    The progress of a run, saved to a JSON file.
+
+    Maps each input file to its state: the 'input' size and modification
+    time it was read with, plus what the caller stores. src.main.process_file
+    stores the 'line' reached, 'done' once the file is finished, the
+    'formats' written, the sizes of the files of each output ('report', keyed
+    by format, as WriterGroup.offsets returns them), of the spooled stacks
+    ('stacks') and the 'errors' so far. It is saved whenever a state is
+    updated, and can be shared by threads. Outputs that only exist while a run is in
+    progress (such as spooled stacks) go in spool_dir.
+    """
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, resume=False):
+        self.path = Path(path)
+        self.spool_dir = self.path.with_name(self.path.stem + '.spool')
+        self._lock = threading.Lock()
+        self.files = {}
+        if resume and self.path.exists():
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') == CHECKPOINT_VERSION:
+                self.files = data['files']
+        elif self.spool_dir.exists():
+            # A fresh run: leftovers of an earlier run are of no use.
+            shutil.rmtree(self.spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, file_path):
+        """The saved state of an input file, or None if it has not been started or has changed since."""
+        state = self.files.get(str(file_path))
+        if state is None or state.get('input') != _fingerprint(file_path):
+            return None
+        return state
+
+    def update(self, file_path, state):
+        """Record the state of an input file and save the checkpoint."""
+        with self._lock:
+            self.files[str(file_path)] = {**state, 'input': _fingerprint(file_path)}
+            write_atomic(self.path, json.dumps({'version': CHECKPOINT_VERSION, 'files': self.files}))
+
+    def remove(self):
+        """Delete the checkpoint and its spool directory once the run has finished."""
+        with self._lock:
+            if self.path.exists():
+                self.path.unlink()
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+
+def _fingerprint(file_path):
+    """Size and modification time of an input file; resuming needs the file unchanged."""
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
@@ -0,0 +1,142 @@
+"""This module compiles expressions into Python functions for fast repeated scalar evaluation.
+
+compile_expression parses an expression once with the conversion functions
+and generates a Python function whose parameters are the expression's
+variables, so evaluating it afterwards costs a single function call.
+Compiled functions are cached by their expression text after
+compact_whitespace, so call compile_expression.cache_clear() after
+redefining an operator. Expressions are validated like the converters
+validate them, so what infix_to_postfix rejects does not compile either.
+
+interpret_postfix is the straightforward alternative: it walks the postfix
+tokens with a Stack on every call. benchmarks/bench_compile.py compares the two.
+"""
+
+import functools
+import keyword
+from src.converters import (ARITY, PARSERS, REGISTRY, ExpressionDAG, Stack, compact_whitespace, is_number,
+                            is_operand, is_operator, number_value)
+
+# Python operator written for each expression operator in generated code.
+# Other registered operators call their registered function.
+PYTHON_OPERATORS = {'+': '+', '-': '-', '*': '*', '/': '/', '^': '**'}
+COMPILE_CACHE_SIZE = 1024
+
+
+def generate_source(tree):
+    """
+    Generate the source of a Python function that evaluates an ExpressionTree.
+
+    Each operator gets its own assignment to a local variable rather than one
+    nested expression, so deeply nested expressions do not run into Python's
+    limits on nesting. Only nodes reachable from the root are generated, and
+    in an ExpressionDAG each shared subexpression is computed once.
+    Unary operators and binary ones without a Python equivalent in
+    PYTHON_OPERATORS call _op<code>, where code is the operator's code
+    point; see operator_namespace.
+
+    Numbers become literals. Variables are parameters of the same name,
+    except names that are Python keywords or start with '_' (which could
+    clash with the generated names); those become _v<i> and can only be
+    passed positionally.
+    """
+    symbols, left, right = tree.symbols, tree.left, tree.right
+    reachable = [False] * len(tree)
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        if not reachable[node]:
+            reachable[node] = True
+            if left[node] >= 0:
+                stack.append(left[node])
+            if right[node] >= 0:
+                stack.append(right[node])
+    variables = sorted({symbols[node] for node in range(len(tree))
+                        if reachable[node] and left[node] < 0 and not is_number(symbols[node])})
+    parameters = {name: name if not keyword.iskeyword(name) and not name.startswith('_') else f"_v{i}"
+                  for i, name in enumerate(variables)}
+    names = [None] * len(tree)
+    lines = []
+    for node in range(len(tree)):
+        if not reachable[node]:
+            continue
+        if left[node] < 0:
+            symbol = symbols[node]
+            names[node] = parameters[symbol] if symbol in parameters else repr(number_value(symbol))
+        else:
+            names[node] = f"_{node}"
+            symbol = symbols[node]
+            if right[node] < 0:
+                value = f"_op{ord(symbol)}({names[left[node]]})"
+            elif symbol in PYTHON_OPERATORS:
+                value = f"{names[left[node]]} {PYTHON_OPERATORS[symbol]} {names[right[node]]}"
+            else:
+                value = f"_op{ord(symbol)}({names[left[node]]}, {names[right[node]]})"
+            lines.append(f"    _{node} = {value}")
+    lines.append(f"    return {names[tree.root]}")
+    signature = ', '.join(parameters[name] for name in variables)
+    return f"def compiled({signature}):\n" + "\n".join(lines) + "\n", variables
+
+
+@functools.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile(normalized, notation):
+    # Parsing into a DAG makes repeated subexpressions compute only once.
+    tree = PARSERS[notation](normalized, tree=ExpressionDAG())
+    source, variables = generate_source(tree)
+    namespace = operator_namespace(set(tree.symbols))
+    exec(compile(source, f"<expression {normalized}>", 'exec'), namespace)
+    function = namespace['compiled']
+    function.variables = tuple(variables)
+    function.source = source
+    return function
+
+
+def operator_namespace(symbols):
+    """Map the _op<code> names used by generated code to the registered operator functions."""
+    namespace = {}
+    for symbol in symbols:
+        if symbol in REGISTRY and (symbol not in PYTHON_OPERATORS or ARITY[symbol] == 1):
+            if REGISTRY[symbol].function is None:
+                raise ValueError(f"Operator {symbol} has no evaluation function")
+            namespace[f"_op{ord(symbol)}"] = REGISTRY[symbol].function
+    return namespace
+
+
+def compile_expression(expression, notation='infix'):
+    """
+    Compile an expression into a Python function of its variables.
+
+    Args:
+        expression (str): The expression to compile
+        notation (str): Notation of the expression ('infix', 'prefix', or 'postfix')
+    Returns:
+        function: Takes the variables in alphabetical order (also listed in
+        its variables attribute), positionally or by name, and returns the
+        value of the expression
+    """
+    if not isinstance(expression, str):
+        raise ValueError(f"Expression must be a string; got {type(expression)}")
+    if notation not in PARSERS:
+        raise ValueError(f"Unknown expression type: {notation}")
+    return _compile(compact_whitespace(expression), notation)
+
+compile_expression.cache_info = _compile.cache_info
+compile_expression.cache_clear = _compile.cache_clear
+
+
+def interpret_postfix(tokens, values):
+    """
+    Evaluate postfix tokens with a Stack, looking up each variable in values.
+    This is the baseline compile_expression is measured against.
+    """
+    stack = Stack()
+    for token in tokens:
+        if is_operand(token):
+            stack.push(number_value(token) if is_number(token) else values[token])
+        elif is_operator(token):
+            right = stack.pop()
+            if ARITY[token] == 1:
+                stack.push(REGISTRY[token].function(right))
+            else:
+                stack.push(REGISTRY[token].function(stack.pop(), right))
+    return stack.pop()
@@ -1,19 +1,120 @@
 """This module contains all the necessary tools for converting between infix, prefix, and postfix expressions.
 
-For prefix and postfix to infix conversions, we follow the standard approach of using a stack to build the expression.
+Each notation has one parser that builds an ExpressionTree and one emitter that writes a tree back out, so every conversion is a parse followed by an emit.
 
-We use the Shunting-Yard algorithm for infix to postfix conversion and then reverse the result for infix to prefix conversion (since the algorithm is easier to implement for postfix).
+We use a stack to parse prefix and postfix expressions and the Shunting-Yard algorithm to parse infix expressions.
 """
 
-import re
 import functools
+import operator
+import re
+from collections import namedtuple
+
+# Operator registry
+#
+# Every operator is described once, by an Operator record. The tables below
+# (OPERATORS, PRECEDENCE, ASSOCIATIVITY, ARITY and the token tables) are all
+# derived from REGISTRY and rebuilt in place whenever an operator is
+# registered, so modules that imported them always see the current operators.
+# The core loops only do single dictionary lookups into these tables.
+#
+# A unary operator is written before its operand in infix and prefix and
+# after it in postfix, with a symbol of its own: '-' cannot be unary as well,
+# because in prefix and postfix the two readings cannot be told apart. A
+# unary minus is usually registered as '~':
+#     register_operator('~', 5, arity=1, function=operator.neg)
+
+Operator = namedtuple('Operator', ['symbol', 'precedence', 'associativity', 'arity', 'function'])
 
+REGISTRY = {}
 # Set of valid operators for expression handling
-OPERATORS = {'+', '-', '*', '/', '^'}
+OPERATORS = set()
 # Operator precedence mapping (higher value = higher precedence)
-PRECEDENCE = {'^': 4, '*': 3, '/': 3, '+': 2, '-': 2}
+PRECEDENCE = {}
 # Operator associativity rules
-ASSOCIATIVITY = {'^': 'right', '+': 'left', '-': 'left', '*': 'left', '/': 'left'}
+ASSOCIATIVITY = {}
+# Number of operands each operator takes
+ARITY = {}
+# Operators whose operands can be swapped (a op b == b op a)
+COMMUTATIVE = {'+', '*'}
+
+# Token kinds, as stored in TOKEN_KINDS
+KIND_INVALID = 0
+KIND_OPERAND = 1
+KIND_BINARY = 2
+KIND_UNARY = 3
+KIND_OPEN = 4
+KIND_CLOSE = 5
+
+# Kind of every operator, parenthesis and ASCII capital letter. Other
+# characters are classified by token_kind.
+TOKEN_KINDS = {}
+# The shunting-yard algorithm pops stacked operators while their precedence
+# is at least BINDING[token] of the incoming operator: its precedence, plus
+# one if it is right-associative. '(' has precedence -1 on the stack, so it
+# is never popped by an operator.
+BINDING = {}
+STACK_PRECEDENCE = {}
+
+def _rebuild_tables():
+    """Rebuild the derived operator tables from REGISTRY, in place."""
+    for table in (OPERATORS, PRECEDENCE, ASSOCIATIVITY, ARITY, TOKEN_KINDS, BINDING, STACK_PRECEDENCE):
+        table.clear()
+    for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+        TOKEN_KINDS[letter] = KIND_OPERAND
+    TOKEN_KINDS['('] = KIND_OPEN
+    TOKEN_KINDS[')'] = KIND_CLOSE
+    STACK_PRECEDENCE['('] = -1
+    for op in REGISTRY.values():
+        OPERATORS.add(op.symbol)
+        PRECEDENCE[op.symbol] = op.precedence
+        ASSOCIATIVITY[op.symbol] = op.associativity
+        ARITY[op.symbol] = op.arity
+        TOKEN_KINDS[op.symbol] = KIND_BINARY if op.arity == 2 else KIND_UNARY
+        BINDING[op.symbol] = op.precedence + (op.associativity == 'right')
+        STACK_PRECEDENCE[op.symbol] = op.precedence
+
+def register_operator(symbol, precedence, associativity='left', arity=2, function=None):
+    """
+    Add an operator, or redefine an existing one.
+
+    Args:
+        symbol (str): A single character that is not a letter, digit, '_', '.',
+            whitespace, parenthesis or quote (letters, digits, '_' and '.'
+            are read as parts of names and numbers)
+        precedence (int): Binding strength; higher binds tighter (0 or more)
+        associativity (str): 'left' or 'right'; unary operators are always 'right'
+        arity (int): 2 for a binary operator, 1 for a unary prefix operator
+        function (callable): Computes the operator's value (used by the
+            evaluators); takes arity arguments
+    Returns:
+        Operator: The registered operator
+    """
+    if not isinstance(symbol, str) or len(symbol) != 1 or symbol.isalnum() or symbol in '_.' \
+            or symbol.isspace() or symbol in '()"' or symbol in '–—':
+        raise ValueError(f"Invalid operator symbol: {symbol!r}")
+    if not isinstance(precedence, int) or precedence < 0:
+        raise ValueError(f"precedence must be a non-negative integer; got {precedence!r}")
+    if associativity not in ('left', 'right'):
+        raise ValueError(f"associativity must be 'left' or 'right'; got {associativity!r}")
+    if arity not in (1, 2):
+        raise ValueError(f"arity must be 1 or 2; got {arity!r}")
+    op = REGISTRY[symbol] = Operator(symbol, precedence, 'right' if arity == 1 else associativity, arity, function)
+    _rebuild_tables()
+    return op
+
+def unregister_operator(symbol):
+    """Remove an operator from the registry."""
+    if symbol not in REGISTRY:
+        raise ValueError(f"Unknown operator: {symbol!r}")
+    del REGISTRY[symbol]
+    _rebuild_tables()
+
+register_operator('+', 2, 'left', function=operator.add)
+register_operator('-', 2, 'left', function=operator.sub)
+register_operator('*', 3, 'left', function=operator.mul)
+register_operator('/', 3, 'left', function=operator.truediv)
+register_operator('^', 4, 'right', function=operator.pow)
 
 # Helper functions
 
@@ -22,41 +123,145 @@ def is_operator(token):
     return token in OPERATORS
 
 def is_operand(token):
-    """Return True if token is a capital letter only."""
-    return token.isalpha() and token.isupper()
+    """Return True if token is an operand: a name (see lex), a number or a capital letter."""
+    return _OPERAND_PATTERN.fullmatch(token) is not None or (token.isalpha() and token.isupper())
+
+def is_number(token):
+    """Return True if an operand token is a numeric literal rather than a variable."""
+    return token[0].isdigit() or token[0] == '.'
+
+def number_value(token):
+    """The value of a numeric literal token: an int if it has no decimal point, else a float."""
+    return float(token) if '.' in token else int(token)
+
+def token_kind(token):
+    """Return the kind of a token (one of the KIND_ constants)."""
+    kind = TOKEN_KINDS.get(token)
+    if kind is None:
+        kind = KIND_OPERAND if is_operand(token) else KIND_INVALID
+    return kind
 
 def strip_whitespace(expression):
     """Remove all whitespace from the expression."""
     return "".join(expression.split())
 
+def compact_whitespace(expression):
+    """
+    Remove the whitespace that does not separate two tokens.
+    Whitespace between two name or number characters becomes one space, so
+    the result reads as the same tokens as the expression.
+    """
+    return _LOOSE_WHITESPACE.sub('', _SEPARATING_WHITESPACE.sub(' ', expression))
+
 def tokenize(expression):
     """
     Tokenize the expression with proper handling of operators and operands.
+    Tokens are read like a prefix or postfix expression (see lex), so dashes
+    become '-' and stray characters are skipped.
     """
-    # First standardize the expression
-    expr = standardize_expression(expression)
-    
-    tokens = []
-    i = 0
-    while i < len(expr):
-        if expr[i] in OPERATORS:
-            # Handle double minus
-            if expr[i] == '-' and i + 1 < len(expr) and expr[i + 1] == '-':
-                tokens.append('+')
-                i += 2
-            else:
-                tokens.append(expr[i])
-                i += 1
-        elif expr[i].isalpha():
-            tokens.append(expr[i])
-            i += 1
-        elif expr[i] in '()':
-            tokens.append(expr[i])
-            i += 1
+    return [expression[start:end] if kind == KIND_OPERAND else _DASH_ALIASES.get(expression[start], expression[start])
+            for kind, start, end in lex(expression, 'postfix')]
+
+
+# Lexer
+#
+# lex splits an expression into token spans (kind, start, end) that index into
+# the expression itself, so no substring is made for a token until a parser
+# needs its text. Operands are names ([A-Za-z_][A-Za-z0-9_]*, e.g. rate_2024)
+# and numbers (3, 3.14, .5). A run of capital letters only is one operand per
+# letter, so "+AB" and "AB+" keep their meaning; a name containing a lower case
+# letter, digit or underscore is a single operand. Whitespace separates tokens
+# and is otherwise ignored.
+#
+# Infix expressions must consist of tokens only. Prefix and postfix
+# expressions are read leniently, as they always have been: en and em dashes
+# are minus signs and characters that cannot be part of a token (quotes,
+# stray punctuation) are skipped.
+
+# Groups: 1 run of capitals, 2 name, 3 number, 4 whitespace, 5 any other character
+_TOKEN_PATTERN = re.compile(
+    r'([A-Z]+(?![A-Za-z0-9_]))|([A-Za-z_][A-Za-z0-9_]*)|([0-9]+(?:\.[0-9]*)?|\.[0-9]+)|(\s+)|(.)', re.DOTALL)
+_OPERAND_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|[0-9]+(?:\.[0-9]*)?|\.[0-9]+')
+_SEPARATING_WHITESPACE = re.compile(r'(?<=[A-Za-z0-9_.])\s+(?=[A-Za-z0-9_.])')
+_LOOSE_WHITESPACE = re.compile(r'(?<![A-Za-z0-9_.])\s+|\s+(?![A-Za-z0-9_.])')
+# Characters read as a minus sign in prefix and postfix expressions
+_DASHES = {'–', '—'}
+_DASH_ALIASES = {'–': '-', '—': '-'}
+# Characters that can continue a name or number
+_WORD_CHARACTERS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.')
+# Characters that only occur in names and numbers; without them every token is one character
+_NAME_OR_NUMBER = re.compile(r'[a-z0-9_.]')
+
+def lex(expression, notation='infix'):
+    """
+    Split an expression into token spans.
+
+    Args:
+        expression (str): The expression to split
+        notation (str): 'infix' reports every character that is not part of a
+            token as KIND_INVALID; 'prefix' and 'postfix' skip them
+    Returns:
+        list: (kind, start, end) for each token, where kind is one of the
+        KIND_ constants and expression[start:end] is the token's text
+        (a dash read as a minus sign keeps its own character)
+    """
+    lenient = notation != 'infix'
+    if _NAME_OR_NUMBER.search(expression) is None:
+        return _lex_characters(expression, lenient)
+    return _lex_pattern(expression, lenient)
+
+def _lex_pattern(expression, lenient):
+    """lex for any expression, one _TOKEN_PATTERN match per token."""
+    kinds = TOKEN_KINDS
+    spans = []
+    append = spans.append
+    for match in _TOKEN_PATTERN.finditer(expression):
+        group = match.lastindex
+        if group == 4:
+            continue
+        start, end = match.span()
+        if group == 1:
+            for position in range(start, end):
+                append((KIND_OPERAND, position, position + 1))
+        elif group != 5:
+            append((KIND_OPERAND, start, end))
         else:
-            i += 1  # Skip other characters
-            
-    return tokens
+            char = expression[start]
+            kind = kinds.get(char)
+            if kind is not None:
+                append((kind, start, end))
+            elif not lenient:
+                append((KIND_INVALID, start, end))
+            elif char in _DASHES:
+                if '-' in kinds:
+                    append((kinds['-'], start, end))
+            elif char.isalpha():
+                append((KIND_OPERAND if char.isupper() else KIND_INVALID, start, end))
+    return spans
+
+def _lex_characters(expression, lenient):
+    """
+    lex for the common case of an expression without names or numbers,
+    where every token is a single character: one table lookup per character
+    instead of a regular expression match per token.
+    """
+    kinds = TOKEN_KINDS
+    spans = []
+    append = spans.append
+    for position, char in enumerate(expression):
+        kind = kinds.get(char)
+        if kind is not None:
+            append((kind, position, position + 1))
+        elif char.isspace():
+            continue
+        elif not lenient:
+            append((KIND_INVALID, position, position + 1))
+        elif char in _DASHES:
+            if '-' in kinds:
+                append((kinds['-'], position, position + 1))
+        elif char.isalpha():
+            append((KIND_OPERAND if char.isupper() else KIND_INVALID, position, position + 1))
+    return spans
 
 
 # Stack class for use in conversion functions
@@ -95,14 +300,13 @@ class Stack:
 
 def preprocess(func):
     """
-    A decorator that checks that the expression is a string
-    and strips out all whitespace.
+    A decorator that checks that the expression is a string.
+    Whitespace is left in place because it separates names; the lexer skips it.
     """
     @functools.wraps(func)
     def wrapper(expression, *args, **kwargs):
         if not isinstance(expression, str):
             raise ValueError(f"Expression must be a string; got {type(expression)}")
-        expression = strip_whitespace(expression)
         return func(expression, *args, **kwargs)
     return wrapper
 
@@ -114,8 +318,8 @@ def validate_infix(expression):
     Fully validate an infix expression.
 
     Three level checks to debug the invalid expression inputs from initial testing.
-      - The expression must consist only of letters, digits,
-         the operators (+, -, *, /, ^), and round parentheses.
+      - The expression must consist only of operands (names and numbers),
+         the registered operators, round parentheses and whitespace.
       - Balanced equations via '(' and a corresponding ')'.
       - Proper token order based on its kind the tokens (operands, operators, and parentheses) must
          be in a syntactically valid sequence. For example:
@@ -129,86 +333,89 @@ def validate_infix(expression):
     Returns:
       True if the expression is valid; otherwise, False.
     """
-    # Step 1: Check allowed characters.
-    allowed_pattern = re.compile(r'^[A-Za-z0-9+\-*/^()]+$')
-    if not allowed_pattern.fullmatch(expression):
-        return False
+    # Step 1: Split the expression into tokens; anything that is not an
+    # operand, operator or parenthesis is an invalid token.
+    return _valid_infix(lex(expression, 'infix'))
 
-    # Tokenize the expression.
-    tokens = list(expression)
-    if not tokens:
+def _valid_infix(spans):
+    """validate_infix on the spans of lex(expression, 'infix'), so a parser can reuse them."""
+    if not spans:
         return False
 
     # Step 2: Check balanced parentheses and token order.
-    paren_stack = []
+    depth = 0
     # When True we expect an operand or an open parenthesis.
     # When False we expect an operator or a closing parenthesis.
     expecting_operand = True
+    has_operator = False
 
-    for token in tokens:
-        if token == '(':
-            paren_stack.append(token)
-            expecting_operand = True
-        elif token == ')':
-            if expecting_operand:
+    for kind, _, _ in spans:
+        if kind == KIND_OPEN:
+            if not expecting_operand:
                 return False
-            if not paren_stack:
+            depth += 1
+        elif kind == KIND_CLOSE:
+            if expecting_operand or not depth:
                 return False
-            paren_stack.pop()
+            depth -= 1
             # A closed parenthesis represents a complete operand.
             expecting_operand = False
-        elif is_operand(token):
+        elif kind == KIND_OPERAND:
             if not expecting_operand:
                 return False
             expecting_operand = False
-        elif is_operator(token):
+        elif kind == KIND_BINARY:
             if expecting_operand:
                 return False
             expecting_operand = True
+            has_operator = True
+        elif kind == KIND_UNARY:
+            # A unary operator comes before its operand.
+            if not expecting_operand:
+                return False
+            has_operator = True
         else:
-            # Should not happen because of the allowed pattern.
             return False
 
-    # Final checks: we must not be expecting an operand and all parentheses must be closed.
-    if expecting_operand or paren_stack:
-        return False
-
-    # Additional check: there must be at least one operator.
-    if not any(is_operator(token) for token in tokens):
-        return False
-
-    return True
+    # Final checks: we must not be expecting an operand, all parentheses must
+    # be closed and there must be at least one operator.
+    return not expecting_operand and not depth and has_operator
 
 
 def validate_prefix(expression):
     """
     Validate a prefix expression by counting operators and operands.
     For a valid prefix expression, at each point reading from left to right,
-    the number of operators must be greater than operands until the end.
+    the number of binary operators must be greater than operands until the end.
     """
-    tokens = tokenize(expression)
-    if not tokens:
+    return _valid_prefix(lex(expression, 'prefix'))
+
+def _valid_prefix(spans):
+    """validate_prefix on the spans of lex(expression, 'prefix')."""
+    if not spans:
         return False
-        
+
     # First token must be an operator
-    if not is_operator(tokens[0]):
+    if spans[0][0] not in (KIND_BINARY, KIND_UNARY):
         return False
-        
+
+    # Unary operators take the operand that follows them, so only binary
+    # operators change the number of operands needed.
     operator_count = 0
     operand_count = 0
-    
-    for token in tokens:
-        if is_operator(token):
+
+    for kind, _, _ in spans:
+        if kind == KIND_BINARY:
             operator_count += 1
-        elif is_operand(token):
+        elif kind == KIND_OPERAND:
             operand_count += 1
-        else:
+        elif kind != KIND_UNARY:
             return False
-            
+
         # At any point, if we have more operands than needed, it's invalid
         if operand_count > operator_count + 1:
             return False
-            
+
     # At the end, operands should be exactly one more than operators
     return operand_count == operator_count + 1
 
@@ -217,183 +424,707 @@ def validate_postfix(expression):
     """
     Validate a postfix expression by mirroring.
     """
-    tokens = tokenize(expression)
+    return _valid_postfix(lex(expression, 'postfix'))
+
+def _valid_postfix(spans):
+    """validate_postfix on the spans of lex(expression, 'postfix')."""
     # Must have at least one operator.
-    if not any(is_operator(token) for token in tokens):
+    if not any(kind == KIND_BINARY or kind == KIND_UNARY for kind, _, _ in spans):
         return False
 
-    stack = Stack()
-    for token in tokens:
-        if is_operand(token):
-            stack.push(token)
-        elif is_operator(token):
-            # Need at least two operands for an operator
-            if len(stack) < 2:
+    # Number of values on the stack
+    depth = 0
+    for kind, _, _ in spans:
+        if kind == KIND_OPERAND:
+            depth += 1
+        elif kind == KIND_BINARY:
+            # Need at least two operands for a binary operator; it leaves one result
+            if depth < 2:
+                return False
+            depth -= 1
+        elif kind == KIND_UNARY:
+            if depth < 1:
                 return False
-            # Pop two operands and push result placeholder
-            stack.pop()
-            stack.pop()
-            stack.push('X')
-        elif token in [' ', '\t', '\n']:
-            continue
         else:
             return False
-            
+
     # At the end, should have exactly one result
-    return len(stack) == 1
+    return depth == 1
 
 
 
-# Conversion Functions
+# Expression tree shared by the conversion functions
+
+class ExpressionTree:
+    """
+    A parsed expression stored as parallel arrays.
+
+    Node i is symbols[i], an operator or an operand, with the indices of its
+    children in left[i] and right[i] (-1 for operands). A unary operator
+    has its operand in left[i] and -1 in right[i]. Children are always
+    added before their parent, so walking the arrays in index order visits
+    every operand before the operator that uses it.
+
+    Each notation has one parser that builds a tree and one emitter that
+    writes it back out, so a parsed expression can be emitted to any
+    notation without parsing it again. spaced is True once an operand is
+    a name or number, whose prefix and postfix tokens need separating.
+    """
+    __slots__ = ('symbols', 'left', 'right', 'root', 'spaced')
+
+    def __init__(self):
+        self.symbols = []
+        self.left = []
+        self.right = []
+        self.root = -1
+        self.spaced = False
+
+    def add_operand(self, symbol):
+        """Add an operand node and return its index."""
+        if len(symbol) > 1 or (symbol.isascii() and not symbol.isupper()):
+            self.spaced = True
+        self.symbols.append(symbol)
+        self.left.append(-1)
+        self.right.append(-1)
+        return len(self.symbols) - 1
+
+    def add_operator(self, symbol, left, right=-1):
+        """Add an operator node over existing nodes (right=-1 for unary) and return its index."""
+        self.symbols.append(symbol)
+        self.left.append(left)
+        self.right.append(right)
+        return len(self.symbols) - 1
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+class ExpressionDAG(ExpressionTree):
+    """
+    An ExpressionTree that stores every distinct subexpression only once.
+
+    Nodes are interned by structure: an operand by its symbol and an operator
+    by its symbol and the indices of its (already interned) children, so two
+    identical subtrees always get the same index. Parse several expressions
+    into the same DAG to share subexpressions across a batch; each parse sets
+    root to the expression just parsed.
+    """
+    __slots__ = ('_index', 'requested')
+
+    def __init__(self):
+        super().__init__()
+        self._index = {}
+        # Number of nodes the parsers asked for, shared or not
+        self.requested = 0
+
+    def add_operand(self, symbol):
+        self.requested += 1
+        node = self._index.get(symbol)
+        if node is None:
+            node = self._index[symbol] = super().add_operand(symbol)
+        return node
+
+    def add_operator(self, symbol, left, right=-1):
+        self.requested += 1
+        key = (symbol, left, right)
+        node = self._index.get(key)
+        if node is None:
+            node = self._index[key] = super().add_operator(symbol, left, right)
+        return node
+
+    def add_expression(self, expression, notation='infix', validation='strict'):
+        """Parse an expression into the DAG and return the index of its root."""
+        if notation not in PARSERS:
+            raise ValueError(f"Unknown expression type: {notation}")
+        PARSERS[notation](expression, validation=validation, tree=self)
+        return self.root
+
+    def sharing_ratio(self):
+        """Nodes parsed per node stored; 1.0 means nothing was shared."""
+        return self.requested / len(self) if len(self) else 1.0
+
+
+# Parsers (one per notation)
+#
+# The parsers check the structure of the expression as they build the tree,
+# so they raise ValueError on malformed input even when the separate
+# validation pass is skipped. The validation level controls the extra passes:
+#   'strict'  - validate the input and re-validate the converted output
+#   'input'   - validate the input only
+#   'trusted' - no separate validation pass; only the checks made while parsing
+# Passing tree= builds into an existing tree (such as an ExpressionDAG shared by
+# a batch) instead of a new one; its root is set to the parsed expression.
+VALIDATION_LEVELS = ('strict', 'input', 'trusted')
+
+def _check_validation_level(validation):
+    """Raise ValueError for an unknown validation level."""
+    if validation not in VALIDATION_LEVELS:
+        raise ValueError(f"Unknown validation level: {validation}; expected one of {VALIDATION_LEVELS}")
+
+@preprocess
+def parse_infix(expression, validation='strict', tree=None):
+    """
+    Parse an infix expression into an ExpressionTree.
+    Uses the shunting-yard algorithm, reducing operators into tree nodes
+    instead of writing them to an output list.
+    """
+    _check_validation_level(validation)
+    # Lexed once, for validation and parsing. Untrusted input is lexed
+    # strictly; for the rest, tokens are read leniently, like tokenize, so
+    # that the 'trusted' level accepts what it always has.
+    spans = lex(expression, 'prefix' if validation == 'trusted' else 'infix')
+    if validation != 'trusted' and not _valid_infix(spans):
+        raise ValueError("Invalid infix expression.")
+    tree = ExpressionTree() if tree is None else tree
+    operands = Stack()
+    op_stack = Stack()
+
+    def reduce():
+        symbol = op_stack.pop()
+        right = operands.pop()
+        if TOKEN_KINDS[symbol] == KIND_UNARY:
+            operands.push(tree.add_operator(symbol, right))
+        else:
+            operands.push(tree.add_operator(symbol, operands.pop(), right))
+
+    # When True we expect an operand or an open parenthesis.
+    # When False we expect an operator or a closing parenthesis.
+    expecting_operand = True
+    for kind, start, end in spans:
+        if kind == KIND_OPERAND:
+            if not expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            operands.push(tree.add_operand(expression[start:end]))
+            expecting_operand = False
+            continue
+        token = _DASH_ALIASES.get(expression[start], expression[start])
+        if kind == KIND_OPEN or kind == KIND_UNARY:
+            # A unary operator waits on the stack for the operand after it.
+            if not expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            op_stack.push(token)
+        elif kind == KIND_CLOSE:
+            if expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            while not op_stack.is_empty() and op_stack.peek() != '(':
+                reduce()
+            if op_stack.is_empty():
+                raise ValueError("Mismatched parentheses.")
+            op_stack.pop()  # Discard the '('
+        elif kind == KIND_BINARY:
+            if expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            binding = BINDING[token]
+            while not op_stack.is_empty() and STACK_PRECEDENCE[op_stack.peek()] >= binding:
+                reduce()
+            op_stack.push(token)
+            expecting_operand = True
+        else:
+            raise ValueError(f"Unexpected token: {token}")
+    if expecting_operand:
+        raise ValueError("Invalid infix expression.")
+    while not op_stack.is_empty():
+        if op_stack.peek() == '(':
+            raise ValueError("Mismatched parentheses.")
+        reduce()
+    tree.root = operands.pop()
+    if tree.left[tree.root] < 0:
+        # The expression must contain at least one operator.
+        raise ValueError("Invalid infix expression.")
+    return tree
 
 @preprocess
-def prefix_to_infix(expression):
+def parse_prefix(expression, validation='strict', tree=None):
     """
-    Convert a prefix expression to infix.
-    This algorithm assumes single-character tokens.
+    Parse a prefix expression into an ExpressionTree.
+    Tokens are read right to left, so both operands of an operator are
+    already on the stack when the operator is reached.
     """
-    if not validate_prefix(expression):
+    _check_validation_level(validation)
+    spans = lex(expression, 'prefix')
+    if validation != 'trusted' and not _valid_prefix(spans):
         raise ValueError("Invalid prefix expression.")
-    tokens = tokenize(expression)
+    tree = ExpressionTree() if tree is None else tree
     stack = Stack()
-    for token in reversed(tokens):
-        if is_operator(token):
-            try:
-                op1 = stack.pop()
-                op2 = stack.pop()
-            except IndexError:
+    for kind, start, end in reversed(spans):
+        token = expression[start:end] if kind == KIND_OPERAND else _DASH_ALIASES.get(expression[start], expression[start])
+        if kind == KIND_BINARY:
+            if len(stack) < 2:
                 raise ValueError("Invalid prefix expression.")
-            # Parenthesize the resulting expression.
-            stack.push(f"({op1} {token} {op2})")
-        elif is_operand(token):
-            stack.push(token)
-        elif token == ' ':
-            continue
+            left = stack.pop()
+            right = stack.pop()
+            stack.push(tree.add_operator(token, left, right))
+        elif kind == KIND_UNARY:
+            if stack.is_empty():
+                raise ValueError("Invalid prefix expression.")
+            stack.push(tree.add_operator(token, stack.pop()))
+        elif kind == KIND_OPERAND:
+            stack.push(tree.add_operand(token))
         else:
             raise ValueError(f"Unexpected token: {token}")
     if len(stack) != 1:
         raise ValueError("Invalid prefix expression.")
-    return stack.pop()
+    tree.root = stack.pop()
+    if tree.left[tree.root] < 0:
+        raise ValueError("Invalid prefix expression.")
+    return tree
 
 @preprocess
-def postfix_to_infix(expression):
-    """
-    Convert a postfix expression to infix.
-    This algorithm assumes single-character tokens.
-    """
-    if not validate_postfix(expression):
+def parse_postfix(expression, validation='strict', tree=None):
+    """Parse a postfix expression into an ExpressionTree."""
+    _check_validation_level(validation)
+    spans = lex(expression, 'postfix')
+    if validation != 'trusted' and not _valid_postfix(spans):
         raise ValueError("Invalid postfix expression.")
-    tokens = tokenize(expression)
+    tree = ExpressionTree() if tree is None else tree
     stack = Stack()
-    for token in tokens:
-        if is_operand(token):
-            stack.push(token)
-        elif is_operator(token):
-            try:
-                op2 = stack.pop()
-                op1 = stack.pop()
-            except IndexError:
+    for kind, start, end in spans:
+        token = expression[start:end] if kind == KIND_OPERAND else _DASH_ALIASES.get(expression[start], expression[start])
+        if kind == KIND_OPERAND:
+            stack.push(tree.add_operand(token))
+        elif kind == KIND_BINARY:
+            if len(stack) < 2:
                 raise ValueError("Invalid postfix expression.")
-            stack.push(f"({op1} {token} {op2})")
-        elif token == ' ':
-            continue
+            right = stack.pop()
+            left = stack.pop()
+            stack.push(tree.add_operator(token, left, right))
+        elif kind == KIND_UNARY:
+            if stack.is_empty():
+                raise ValueError("Invalid postfix expression.")
+            stack.push(tree.add_operator(token, stack.pop()))
         else:
             raise ValueError(f"Unexpected token: {token}")
     if len(stack) != 1:
         raise ValueError("Invalid postfix expression.")
-    return stack.pop()
+    tree.root = stack.pop()
+    if tree.left[tree.root] < 0:
+        raise ValueError("Invalid postfix expression.")
+    return tree
+
 
+# Emitters (one per notation)
 
-def _shunting_yard(tokens):
+def emit_infix(tree):
     """
-    Convert a token list from infix to postfix using the shunting-yard algorithm.
-    Returns a list of tokens in postfix order.
+    Write a tree as a fully parenthesized infix string.
+    Every binary operator node becomes "(left op right)" and every unary
+    one "(op operand)". The pieces are collected in one list and joined at
+    the end, so the work is linear in the size of the tree no matter how
+    deeply it is nested.
     """
     output = []
-    op_stack = Stack()
-    for token in tokens:
-        if is_operand(token):
-            output.append(token)
-        elif token == '(':
-            op_stack.push(token)
-        elif token == ')':
-            while not op_stack.is_empty() and op_stack.peek() != '(':
-                output.append(op_stack.pop())
-            if op_stack.is_empty():
-                raise ValueError("Mismatched parentheses.")
-            op_stack.pop()  # Discard the '('
-        elif is_operator(token):
-            while (not op_stack.is_empty() and op_stack.peek() != '(' and
-                   ((ASSOCIATIVITY[token] == 'left' and PRECEDENCE[token] <= PRECEDENCE[op_stack.peek()]) or
-                    (ASSOCIATIVITY[token] == 'right' and PRECEDENCE[token] < PRECEDENCE[op_stack.peek()]))):
-                output.append(op_stack.pop())
-            op_stack.push(token)
+    symbols, left, right = tree.symbols, tree.left, tree.right
+    # Entries are node indices still to be written or literal text.
+    stack = [tree.root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            output.append(item)
+        elif left[item] < 0:
+            output.append(symbols[item])
+        elif right[item] < 0:
+            output.append('(' + symbols[item])
+            stack.append(')')
+            stack.append(left[item])
         else:
-            raise ValueError(f"Unexpected token: {token}")
-    while not op_stack.is_empty():
-        top = op_stack.pop()
-        if top == '(':
-            raise ValueError("Mismatched parentheses.")
-        output.append(top)
-    return output
+            output.append('(')
+            stack.append(')')
+            stack.append(right[item])
+            stack.append(f" {symbols[item]} ")
+            stack.append(left[item])
+    return "".join(output)
 
-@preprocess
-def infix_to_postfix(expression):
+def _separator(tree):
     """
-    Convert an infix expression to postfix (Reverse Polish Notation).
-    Uses the shunting-yard algorithm.
+    The text written between prefix and postfix tokens: nothing when every
+    operand is a single capital letter, so "+AB" stays "+AB", and a space
+    when names or numbers would otherwise run together.
     """
-    if not validate_infix(expression):
-        raise ValueError("Invalid infix expression.")
-    tokens = tokenize(expression)
-    postfix_tokens = _shunting_yard(tokens)
-    # Return as a string without spaces (or join with spaces if desired)
-    result = "".join(postfix_tokens)
-    if not validate_postfix(result):
+    return ' ' if tree.spaced else ''
+
+def emit_prefix(tree):
+    """Write a tree as a prefix string (operator, left, right)."""
+    output = []
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        output.append(tree.symbols[node])
+        if tree.right[node] >= 0:
+            stack.append(tree.right[node])
+        if tree.left[node] >= 0:
+            stack.append(tree.left[node])
+    return _separator(tree).join(output)
+
+def emit_postfix(tree):
+    """
+    Write a tree as a postfix string (left, right, operator).
+    We walk the tree as operator, right, left and reverse the result.
+    """
+    output = []
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        output.append(tree.symbols[node])
+        if tree.left[node] >= 0:
+            stack.append(tree.left[node])
+        if tree.right[node] >= 0:
+            stack.append(tree.right[node])
+    return _separator(tree).join(reversed(output))
+
+
+# Conversion Functions
+#
+# Every conversion function takes a validation level (see VALIDATION_LEVELS).
+# Only 'strict' re-validates the converted output.
+
+def prefix_to_infix(expression, validation='strict'):
+    """Convert a prefix expression to infix."""
+    return emit_infix(parse_prefix(expression, validation=validation))
+
+def postfix_to_infix(expression, validation='strict'):
+    """Convert a postfix expression to infix."""
+    return emit_infix(parse_postfix(expression, validation=validation))
+
+def infix_to_postfix(expression, validation='strict'):
+    """Convert an infix expression to postfix (Reverse Polish Notation)."""
+    result = emit_postfix(parse_infix(expression, validation=validation))
+    if validation == 'strict' and not validate_postfix(result):
         raise ValueError("Conversion resulted in an invalid postfix expression.")
     return result
 
-@preprocess
-def infix_to_prefix(expression):
+def infix_to_prefix(expression, validation='strict'):
+    """Convert an infix expression to prefix (Polish Notation)."""
+    result = emit_prefix(parse_infix(expression, validation=validation))
+    if validation == 'strict' and not validate_prefix(result):
+        raise ValueError("Conversion resulted in an invalid prefix expression.")
+    return result
+
+def prefix_to_postfix(expression, validation='strict'):
+    """Convert a prefix expression to postfix."""
+    return emit_postfix(parse_prefix(expression, validation=validation))
+
+def postfix_to_prefix(expression, validation='strict'):
+    """Convert a postfix expression to prefix."""
+    return emit_prefix(parse_postfix(expression, validation=validation))
+
+
+# Parsers and emitters by notation name
+PARSERS = {'infix': parse_infix, 'prefix': parse_prefix, 'postfix': parse_postfix}
+EMITTERS = {'infix': emit_infix, 'prefix': emit_prefix, 'postfix': emit_postfix}
+
+def convert(expression, source_type, target_type, validation='strict'):
     """
-    Convert an infix expression to prefix (Polish Notation).
-    The algorithm is:
-      1. Reverse the infix string.
-      2. Replace '(' with ')' and vice-versa.
-      3. Convert to postfix (using the shunting-yard algorithm).
-      4. Reverse the result.
+    Convert an expression from one notation to another.
+
+    Args:
+        expression (str): The expression to convert
+        source_type (str): Notation of the expression ('infix', 'prefix', or 'postfix')
+        target_type (str): Notation to convert to
+        validation (str): Validation level ('strict', 'input', or 'trusted')
+    Returns:
+        str: The converted expression
     """
-    if not validate_infix(expression):
-        raise ValueError("Invalid infix expression.")
-    # Reverse tokens and swap parentheses.
-    tokens = tokenize(expression)
-    tokens = tokens[::-1]
-    swapped = []
-    for token in tokens:
-        if token == '(':
-            swapped.append(')')
-        elif token == ')':
-            swapped.append('(')
-        else:
-            swapped.append(token)
-    # Convert to postfix using the shunting-yard algorithm.
-    postfix = _shunting_yard(swapped)
-    # The prefix is the reverse of the postfix.
-    prefix_tokens = postfix[::-1]
-    result = "".join(prefix_tokens)
-    if not validate_prefix(result):
-        raise ValueError("Conversion resulted in an invalid prefix expression.")
+    if source_type not in PARSERS:
+        raise ValueError(f"Unknown expression type: {source_type}")
+    if target_type not in EMITTERS:
+        raise ValueError(f"Unknown expression type: {target_type}")
+    result = EMITTERS[target_type](PARSERS[source_type](expression, validation=validation))
+    if validation == 'strict' and source_type == 'infix':
+        # Same output checks as infix_to_postfix and infix_to_prefix.
+        if target_type == 'postfix' and not validate_postfix(result):
+            raise ValueError("Conversion resulted in an invalid postfix expression.")
+        if target_type == 'prefix' and not validate_prefix(result):
+            raise ValueError("Conversion resulted in an invalid prefix expression.")
     return result
 
-def prefix_to_postfix(expression):
-    """Convert prefix to postfix via infix as an intermediate representation."""
-    infix = prefix_to_infix(expression)
-    return infix_to_postfix(infix)
+def convert_all(expression, source_type, validation='strict'):
+    """
+    Convert an expression to all three notations from a single parse.
 
-def postfix_to_prefix(expression):
-    """Convert postfix to prefix via infix as an intermediate representation."""
-    infix = postfix_to_infix(expression)
-    return infix_to_prefix(infix)
+    Args:
+        expression (str): The expression to convert
+        source_type (str): Notation of the expression ('infix', 'prefix', or 'postfix')
+        validation (str): Validation level ('strict', 'input', or 'trusted')
+    Returns:
+        dict: The expression in each notation, keyed by notation name
+    """
+    if source_type not in PARSERS:
+        raise ValueError(f"Unknown expression type: {source_type}")
+    tree = PARSERS[source_type](expression, validation=validation)
+    results = {notation: emit(tree) for notation, emit in EMITTERS.items()}
+    if validation == 'strict' and source_type == 'infix':
+        # Same output checks as infix_to_postfix and infix_to_prefix.
+        if not validate_postfix(results['postfix']):
+            raise ValueError("Conversion resulted in an invalid postfix expression.")
+        if not validate_prefix(results['prefix']):
+            raise ValueError("Conversion resulted in an invalid prefix expression.")
+    return results
+
+# Non-raising conversion
+#
+# check_expression finds the first error in an expression in a single pass,
+# so try_convert can report bad input as a value instead of raising. It
+# accepts exactly the expressions the converters accept at the 'strict'
+# level. Positions are character indices in the expression as given
+# (whitespace included); errors found at the end are at len(expression).
+
+ERR_NONE = 0
+ERR_NOT_A_STRING = 1
+ERR_CHARACTER = 2
+ERR_EXPECTED_OPERAND = 3
+ERR_EXPECTED_OPERATOR = 4
+ERR_PARENTHESES = 5
+ERR_EXTRA_TOKEN = 6
+ERR_NO_OPERATOR = 7
+
+ERROR_MESSAGES = {
+    ERR_NONE: "No error",
+    ERR_NOT_A_STRING: "Expression must be a string",
+    ERR_CHARACTER: "Unexpected character",
+    ERR_EXPECTED_OPERAND: "Expected an operand",
+    ERR_EXPECTED_OPERATOR: "Expected an operator",
+    ERR_PARENTHESES: "Mismatched parentheses",
+    ERR_EXTRA_TOKEN: "Unexpected token after the end of the expression",
+    ERR_NO_OPERATOR: "Expression has no operator",
+}
+
+def _check_infix(expression):
+    expecting_operand = True
+    depth = 0
+    operators = 0
+    for kind, position, _ in lex(expression, 'infix'):
+        if kind == KIND_OPERAND or kind == KIND_OPEN or kind == KIND_UNARY:
+            if not expecting_operand:
+                return ERR_EXPECTED_OPERATOR, position
+            if kind == KIND_OPERAND:
+                expecting_operand = False
+            elif kind == KIND_OPEN:
+                depth += 1
+            else:
+                operators += 1
+        elif kind == KIND_CLOSE:
+            if expecting_operand:
+                return ERR_EXPECTED_OPERAND, position
+            if depth == 0:
+                return ERR_PARENTHESES, position
+            depth -= 1
+        elif kind == KIND_BINARY:
+            if expecting_operand:
+                return ERR_EXPECTED_OPERAND, position
+            expecting_operand = True
+            operators += 1
+        else:
+            return ERR_CHARACTER, position
+    end = len(expression)
+    if expecting_operand:
+        return ERR_EXPECTED_OPERAND, end
+    if depth:
+        return ERR_PARENTHESES, end
+    if not operators:
+        return ERR_NO_OPERATOR, end
+    return ERR_NONE, -1
+
+def _check_prefix(expression):
+    # needed: operands still missing; the expression is complete when it reaches 0.
+    needed = 1
+    operators = 0
+    for kind, position, _ in lex(expression, 'prefix'):
+        if kind == KIND_OPERAND:
+            if needed == 0:
+                return ERR_EXTRA_TOKEN, position
+            needed -= 1
+        elif kind == KIND_BINARY or kind == KIND_UNARY:
+            if needed == 0:
+                return ERR_EXTRA_TOKEN, position
+            needed += kind == KIND_BINARY
+            operators += 1
+        else:
+            # Parentheses and invalid characters
+            return ERR_CHARACTER, position
+    end = len(expression)
+    if needed:
+        return ERR_EXPECTED_OPERAND, end
+    if not operators:
+        return ERR_NO_OPERATOR, end
+    return ERR_NONE, -1
+
+def _check_postfix(expression):
+    # depth: values on the stack; a binary operator takes two and leaves one,
+    # a unary operator takes one and leaves one.
+    depth = 0
+    operators = 0
+    for kind, position, _ in lex(expression, 'postfix'):
+        if kind == KIND_OPERAND:
+            depth += 1
+        elif kind == KIND_BINARY or kind == KIND_UNARY:
+            if depth < (2 if kind == KIND_BINARY else 1):
+                return ERR_EXPECTED_OPERAND, position
+            depth -= kind == KIND_BINARY
+            operators += 1
+        else:
+            return ERR_CHARACTER, position
+    end = len(expression)
+    if depth == 0:
+        return ERR_EXPECTED_OPERAND, end
+    if depth > 1:
+        return ERR_EXPECTED_OPERATOR, end
+    if not operators:
+        return ERR_NO_OPERATOR, end
+    return ERR_NONE, -1
+
+_CHECKS = {'infix': _check_infix, 'prefix': _check_prefix, 'postfix': _check_postfix}
+
+def check_expression(expression, notation):
+    """
+    Find the first error in an expression without raising.
+
+    Returns:
+        tuple: (error_code, position); (ERR_NONE, -1) when the expression is valid
+    """
+    if notation not in _CHECKS:
+        raise ValueError(f"Unknown expression type: {notation}")
+    if not isinstance(expression, str):
+        return ERR_NOT_A_STRING, 0
+    return _CHECKS[notation](expression)
+
+
+class ConversionResult:
+    """
+    The outcome of try_convert: the output, or an error code and position.
+    A result is true when the conversion succeeded.
+    """
+    __slots__ = ('output', 'error_code', 'error_position')
+
+    def __init__(self, output=None, error_code=ERR_NONE, error_position=-1):
+        self.output = output
+        self.error_code = error_code
+        self.error_position = error_position
+
+    @property
+    def ok(self):
+        return self.error_code == ERR_NONE
+
+    @property
+    def error(self):
+        """The error message, or None if the conversion succeeded."""
+        return None if self.error_code == ERR_NONE else ERROR_MESSAGES[self.error_code]
+
+    def __bool__(self):
+        return self.error_code == ERR_NONE
+
+    def __eq__(self, other):
+        if not isinstance(other, ConversionResult):
+            return NotImplemented
+        return (self.output, self.error_code, self.error_position) == \
+            (other.output, other.error_code, other.error_position)
+
+    def __repr__(self):
+        return (f"ConversionResult(output={self.output!r}, error_code={self.error_code}, "
+                f"error_position={self.error_position})")
+
+def try_convert(expression, source_type, target_type):
+    """
+    Convert an expression like convert, but return a ConversionResult instead of raising.
+
+    Invalid input is reported as an error code (one of the ERR_ constants) and
+    the position of the first error; the output is then None. An unknown
+    notation is a programming error and still raises ValueError.
+    """
+    if target_type not in EMITTERS:
+        raise ValueError(f"Unknown expression type: {target_type}")
+    error_code, position = check_expression(expression, source_type)
+    if error_code != ERR_NONE:
+        return ConversionResult(None, error_code, position)
+    # The check above is the strict validation, so the parser can trust its input.
+    return ConversionResult(EMITTERS[target_type](PARSERS[source_type](expression, validation='trusted')))
+
+def try_convert_all(expression, source_type):
+    """Like try_convert, with a dict of all three notations (see convert_all) as the output."""
+    error_code, position = check_expression(expression, source_type)
+    if error_code != ERR_NONE:
+        return ConversionResult(None, error_code, position)
+    return ConversionResult(convert_all(expression, source_type, validation='trusted'))
+
+# Streaming conversion for expressions too large to hold in memory
+
+STREAM_CHUNK_SIZE = 1 << 16
+
+def iter_chunks(file, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield fixed-size chunks of text from a file object until it is exhausted."""
+    return iter(lambda: file.read(chunk_size), '')
+
+def iter_tokens(chars):
+    """
+    Yield the tokens of an expression read from any iterable of characters
+    or string chunks, such as iter_chunks(file).
+
+    Produces the same tokens as tokenize() without building a copy of the
+    whole expression: each chunk is lexed on its own, except that a run of
+    name or number characters at the end of a chunk is held back until the
+    next chunk shows where it ends.
+    """
+    pending = ''
+    for chunk in chars:
+        text = pending + chunk
+        cut = len(text)
+        while cut and text[cut - 1] in _WORD_CHARACTERS:
+            cut -= 1
+        pending = text[cut:]
+        if cut:
+            yield from tokenize(text[:cut])
+    if pending:
+        yield from tokenize(pending)
+
+def iter_infix_to_postfix(chars):
+    """
+    Convert an infix expression to postfix as a stream of tokens.
+
+    Takes any iterable of characters or string chunks and yields each postfix
+    token as soon as it is determined; only the operator stack is kept in
+    memory. The expression is checked as it is read, like the 'trusted'
+    validation level, so ValueError may be raised after some tokens have
+    already been yielded.
+    """
+    op_stack = Stack()
+    expecting_operand = True
+    seen_operator = False
+    for token in iter_tokens(chars):
+        kind = token_kind(token)
+        if kind == KIND_OPERAND:
+            if not expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            expecting_operand = False
+            yield token
+        elif kind == KIND_OPEN or kind == KIND_UNARY:
+            if not expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            op_stack.push(token)
+            seen_operator = seen_operator or kind == KIND_UNARY
+        elif kind == KIND_CLOSE:
+            if expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            while not op_stack.is_empty() and op_stack.peek() != '(':
+                yield op_stack.pop()
+            if op_stack.is_empty():
+                raise ValueError("Mismatched parentheses.")
+            op_stack.pop()  # Discard the '('
+        elif kind == KIND_BINARY:
+            if expecting_operand:
+                raise ValueError("Invalid infix expression.")
+            binding = BINDING[token]
+            while not op_stack.is_empty() and STACK_PRECEDENCE[op_stack.peek()] >= binding:
+                yield op_stack.pop()
+            op_stack.push(token)
+            expecting_operand = True
+            seen_operator = True
+        else:
+            raise ValueError(f"Unexpected token: {token}")
+    if expecting_operand or not seen_operator:
+        raise ValueError("Invalid infix expression.")
+    while not op_stack.is_empty():
+        if op_stack.peek() == '(':
+            raise ValueError("Mismatched parentheses.")
+        yield op_stack.pop()
 
 def clean_expression(expression: str) -> str:
     """
@@ -441,11 +1172,8 @@ def standardize_expression(expr):
     # Replace en-dash and em-dash with regular minus
     expr = expr.replace('–', '-').replace('—', '-')
     
-    # Remove all spaces and quotes
-    expr = ''.join(expr.split())
-    expr = expr.replace('"', '')
-    
-    # Handle any other special characters
-    expr = ''.join(c for c in expr if c.isalnum() or c in '+-*/^()' or c == '-')
+    # Remove quotes and any other special characters
+    expr = ''.join(c for c in expr if c.isalnum() or c in OPERATORS or c in '()_. ' or c.isspace())
     
-    return expr
+    # Remove the spaces that do not separate two names or numbers
+    return compact_whitespace(expr)
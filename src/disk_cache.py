@@ -0,0 +1,211 @@
+"""This module contains an optional on-disk cache of conversion results that persists between runs.
+
+Results are stored in a SQLite database (outputs/conversion_cache.sqlite3 by default).
+Each entry maps a content hash of an expression and its notation to all three
+converted forms, or to the error message if the expression could not be converted,
+so a rerun over unchanged input only has to read the cache.
+
+Usage:
+    python -m src.disk_cache compact [path]    # trim to the size cap and reclaim space
+    python -m src.disk_cache info [path]       # print the number of entries
+"""
+
+import hashlib
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from src.converters import compact_whitespace
+
+# Bump this whenever a change to the converters changes their output or errors.
+# Opening a cache written with a different version discards its entries.
+CACHE_VERSION = 3
+
+DEFAULT_CACHE_PATH = 'outputs/conversion_cache.sqlite3'
+DEFAULT_MAX_ENTRIES = 1_000_000
+# Number of new entries held in memory before they are written out.
+WRITE_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    digest BLOB PRIMARY KEY,
+    infix TEXT,
+    prefix TEXT,
+    postfix TEXT,
+    error TEXT,
+    error_code INTEGER,
+    error_position INTEGER,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+# Fields of a result record, in column order
+_FIELDS = ('infix', 'prefix', 'postfix', 'error', 'error_code', 'error_position')
+
+
+class DiskCache:
+    """
+    A persistent cache of conversion results backed by SQLite.
+
+    Records have the same shape as the results of src.batch.convert_batch:
+    a dict with 'infix', 'prefix', 'postfix', 'error', 'error_code' and
+    'error_position' keys. Expressions are keyed on their text without the
+    whitespace that does not separate tokens (see compact_whitespace), their
+    notation and the validation level, so a cached result is always the same
+    as converting again.
+
+    Every run is a new generation. Entries remember the last generation that
+    used them, and when the cache holds more than max_entries the entries
+    from the oldest generations are removed first.
+
+    A cache can be shared by threads; its methods hold a lock.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, validation='strict'):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1; got {max_entries}")
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.validation = validation
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._used = set()
+        self._lock = threading.RLock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        meta = dict(self._db.execute("SELECT name, value FROM meta"))
+        if meta.get('version') != str(CACHE_VERSION):
+            # Written by converters that behaved differently; start over.
+            self._db.execute("DROP TABLE entries")
+            self._db.executescript(_SCHEMA)
+            meta = {}
+        self.generation = int(meta.get('generation', 0)) + 1
+        self._db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                             [('version', str(CACHE_VERSION)), ('generation', str(self.generation))])
+        self._db.commit()
+
+    def _digest(self, expression, source_type):
+        """Content hash of the expression as the converters see it."""
+        key = f"{source_type}\0{self.validation}\0{compact_whitespace(expression)}"
+        return hashlib.sha256(key.encode('utf-8')).digest()
+
+    def get(self, expression, source_type):
+        """Return the cached record for an expression, or None if it is not cached."""
+        with self._lock:
+            digest = self._digest(expression, source_type)
+            record = self._pending.get(digest)
+            if record is None:
+                row = self._db.execute("SELECT infix, prefix, postfix, error, error_code, error_position "
+                                       "FROM entries WHERE digest = ?", (digest,)).fetchone()
+                if row is not None:
+                    record = dict(zip(_FIELDS, row))
+                    self._used.add(digest)
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return record
+
+    def put(self, expression, source_type, record):
+        """Store the record (all three notations and the error fields) for an expression."""
+        with self._lock:
+            self._pending[self._digest(expression, source_type)] = {field: record.get(field) for field in _FIELDS}
+            if len(self._pending) >= WRITE_BATCH_SIZE:
+                self.flush()
+
+    def flush(self):
+        """Write new entries and the generation of entries used this run."""
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO entries "
+                    "(digest, infix, prefix, postfix, error, error_code, error_position, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(digest, *(r[field] for field in _FIELDS), self.generation)
+                     for digest, r in self._pending.items()])
+                self._db.executemany("UPDATE entries SET last_used = ? WHERE digest = ?",
+                                     [(self.generation, digest) for digest in self._used])
+            self._pending.clear()
+            self._used.clear()
+
+    def trim(self):
+        """Remove the least recently used entries above max_entries. Returns the number removed."""
+        with self._lock:
+            self.flush()
+            with self._db:
+                cursor = self._db.execute(
+                    "DELETE FROM entries WHERE digest IN ("
+                    "SELECT digest FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,))
+            return cursor.rowcount
+
+    def compact(self):
+        """Trim the cache to its size cap and give the freed space back to the file system."""
+        with self._lock:
+            removed = self.trim()
+            self._db.execute("VACUUM")
+            return removed
+
+    def close(self):
+        """Write out pending entries, enforce the size cap and close the database."""
+        with self._lock:
+            self.trim()
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            self.flush()
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_info(path=DEFAULT_CACHE_PATH):
+    """
+    Return (number of entries, cache version) of a cache file. The file is
+    opened read-only, so unlike DiskCache this starts no generation and keeps
+    the entries of other versions.
+    """
+    db = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        meta = dict(db.execute("SELECT name, value FROM meta"))
+        count = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    finally:
+        db.close()
+    return count, int(meta['version'])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ('compact', 'info'):
+        print("Usage: python -m src.disk_cache {compact,info} [path]")
+        return 2
+    path = argv[1] if len(argv) > 1 else DEFAULT_CACHE_PATH
+    if argv[0] == 'info':
+        if not Path(path).exists():
+            print(f"No cache at {path}")
+            return 1
+        count, version = read_info(path)
+        if version == CACHE_VERSION:
+            print(f"{count} entries in {path} (cache version {version})")
+        else:
+            print(f"{count} entries in {path} (cache version {version}; "
+                  f"they will be discarded when opened by version {CACHE_VERSION})")
+        return 0
+    with DiskCache(path) as cache:
+        removed = cache.compact()
+        print(f"Removed {removed} entries; {len(cache)} entries remain in {path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
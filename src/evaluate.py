@@ -0,0 +1,202 @@
+"""This module evaluates expressions over NumPy arrays of variable values.
+
+The expression is converted to postfix with the conversion functions, so
+precedence and associativity follow PRECEDENCE and ASSOCIATIVITY. Each
+operator is then applied as one whole-array NumPy operation. Intermediate
+results are written into reusable temporary buffers (with out=), so a long
+expression needs only as many buffers as its stack is deep, not one per operator.
+
+This module needs NumPy (pip install numpy).
+"""
+
+import numpy as np
+from src.converters import ARITY, REGISTRY, convert, tokenize, is_number, is_operand
+
+# Whole-array operation for each binary operator. Other registered operators
+# are applied with their registered function, which must accept arrays.
+UFUNCS = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.true_divide,
+    '^': np.power,
+}
+
+
+def _apply(symbol, operands, buffer, dtype):
+    """Apply an operator to its operand arrays, writing the result into buffer."""
+    ufunc = UFUNCS.get(symbol)
+    if ufunc is not None and len(operands) == 2:
+        ufunc(*operands, out=buffer, dtype=dtype)
+        return
+    function = REGISTRY[symbol].function
+    if function is None:
+        raise ValueError(f"Operator {symbol} has no evaluation function")
+    np.copyto(buffer, function(*operands), casting='unsafe')
+
+
+class EvaluationStats:
+    """Counters filled in by evaluate_postfix."""
+    __slots__ = ('operations', 'temporaries', 'peak_temporaries', 'peak_bytes')
+
+    def __init__(self):
+        self.operations = 0
+        # Buffers allocated, and the most of them in use at the same time
+        self.temporaries = 0
+        self.peak_temporaries = 0
+        # Memory high-water mark of the temporary buffers, in bytes
+        self.peak_bytes = 0
+
+    def __repr__(self):
+        return (f"EvaluationStats(operations={self.operations}, temporaries={self.temporaries}, "
+                f"peak_temporaries={self.peak_temporaries}, peak_bytes={self.peak_bytes})")
+
+
+def evaluate_postfix(postfix, bindings, dtype=np.float64, out=None, stats=None):
+    """
+    Evaluate a postfix expression over arrays of variable values.
+
+    Args:
+        postfix (str): The postfix expression, e.g. the output of infix_to_postfix
+        bindings (dict): Maps each variable to an array (or scalar) of its values
+        dtype: Type the arithmetic is done in
+        out (ndarray): Optional array to write the result to
+        stats (EvaluationStats): Optional object that receives buffer counters
+    Returns:
+        ndarray: The value of the expression for every row
+    """
+    tokens = tokenize(postfix)
+    variables = {token for token in tokens if is_operand(token) and not is_number(token)}
+    missing = variables - set(bindings)
+    if missing:
+        raise ValueError(f"No values bound to {', '.join(sorted(missing))}")
+    shape = np.broadcast_shapes(*(np.shape(bindings[name]) for name in variables))
+    if stats is None:
+        stats = EvaluationStats()
+
+    # Stack entries are (value, is_temporary); spare temporaries are reused.
+    stack = []
+    spare = []
+    in_use = 0
+    for token in tokens:
+        if is_operand(token):
+            stack.append((float(token) if is_number(token) else bindings[token], False))
+            continue
+        arity = ARITY[token]
+        if len(stack) < arity:
+            raise ValueError("Invalid postfix expression.")
+        operands = stack[-arity:]
+        del stack[-arity:]
+        # Write into the first temporary operand; the other one becomes spare.
+        temporaries = [value for value, is_temporary in operands if is_temporary]
+        if temporaries:
+            buffer = temporaries[0]
+            for extra in temporaries[1:]:
+                spare.append(extra)
+                in_use -= 1
+        else:
+            if spare:
+                buffer = spare.pop()
+            else:
+                buffer = np.empty(shape, dtype=dtype)
+                stats.temporaries += 1
+            in_use += 1
+            if in_use > stats.peak_temporaries:
+                stats.peak_temporaries = in_use
+                stats.peak_bytes = in_use * buffer.nbytes
+        _apply(token, [value for value, _ in operands], buffer, dtype)
+        stats.operations += 1
+        stack.append((buffer, True))
+    if len(stack) != 1 or not stack[0][1]:
+        raise ValueError("Invalid postfix expression.")
+    result = stack[0][0]
+    if out is not None:
+        np.copyto(out, result)
+        return out
+    return result
+
+
+def evaluate(expression, bindings, notation='infix', dtype=np.float64, out=None, stats=None):
+    """
+    Evaluate an expression in any notation over arrays of variable values.
+    See evaluate_postfix for the arguments.
+    """
+    postfix = convert(expression, notation, 'postfix')
+    return evaluate_postfix(postfix, bindings, dtype=dtype, out=out, stats=stats)
+
+
+def evaluate_tree(tree, bindings, roots=None, dtype=np.float64, stats=None):
+    """
+    Evaluate one or more roots of an ExpressionTree or ExpressionDAG.
+
+    Every node is computed once however many times it is shared, so in an
+    ExpressionDAG a common subexpression is evaluated once for the whole batch.
+    A temporary buffer goes back to the pool as soon as its last user is done.
+
+    Args:
+        tree (ExpressionTree): The parsed expression(s)
+        bindings (dict): Maps each variable to an array (or scalar) of its values
+        roots (iterable): Indices of the nodes to evaluate (default: tree.root)
+        dtype: Type the arithmetic is done in
+        stats (EvaluationStats): Optional object that receives buffer counters
+    Returns:
+        list: The value of each root, in order
+    """
+    roots = [tree.root] if roots is None else list(roots)
+    symbols, left, right = tree.symbols, tree.left, tree.right
+    if stats is None:
+        stats = EvaluationStats()
+
+    # Count the users of every reachable node. Each root has one extra use,
+    # so the values being returned are never recycled.
+    uses = [0] * len(tree)
+    reachable = [False] * len(tree)
+    for root in roots:
+        uses[root] += 1
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        if reachable[node]:
+            continue
+        reachable[node] = True
+        for child in (left[node], right[node]):
+            if child >= 0:
+                uses[child] += 1
+                stack.append(child)
+    variables = {symbols[node] for node in range(len(tree))
+                 if reachable[node] and left[node] < 0 and not is_number(symbols[node])}
+    missing = variables - set(bindings)
+    if missing:
+        raise ValueError(f"No values bound to {', '.join(sorted(missing))}")
+    shape = np.broadcast_shapes(*(np.shape(bindings[name]) for name in variables))
+
+    values = [None] * len(tree)
+    spare = []
+    in_use = 0
+    for node in range(len(tree)):
+        if not reachable[node]:
+            continue
+        if left[node] < 0:
+            symbol = symbols[node]
+            values[node] = float(symbol) if is_number(symbol) else bindings[symbol]
+            continue
+        if spare:
+            buffer = spare.pop()
+        else:
+            buffer = np.empty(shape, dtype=dtype)
+            stats.temporaries += 1
+        in_use += 1
+        if in_use > stats.peak_temporaries:
+            stats.peak_temporaries = in_use
+            stats.peak_bytes = in_use * buffer.nbytes
+        children = (left[node],) if right[node] < 0 else (left[node], right[node])
+        _apply(symbols[node], [values[child] for child in children], buffer, dtype)
+        stats.operations += 1
+        values[node] = buffer
+        for child in children:
+            uses[child] -= 1
+            if uses[child] == 0 and left[child] >= 0:
+                spare.append(values[child])
+                values[child] = None
+                in_use -= 1
+    return [values[root] for root in roots]
@@ -0,0 +1,148 @@
+"""This module keeps the per-file reports up to date by redoing only what changed.
+
+A manifest (outputs/manifest.json by default) records the content hash of
+every input file whose report has been written. update_outputs compares the
+data directory against it and regenerates the reports of new and changed
+files only, and removes the reports of inputs that are gone. A file whose
+size and modification time are unchanged is not even hashed. The manifest
+also records the version of the converters' behaviour (CACHE_VERSION, as
+in src.disk_cache); when that changes, every input counts as changed.
+
+Within a changed file, lines that were converted before are read back from
+the on-disk cache (src.disk_cache) instead of being converted again, so a
+file that only grew by a few lines costs only those lines.
+
+watch repeats the update on a fixed interval. It polls the file system, so
+it needs no OS-specific change notifications.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from src.checkpoint import write_atomic
+from src.disk_cache import CACHE_VERSION
+from src.pipeline import DEFAULT_IO_WORKERS, find_input_files, map_files
+from src.writers import output_path, remove_output
+
+DEFAULT_MANIFEST_PATH = 'outputs/manifest.json'
+DEFAULT_POLL_INTERVAL = 2.0
+MANIFEST_VERSION = 1
+# Bytes hashed at a time
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """The SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    The inputs whose reports are up to date, saved to a JSON file.
+
+    Maps each input file to its entry: the SHA-256 of its contents and the
+    size and modification time it had when it was hashed.
+    """
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = Path(path)
+        self.files = {}
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') == MANIFEST_VERSION:
+                self.files = data['files']
+                if data.get('converters') != CACHE_VERSION:
+                    # Written by converters that behaved differently: keep the
+                    # inputs, so removed ones are still cleaned up, but forget
+                    # their contents so every report is regenerated.
+                    self.files = {name: {'sha256': None, 'size': None, 'mtime_ns': None} for name in self.files}
+
+    def check(self, file_path, outputs):
+        """
+        Return None if the outputs of an input file are up to date, or else
+        the manifest entry to record once they have been regenerated.
+        """
+        stat = os.stat(file_path)
+        entry = self.files.get(str(file_path))
+        if entry is not None and not all(Path(output).exists() for output in outputs):
+            # An output is missing, e.g. a format that was not asked for before.
+            entry = None
+        if entry is not None and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return None
+        digest = file_digest(file_path)
+        if entry is not None and entry['sha256'] == digest:
+            # Touched but not changed: remember the new time so it is not hashed again.
+            entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+            return None
+        return {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, json.dumps({'version': MANIFEST_VERSION, 'converters': CACHE_VERSION,
+                                            'files': self.files}, indent=2))
+
+
+def update_outputs(data_dir, output_dir, process, manifest, io_workers: int = DEFAULT_IO_WORKERS,
+                   formats=('human',)):
+    """
+    Bring the outputs in output_dir, in each of formats, up to date with the
+    inputs in data_dir.
+
+    process(file_path, expr_type) regenerates one file's outputs and returns its
+    (ExpressionStacks, ErrorReport), like src.main.process_file.
+
+    Returns:
+        tuple: (updated, removed) where updated lists (file_path, ErrorReport)
+        for every regenerated input and removed lists the paths of the
+        outputs deleted because their input is gone
+    """
+    input_files = list(find_input_files(Path(data_dir)))
+    changed = []
+    for file_path, expr_type in input_files:
+        entry = manifest.check(file_path, [output_path(file_path, output_dir, name) for name in formats])
+        if entry is not None:
+            changed.append((file_path, expr_type, entry))
+
+    updated = []
+    results = map_files(process, [(file_path, expr_type) for file_path, expr_type, _ in changed], io_workers)
+    for (file_path, _, entry), (stacks, errors) in zip(changed, results):
+        stacks.close()
+        # The entry was taken before the file was read, so a change made
+        # while it was being converted is picked up by the next update.
+        manifest.files[str(file_path)] = entry
+        updated.append((file_path, errors))
+
+    removed = []
+    current = {str(file_path) for file_path, _ in input_files}
+    for name in sorted(set(manifest.files) - current):
+        for format in formats:
+            output = output_path(name, output_dir, format)
+            if output.exists():
+                remove_output(output)
+                removed.append(output)
+        del manifest.files[name]
+    manifest.save()
+    return updated, removed
+
+
+def watch(update, interval: float = DEFAULT_POLL_INTERVAL, polls=None, sleep=time.sleep):
+    """
+    Call update() every interval seconds, until interrupted or, if polls is
+    given, polls times.
+    """
+    count = 0
+    try:
+        while polls is None or count < polls:
+            update()
+            count += 1
+            if polls is None or count < polls:
+                sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return count
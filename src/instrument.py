@@ -0,0 +1,222 @@
+"""This module contains opt-in timing and counters for the stages of a conversion.
+
+While an Instrumentation is enabled, the stage functions of the converters
+module (lexing, validation, parsing, emitting, ...) and the conversion
+functions are replaced by timed wrappers, in the module and in the PARSERS,
+EMITTERS and check tables. Disabling it puts the original functions back,
+so when instrumentation is off the converters run exactly the code they
+always do and there is no overhead at all.
+
+    with Instrumentation() as instrumentation:
+        convert_all("A + B * C", 'infix')
+    print(instrumentation.format())
+
+Every call is recorded under the outermost conversion function it ran in
+(its converter) and its own name (its stage). Stages nest, e.g. lex runs
+inside validate_infix and parse_infix, so each stage has a total time and a
+self time that leaves out the stages it called; the self times of a
+converter's stages add up to the converter's total.
+
+Only calls made in this process through the converters module are seen:
+functions imported by name before enabling (from src.converters import
+convert_all) are not wrapped, and conversions in worker processes are not
+recorded. Instrumentation is not thread-safe.
+"""
+
+import time
+from src import converters
+
+# Conversion functions; a call to one of them starts a new converter unless
+# it is made from inside another one.
+CONVERTERS = (
+    'prefix_to_infix', 'postfix_to_infix', 'infix_to_postfix', 'infix_to_prefix',
+    'prefix_to_postfix', 'postfix_to_prefix', 'convert', 'convert_all',
+    'try_convert', 'try_convert_all',
+)
+# Stage functions timed inside a conversion
+STAGES = (
+    'standardize_expression', 'tokenize', 'lex',
+    'validate_infix', 'validate_prefix', 'validate_postfix', '_valid_infix', '_valid_prefix', '_valid_postfix',
+    'check_expression',
+    '_check_infix', '_check_prefix', '_check_postfix',
+    'parse_infix', 'parse_prefix', 'parse_postfix',
+    'emit_infix', 'emit_prefix', 'emit_postfix',
+)
+# Tables in the converters module that hold references to stage functions
+_TABLES = ('PARSERS', 'EMITTERS', '_CHECKS')
+
+# Number of tokens a stage handled, from its arguments and result. Parsers
+# count the nodes of the tree they built, which is also counted for the converter.
+_TOKEN_COUNTS = {
+    'tokenize': lambda args, result: len(result),
+    'lex': lambda args, result: len(result),
+    'parse_infix': lambda args, result: len(result),
+    'parse_prefix': lambda args, result: len(result),
+    'parse_postfix': lambda args, result: len(result),
+    'emit_infix': lambda args, result: len(args[0]),
+    'emit_prefix': lambda args, result: len(args[0]),
+    'emit_postfix': lambda args, result: len(args[0]),
+}
+_PARSER_STAGES = {'parse_infix', 'parse_prefix', 'parse_postfix'}
+
+_active = None
+
+
+class StageStats:
+    """Counters for one stage of one converter."""
+    __slots__ = ('calls', 'errors', 'tokens', 'seconds', 'self_seconds')
+
+    def __init__(self):
+        self.calls = 0
+        # Calls that raised
+        self.errors = 0
+        self.tokens = 0
+        # Wall time including, and excluding, the stages it called
+        self.seconds = 0.0
+        self.self_seconds = 0.0
+
+    def __repr__(self):
+        return (f"StageStats(calls={self.calls}, errors={self.errors}, tokens={self.tokens}, "
+                f"seconds={self.seconds:.6f}, self_seconds={self.self_seconds:.6f})")
+
+
+class Instrumentation:
+    """
+    Records per-stage wall time, call counts and token counts of the converters.
+
+    Use it as a context manager, or call enable and disable. The counters
+    are kept between uses, so one Instrumentation can cover several runs.
+    Only one Instrumentation can be enabled at a time.
+    """
+    def __init__(self):
+        # (converter, stage) -> StageStats; a converter's own row has stage == converter
+        self.stats = {}
+        # [converter, time spent in called stages, tokens] per active call
+        self._frames = []
+        self._originals = {}
+
+    @property
+    def enabled(self):
+        return _active is self
+
+    def enable(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError("Instrumentation is already enabled")
+        _active = self
+        for name in CONVERTERS + STAGES:
+            function = getattr(converters, name)
+            self._originals[name] = function
+            setattr(converters, name, self._wrap(name, function))
+        for table in _TABLES:
+            table = getattr(converters, table)
+            for key, function in table.items():
+                table[key] = getattr(converters, function.__name__)
+
+    def disable(self):
+        global _active
+        if _active is not self:
+            return
+        for table in _TABLES:
+            table = getattr(converters, table)
+            for key, function in table.items():
+                table[key] = self._originals[function.__name__]
+        for name, function in self._originals.items():
+            setattr(converters, name, function)
+        self._originals = {}
+        _active = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def _wrap(self, name, function):
+        """Return a wrapper that times calls to function under the given stage name."""
+        frames = self._frames
+        stats = self.stats
+        clock = time.perf_counter
+        count = _TOKEN_COUNTS.get(name)
+        is_converter = name in CONVERTERS
+        is_parser = name in _PARSER_STAGES
+
+        def wrapper(*args, **kwargs):
+            if not frames and not is_converter:
+                converter = '-'
+            else:
+                converter = frames[0][0] if frames else name
+            frame = [converter, 0.0, 0]
+            frames.append(frame)
+            failed = True
+            start = clock()
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = clock() - start
+                frames.pop()
+                if frames:
+                    frames[-1][1] += elapsed
+                entry = stats.get((converter, name))
+                if entry is None:
+                    entry = stats[converter, name] = StageStats()
+                entry.calls += 1
+                entry.seconds += elapsed
+                entry.self_seconds += elapsed - frame[1]
+                if failed:
+                    entry.errors += 1
+                else:
+                    if count is not None:
+                        tokens = count(args, result)
+                        entry.tokens += tokens
+                        if is_parser and frames:
+                            frames[0][2] += tokens
+                    if not frames:
+                        entry.tokens += frame[2]
+
+        wrapper.__name__ = name
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    def to_dict(self):
+        """The counters as plain data, grouped by converter, slowest first."""
+        converters_seconds = {}
+        for (converter, stage), entry in self.stats.items():
+            if converter == stage or converter == '-':
+                converters_seconds[converter] = converters_seconds.get(converter, 0.0) + entry.seconds
+        result = []
+        for converter in sorted(converters_seconds, key=converters_seconds.get, reverse=True):
+            stages = [(stage, entry) for (name, stage), entry in self.stats.items() if name == converter]
+            stages.sort(key=lambda item: (item[0] != converter, -item[1].self_seconds))
+            result.append({
+                'converter': converter,
+                'stages': [
+                    {
+                        'stage': stage,
+                        'calls': entry.calls,
+                        'errors': entry.errors,
+                        'tokens': entry.tokens,
+                        'seconds': entry.seconds,
+                        'self_seconds': entry.self_seconds,
+                    }
+                    for stage, entry in stages
+                ],
+            })
+        return result
+
+    def format(self):
+        """A table of the counters, one block of stages per converter."""
+        lines = [f"{'converter':<18} {'stage':<24} {'calls':>9} {'errors':>7} {'tokens':>10} "
+                 f"{'total ms':>10} {'self ms':>10}"]
+        for block in self.to_dict():
+            converter = block['converter']
+            for stage in block['stages']:
+                name = '(total)' if stage['stage'] == converter else stage['stage']
+                lines.append(f"{converter:<18} {name:<24} {stage['calls']:>9} {stage['errors']:>7} "
+                             f"{stage['tokens']:>10} {stage['seconds'] * 1e3:>10.3f} "
+                             f"{stage['self_seconds'] * 1e3:>10.3f}")
+                converter = ''
+        return "\n".join(lines)
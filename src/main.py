@@ -1,18 +1,26 @@
+import argparse
+import functools
+import shutil
+import sys
+import tempfile
 import yaml
 import os
-from pathlib import Path
 from collections import deque
-from src.converters import (
-    infix_to_prefix,
-    infix_to_postfix,
-    prefix_to_infix,
-    prefix_to_postfix,
-    postfix_to_infix,
-    postfix_to_prefix,
-)
+from pathlib import Path
+from src.batch import BatchConverter, DEFAULT_CHUNKSIZE
+from src.checkpoint import Checkpoint, DEFAULT_CHECKPOINT_EVERY, DEFAULT_CHECKPOINT_PATH, open_output, sync_output
+from src.disk_cache import DiskCache, DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES
+from src.incremental import DEFAULT_MANIFEST_PATH, DEFAULT_POLL_INTERVAL, Manifest, update_outputs, watch
+from src.instrument import Instrumentation
+from src.mapped_file import MappedFile
+from src.pipeline import (DEFAULT_IO_WORKERS, ErrorReport, convert_expressions, find_input_files, map_files,
+                          read_file_records)
+from src.writers import FORMATS, open_writers, output_path
 
 CONFIG_PATH = 'src/config.yml'
 OUTPUT_DIR = 'outputs'
+# Write buffer for each spooled expression stack
+SPOOL_BUFFER_SIZE = 1 << 16
 
 def get_config() -> dict:
     with open(CONFIG_PATH) as f:
@@ -40,9 +48,10 @@ def get_data_paths() -> dict:
         'postfix': postfix_files[0]
     }
 
-def read_expressions(file_path: Path) -> list:
-    with open(file_path, 'r') as f:
-        return [line.strip() for line in f if line.strip()]
+def read_expressions(file_path: Path, start: int = 0, stop: int = None) -> list:
+    # Lines start to stop of the file (all of it by default), without the blank ones
+    with MappedFile(file_path) as file:
+        return [line.strip() for _, line in file.iter_lines(start, stop) if line.strip()]
 
 def identify_expression(expr: str) -> str:
     expr = expr.strip()
@@ -56,81 +65,266 @@ def identify_expression(expr: str) -> str:
     return 'infix'
 
 class ExpressionStacks:
-    def __init__(self):
-        self.stacks = {
-            'infix': deque(),
-            'prefix': deque(),
-            'postfix': deque()
-        }
+    """
+    The infix, prefix and postfix stacks, spooled to temporary files.
+
+    Expressions are written to disk as they are added, so memory use does not
+    grow with the number of expressions. print_all streams them back in order.
+
+    With a spool_prefix the stacks go to the named files <spool_prefix>.<type>
+    instead, so they outlive the process and can be resumed: offsets from
+    an earlier offsets() call cut them back to that point.
+    """
+    def __init__(self, spool_prefix=None, offsets=None):
+        if spool_prefix is None:
+            self.stacks = {
+                typ: tempfile.TemporaryFile('w+', encoding='utf-8', buffering=SPOOL_BUFFER_SIZE)
+                for typ in ['infix', 'prefix', 'postfix']
+            }
+        else:
+            self.stacks = {
+                typ: open_output(f"{spool_prefix}.{typ}", None if offsets is None else offsets[typ])
+                for typ in ['infix', 'prefix', 'postfix']
+            }
     
     def add(self, expr: str, expr_type: str):
-        self.stacks[expr_type].append(expr)
+        self.stacks[expr_type].write(expr + '\n')
     
     def print_all(self):
         print("\nContents of Expression Stacks:")
         for typ in ['infix', 'prefix', 'postfix']:
             print(f"\n{typ.capitalize()} Stack:")
-            for expr in self.stacks[typ]:
-                print(expr)
+            spool = self.stacks[typ]
+            spool.seek(0)
+            # Copied in large blocks rather than printed line by line
+            sys.stdout.flush()
+            shutil.copyfileobj(spool, sys.stdout)
+            spool.seek(0, os.SEEK_END)
 
-def process_expression(expr: str, original_type: str, stacks: ExpressionStacks):
-    # Add original expression to its stack
-    stacks.add(expr.strip(), original_type)
-    
-    try:
-        if original_type == 'infix':
-            # Convert infix to others
-            prefix_expr = infix_to_prefix(expr)
-            postfix_expr = infix_to_postfix(expr)
-            stacks.add(prefix_expr, 'prefix')
-            stacks.add(postfix_expr, 'postfix')
-            
-        elif original_type == 'prefix':
-            # Convert prefix to others
-            infix_expr = prefix_to_infix(expr)
-            postfix_expr = prefix_to_postfix(expr)
-            stacks.add(infix_expr, 'infix')
-            stacks.add(postfix_expr, 'postfix')
-            
-        elif original_type == 'postfix':
-            # Convert postfix to others
-            infix_expr = postfix_to_infix(expr)
-            prefix_expr = postfix_to_prefix(expr)
-            stacks.add(infix_expr, 'infix')
-            stacks.add(prefix_expr, 'prefix')
-            
-    except Exception as e:
-        print(f"Error converting expression '{expr}': {e}")
-
-def main():
+    def merge(self, other):
+        """Append the contents of another ExpressionStacks, e.g. the stacks of one file."""
+        for typ, spool in self.stacks.items():
+            source = other.stacks[typ]
+            source.seek(0)
+            shutil.copyfileobj(source, spool)
+            source.seek(0, os.SEEK_END)
+
+    def offsets(self):
+        """Flush the stacks and return the size of each spool."""
+        return {typ: sync_output(spool) for typ, spool in self.stacks.items()}
+
+    def close(self):
+        for spool in self.stacks.values():
+            spool.close()
+
+def write_results(results, stacks: ExpressionStacks, errors: ErrorReport, report=None):
+    # Writer stage: add each original and converted expression to its stack;
+    # expressions that could not be converted go to the error report.
+    # Every record also goes to the report writer, if there is one.
+    for expr, original_type, result in results:
+        if report is not None:
+            report.write(expr, original_type, result)
+        stacks.add(expr, original_type)
+        if result['error'] is not None:
+            errors.add_result(expr, original_type, result)
+            continue
+        for expr_type in ['infix', 'prefix', 'postfix']:
+            if expr_type != original_type:
+                stacks.add(result[expr_type], expr_type)
+
+def process_file(file_path: Path, expr_type: str, converter, output_dir: Path, cache=None,
+                 checkpoint=None, checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY, formats=('human',)):
+    """
+    Convert one input file and write its outputs in each of formats to
+    output_dir (see src.writers.output_path); by default only the report
+    output_dir/converted_<name>.
+    Returns the file's (ExpressionStacks, ErrorReport); the caller closes the stacks.
+
+    With a Checkpoint, the progress through the file is saved every
+    checkpoint_every expressions, and a file the checkpoint has seen
+    carries on where it stopped (a finished one is not converted again),
+    unless it was written in other formats, in which case it starts over.
+    """
+    if checkpoint is None:
+        stacks = ExpressionStacks()
+        errors = ErrorReport()
+        with open_writers(formats, file_path, output_dir) as report:
+            results = convert_expressions(read_file_records(file_path, expr_type), converter, cache)
+            write_results(results, stacks, errors, report)
+        return stacks, errors
+
+    state = checkpoint.get(file_path) or {}
+    if state.get('formats') != list(formats):
+        # Saved by a run that wrote other formats; its outputs do not match.
+        state = {}
+    errors = ErrorReport.from_dict(state['errors']) if state else ErrorReport()
+    stacks = ExpressionStacks(checkpoint.spool_dir / f"{file_path.name}.stack", state.get('stacks'))
+    if state.get('done'):
+        return stacks, errors
+    report = open_writers(formats, file_path, output_dir, spool_dir=checkpoint.spool_dir, offsets=state.get('report'))
+    line = state.get('line', 0)
+
+    def save(done=False):
+        checkpoint.update(file_path, {
+            'line': line,
+            'done': done,
+            'formats': list(formats),
+            'report': None if done else report.offsets(),
+            'stacks': stacks.offsets(),
+            'errors': errors.to_dict(),
+        })
+
+    def tracked(results):
+        # Runs on between records: once the writer asks for the next record,
+        # the previous one has been written out.
+        nonlocal line
+        for count, record in enumerate(results, 1):
+            yield record
+            line = line_ends.popleft()
+            if count % checkpoint_every == 0:
+                save()
+
+    line_ends = deque()
+    with report:
+        results = convert_expressions(read_file_records(file_path, expr_type, line, line_ends), converter, cache)
+        write_results(tracked(results), stacks, errors, report)
+    save(done=True)
+    return stacks, errors
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the expressions in resources/data.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes used for conversion (default: 1)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"expressions sent to a worker at a time (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument('--io-workers', type=int, default=DEFAULT_IO_WORKERS,
+                        help=f"number of input files read and written at once (default: {DEFAULT_IO_WORKERS})")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, metavar='DIR',
+                        help=f"directory of the per-file reports (default: {OUTPUT_DIR})")
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=['human'], dest='formats',
+                        help="formats of the per-file outputs: the human-readable report, JSON lines, "
+                             "tab-separated values or one file per column (default: human)")
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, default=None, metavar='PATH',
+                        help=f"reuse results from an on-disk cache (default path: {DEFAULT_CACHE_PATH})")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help=f"maximum number of cached expressions (default: {DEFAULT_MAX_ENTRIES})")
+    parser.add_argument('--checkpoint', nargs='?', const=DEFAULT_CHECKPOINT_PATH, default=None, metavar='PATH',
+                        help=f"save progress so a killed run can be resumed (default path: {DEFAULT_CHECKPOINT_PATH})")
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY, metavar='N',
+                        help=f"expressions of a file converted between checkpoints (default: {DEFAULT_CHECKPOINT_EVERY})")
+    parser.add_argument('--resume', action='store_true',
+                        help="carry on from the checkpoint of an earlier run instead of starting over")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only regenerate the reports of inputs that changed since the last run")
+    parser.add_argument('--watch', nargs='?', type=float, const=DEFAULT_POLL_INTERVAL, default=None,
+                        metavar='SECONDS',
+                        help=f"keep the reports up to date, checking the inputs every SECONDS "
+                             f"(default: {DEFAULT_POLL_INTERVAL}); implies --incremental")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH, metavar='PATH',
+                        help=f"where --incremental keeps the hashes of the inputs (default: {DEFAULT_MANIFEST_PATH})")
+    parser.add_argument('--error-report', default=None, metavar='PATH',
+                        help="write the expressions that could not be converted to PATH as JSON")
+    parser.add_argument('--instrument', action='store_true',
+                        help="time every stage of the conversions and print a summary table "
+                             "(needs --workers 1; reads one file at a time)")
+    args = parser.parse_args(argv)
+    # Each format once, in the order given
+    args.formats = list(dict.fromkeys(args.formats))
+    if args.instrument and args.workers > 1:
+        # Conversions in worker processes cannot be timed from here.
+        parser.error("--instrument needs --workers 1")
+    if args.instrument:
+        # Instrumentation is not thread-safe.
+        args.io_workers = 1
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1")
+    if args.resume and args.checkpoint is None:
+        args.checkpoint = DEFAULT_CHECKPOINT_PATH
+    if args.watch is not None:
+        args.incremental = True
+    if args.incremental:
+        if args.checkpoint:
+            parser.error("--incremental cannot be combined with --checkpoint or --resume")
+        # Unchanged lines of a changed file are read back from the cache.
+        args.cache = args.cache or DEFAULT_CACHE_PATH
+    return args
+
+def run_incremental(args, data_dir: Path):
+    # Regenerate the reports of changed inputs only, once or every args.watch seconds
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(args.manifest)
+    with BatchConverter(workers=args.workers, chunksize=args.chunksize) as converter:
+        def update():
+            # A fresh cache generation per update, so its entries are written out each time
+            with DiskCache(args.cache, max_entries=args.cache_size) as cache:
+                process = functools.partial(process_file, converter=converter, output_dir=output_dir, cache=cache,
+                                            formats=args.formats)
+                updated, removed = update_outputs(data_dir, output_dir, process, manifest, args.io_workers,
+                                                  args.formats)
+            for file_path, errors in updated:
+                failed = f" ({len(errors)} failed to convert)" if errors else ""
+                outputs = ", ".join(str(output_path(file_path, output_dir, name)) for name in args.formats)
+                print(f"Updated {outputs}{failed}")
+            for output in removed:
+                print(f"Removed {output}")
+
+        if args.watch is None:
+            update()
+        else:
+            print(f"Watching {data_dir} every {args.watch:g} seconds; press Ctrl+C to stop.")
+            watch(update, args.watch)
+
+def main(argv=None):
+    args = parse_args(argv)
     data_dir = Path('resources/data')
+    if args.incremental:
+        run_incremental(args, data_dir)
+        return
     stacks = ExpressionStacks()
+    errors = ErrorReport()
+    cache = DiskCache(args.cache, max_entries=args.cache_size) if args.cache else None
+    instrumentation = Instrumentation() if args.instrument else None
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume) if args.checkpoint else None
+    
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Stream the expressions of every file through reader -> converter -> writer,
+    # several files at once, and merge the per-file stacks and errors in file order
+    if instrumentation is not None:
+        instrumentation.enable()
+    try:
+        with BatchConverter(workers=args.workers, chunksize=args.chunksize) as converter:
+            process = functools.partial(process_file, converter=converter, output_dir=output_dir, cache=cache,
+                                        checkpoint=checkpoint, checkpoint_every=args.checkpoint_every,
+                                        formats=args.formats)
+            for file_stacks, file_errors in map_files(process, find_input_files(data_dir), args.io_workers):
+                stacks.merge(file_stacks)
+                file_stacks.close()
+                errors.merge(file_errors)
+    finally:
+        # Even if a file fails: unpatch the converters and save what is in the cache
+        if instrumentation is not None:
+            instrumentation.disable()
+        if cache is not None:
+            cache.close()
     
-    # Process all files in the data directory
-    for file_path in data_dir.iterdir():
-        if file_path.is_file():
-            # Determine expression type from filename
-            filename = file_path.name.lower()
-            if 'infix' in filename:
-                expr_type = 'infix'
-            elif 'prefix' in filename:
-                expr_type = 'prefix'
-            elif 'postfix' in filename:
-                expr_type = 'postfix'
-            else:
-                continue  # Skip files that don't match any type
-            
-            # Read and process expressions from the file
-            try:
-                with open(file_path, 'r') as file:
-                    for line in file:
-                        if line.strip():
-                            process_expression(line.strip(), expr_type, stacks)
-            except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
+    if checkpoint is not None:
+        # Every file is finished; the next run starts over.
+        checkpoint.remove()
     
-    # Print all stacks
+    # Print all stacks, then a summary of the expressions that failed
     stacks.print_all()
+    stacks.close()
+    if errors:
+        print()
+        print(errors.format())
+    if args.error_report:
+        errors.write_json(args.error_report)
+    if instrumentation is not None:
+        print("\nConversion stages:")
+        print(instrumentation.format())
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""This module contains a memory-mapped reader for large input files.
+
+A MappedFile maps the file into memory instead of reading it, and finds its
+lines through a line-offset index: an array('Q') holding the byte offset at
+which every line starts, followed by the size of the file. With the index a
+range of lines is a range of bytes, so any slice of the file can be read
+directly, without copying or reading what comes before it. That lets a
+worker process take its own byte range of one large file, and a run resume
+at a given line.
+
+Building the index takes one pass over the file. save_index writes it to a
+sidecar file next to the input (<name>.lineidx) so later runs can load it
+instead; a sidecar whose file has changed size or modification time since
+it was written is ignored.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+
+INDEX_SUFFIX = '.lineidx'
+# Sidecar header: magic, size and mtime (ns) of the indexed file, number of offsets
+_HEADER = struct.Struct('<8sQQQ')
+_MAGIC = b'LINEIDX1'
+# Bytes decoded at a time by iter_lines
+READ_BLOCK_SIZE = 1 << 20
+
+
+def index_path(path):
+    """The sidecar index file of an input file."""
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def build_index(data):
+    """Return the array('Q') of line start offsets of a bytes-like object, ending with its length."""
+    offsets = array('Q', [0])
+    find = data.find
+    append = offsets.append
+    position = find(b'\n')
+    while position >= 0:
+        append(position + 1)
+        position = find(b'\n', position + 1)
+    if offsets[-1] != len(data):
+        # The last line has no newline.
+        offsets.append(len(data))
+    return offsets
+
+
+class MappedFile:
+    """
+    A read-only, memory-mapped text file with random access by line number.
+
+    Lines are numbered from 0 and include blank lines. Line text is decoded
+    as UTF-8 without its line ending. Use it as a context manager; views
+    returned by view must be released before it is closed.
+    """
+    def __init__(self, path, encoding='utf-8'):
+        self.path = Path(path)
+        self.encoding = encoding
+        self._offsets = None
+        with open(self.path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            self._stat = (stat.st_size, stat.st_mtime_ns)
+            # An empty file cannot be mapped.
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+
+    @property
+    def size(self):
+        """Size of the file in bytes."""
+        return len(self._data)
+
+    @property
+    def offsets(self):
+        """The line-offset index, loaded from the sidecar file or built on first use."""
+        if self._offsets is None:
+            self._offsets = self._load_index()
+            if self._offsets is None:
+                self._offsets = build_index(self._data)
+        return self._offsets
+
+    def _load_index(self):
+        try:
+            with open(index_path(self.path), 'rb') as file:
+                magic, size, mtime, count = _HEADER.unpack(file.read(_HEADER.size))
+                if magic != _MAGIC or (size, mtime) != self._stat:
+                    return None
+                offsets = array('Q')
+                offsets.fromfile(file, count)
+                return offsets
+        except (OSError, EOFError, struct.error):
+            return None
+
+    def save_index(self):
+        """Write the line-offset index to the sidecar file. Returns its path."""
+        path = index_path(self.path)
+        offsets = self.offsets
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, *self._stat, len(offsets)))
+            offsets.tofile(file)
+        return path
+
+    def __len__(self):
+        """Number of lines."""
+        return len(self.offsets) - 1
+
+    def byte_range(self, start=0, stop=None):
+        """The (begin, end) byte offsets of lines start to stop (exclusive)."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = min(start, stop)
+        return self.offsets[start], self.offsets[stop]
+
+    def line_range(self, begin, end):
+        """The (start, stop) line numbers of the lines that start in bytes begin to end (exclusive)."""
+        offsets = self.offsets
+        last = len(offsets) - 1
+        return min(bisect.bisect_left(offsets, begin), last), min(bisect.bisect_left(offsets, end), last)
+
+    def view(self, start=0, stop=None):
+        """A memoryview of the raw bytes of lines start to stop, without copying them."""
+        begin, end = self.byte_range(start, stop)
+        return memoryview(self._data)[begin:end]
+
+    def line(self, number):
+        """The text of one line."""
+        if not 0 <= number < len(self):
+            raise IndexError(f"line {number} out of range")
+        begin, end = self.offsets[number], self.offsets[number + 1]
+        return self._data[begin:end].decode(self.encoding).rstrip('\r\n')
+
+    def iter_lines(self, start=0, stop=None):
+        """
+        Yield (line number, text) for lines start to stop.
+        Reading from line 0 to the end does not need the index.
+        """
+        if start == 0 and stop is None:
+            begin, end = 0, self.size
+        else:
+            begin, end = self.byte_range(start, stop)
+        data = self._data
+        number = start
+        # Decode a block of whole lines at a time rather than line by line.
+        while begin < end:
+            block_end = min(end, begin + READ_BLOCK_SIZE)
+            if block_end < end:
+                cut = data.rfind(b'\n', begin, block_end)
+                block_end = cut + 1 if cut >= 0 else (data.find(b'\n', block_end, end) + 1 or end)
+            lines = data[begin:block_end].decode(self.encoding).split('\n')
+            if not lines[-1]:
+                lines.pop()
+            for line in lines:
+                yield number, line.rstrip('\r')
+                number += 1
+            begin = block_end
+
+    def split(self, parts):
+        """
+        Split the file into at most parts (start, stop) line ranges of about
+        the same number of bytes, e.g. one per worker.
+        """
+        if parts < 1:
+            raise ValueError(f"parts must be at least 1; got {parts}")
+        ranges = []
+        start = 0
+        for part in range(1, parts + 1):
+            stop = self.line_range(0, self.size * part // parts)[1] if part < parts else len(self)
+            if stop > start:
+                ranges.append((start, stop))
+                start = stop
+        return ranges
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,202 @@
+"""This module contains the streaming stages that main chains together.
+
+    reader -> classifier -> converter -> writer
+
+Each stage is a generator that passes records on as soon as they are ready,
+so only a bounded window of expressions is held in memory no matter how
+large the input files are. Several files can go through the pipeline at
+once with map_files.
+"""
+
+import json
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from src.converters import ERROR_MESSAGES
+from src.mapped_file import INDEX_SUFFIX, MappedFile
+
+# Number of expressions converted together; bounds the memory used by the converter stage.
+DEFAULT_WINDOW = 4096
+# Example expressions an ErrorReport keeps for each kind of error
+DEFAULT_MAX_EXAMPLES = 5
+# Threads that read and write files in map_files
+DEFAULT_IO_WORKERS = 4
+
+
+def classify_file(file_path: Path):
+    """Return the notation named in a data file's name, or None if it names none."""
+    filename = file_path.name.lower()
+    if 'infix' in filename:
+        return 'infix'
+    elif 'prefix' in filename:
+        return 'prefix'
+    elif 'postfix' in filename:
+        return 'postfix'
+    return None
+
+
+def find_input_files(data_dir: Path):
+    """
+    Yield (file_path, expr_type) for every data file whose name names a
+    notation, sorted by name. Line index sidecar files are skipped.
+    """
+    for file_path in sorted(data_dir.iterdir()):
+        if file_path.is_file() and file_path.suffix != INDEX_SUFFIX:
+            expr_type = classify_file(file_path)
+            if expr_type is not None:
+                yield file_path, expr_type
+
+
+def read_records(input_files):
+    """Yield (expression, expr_type) for every non-blank line of every input file."""
+    for file_path, expr_type in input_files:
+        yield from read_file_records(file_path, expr_type)
+
+
+def read_file_records(file_path, expr_type, start: int = 0, line_ends=None):
+    """
+    Yield (expression, expr_type) for every non-blank line of one file, from line start on.
+    If line_ends (a deque) is given, the number of the line after each
+    record is appended to it as the record is read, so a consumer further
+    down the pipeline can tell how far into the file its results reach.
+    """
+    try:
+        with MappedFile(file_path) as file:
+            for number, line in file.iter_lines(start):
+                if line.strip():
+                    if line_ends is not None:
+                        line_ends.append(number + 1)
+                    yield line.strip(), expr_type
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error processing file {file_path}: {e}")
+
+
+def windows(records, size: int = DEFAULT_WINDOW):
+    """Group a stream of records into lists of at most size records."""
+    records = iter(records)
+    while True:
+        window = list(islice(records, size))
+        if not window:
+            return
+        yield window
+
+
+def convert_expressions(records, converter, cache=None, window: int = DEFAULT_WINDOW):
+    """
+    Yield (expression, expr_type, result) for every (expression, expr_type) record, in order.
+
+    Records are converted a window at a time with a src.batch.BatchConverter.
+    If an on-disk cache is given, only expressions missing from it are converted.
+    """
+    for batch in windows(records, window):
+        if cache is None:
+            results = converter.convert(batch)
+        else:
+            results = [cache.get(expr, expr_type) for expr, expr_type in batch]
+            missing = [i for i, result in enumerate(results) if result is None]
+            converted = converter.convert([batch[i] for i in missing])
+            for i, result in zip(missing, converted):
+                cache.put(*batch[i], result)
+                results[i] = result
+        for (expr, expr_type), result in zip(batch, results):
+            yield expr, expr_type, result
+
+
+def map_files(function, input_files, io_workers: int = DEFAULT_IO_WORKERS):
+    """
+    Call function(file_path, expr_type) for every input file on a pool of
+    io_workers threads and yield the return values in input order.
+
+    The threads overlap the reading and writing of files; a function that
+    converts through a BatchConverter with workers > 1 shares its process
+    pool between the threads. At most 2 * io_workers files are in flight,
+    so the results waiting to be yielded stay bounded.
+    """
+    if io_workers < 1:
+        raise ValueError(f"io_workers must be at least 1; got {io_workers}")
+    with ThreadPoolExecutor(max_workers=io_workers) as pool:
+        pending = deque()
+        for file_path, expr_type in input_files:
+            pending.append(pool.submit(function, file_path, expr_type))
+            if len(pending) >= 2 * io_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class ErrorReport:
+    """
+    Collects the expressions that could not be converted, grouped by notation and error code.
+
+    Every error is counted, but only the first max_examples expressions of
+    each kind are kept, so the report stays small however bad the input is.
+    """
+    def __init__(self, max_examples: int = DEFAULT_MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self.counts = Counter()
+        self.examples = {}
+
+    def add(self, expression, expr_type, error_code, position):
+        key = (expr_type, error_code)
+        self.counts[key] += 1
+        examples = self.examples.setdefault(key, [])
+        if len(examples) < self.max_examples:
+            examples.append((expression, position))
+
+    def add_result(self, expression, expr_type, result):
+        """Add a result record (see src.batch.convert_batch) if it holds an error."""
+        if result['error'] is not None:
+            self.add(expression, expr_type, result['error_code'], result['error_position'])
+
+    @classmethod
+    def from_dict(cls, data, max_examples: int = DEFAULT_MAX_EXAMPLES):
+        """Rebuild a report from the output of to_dict."""
+        report = cls(max_examples)
+        for entry in data['errors']:
+            key = (entry['notation'], entry['code'])
+            report.counts[key] = entry['count']
+            report.examples[key] = [(example['expression'], example['position'])
+                                    for example in entry['examples']][:max_examples]
+        return report
+
+    def merge(self, other):
+        """Add the errors of another report, e.g. the report of one file of a run."""
+        self.counts.update(other.counts)
+        for key, examples in other.examples.items():
+            kept = self.examples.setdefault(key, [])
+            kept.extend(examples[:self.max_examples - len(kept)])
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def to_dict(self):
+        """The report as plain data, most frequent errors first."""
+        return {
+            'total': len(self),
+            'errors': [
+                {
+                    'notation': expr_type,
+                    'code': code,
+                    'message': ERROR_MESSAGES[code],
+                    'count': count,
+                    'examples': [{'expression': expression, 'position': position}
+                                 for expression, position in self.examples[expr_type, code]],
+                }
+                for (expr_type, code), count in self.counts.most_common()
+            ],
+        }
+
+    def format(self):
+        """A short human-readable summary of the report."""
+        lines = [f"{len(self)} expressions could not be converted:"]
+        for entry in self.to_dict()['errors']:
+            lines.append(f"  {entry['count']} {entry['notation']}: {entry['message']}")
+            for example in entry['examples']:
+                lines.append(f"      '{example['expression']}' at position {example['position']}")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+            file.write('\n')
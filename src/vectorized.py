@@ -0,0 +1,217 @@
+"""This module contains NumPy-vectorized validation for large batches of expressions.
+
+Instead of running the per-character validators on one expression at a time,
+a whole batch is packed into one uint8 buffer with an offsets array. Every
+character is classified through a lookup table, and the operand/operator
+counts and parenthesis depths are computed with cumulative sums over the
+whole buffer and reduced per expression.
+
+The result for each expression matches whether the converters accept it at
+the 'strict' validation level, plus the position of the first error. The
+vectorized pass handles single-letter operands and binary operators; the
+rare expressions that contain names, numbers, unary operators or characters
+outside ASCII (other than whitespace and the en and em dashes) are checked
+with converters.check_expression. The character tables are built from the
+operator registry, and rebuilt when it changes. This module needs NumPy
+(pip install numpy).
+"""
+
+import numpy as np
+from src.converters import (KIND_BINARY, KIND_CLOSE, KIND_OPEN, KIND_OPERAND, KIND_UNARY, REGISTRY, TOKEN_KINDS,
+                            check_expression)
+
+# Character classes
+SKIP = 0
+OPERAND = 1
+OPERATOR = 2
+OPEN = 3
+CLOSE = 4
+INVALID = 5
+# Lower case letters, digits, '_' and '.': part of a name or number
+WORD = 7
+# Unary operators and characters outside ASCII, left to check_expression
+SCALAR = 8
+# Class of the (virtual) token before the first token of an expression
+_START = 6
+# Byte that stands for every character outside ASCII in a packed buffer
+NON_ASCII = 0x80
+_KIND_CLASSES = {KIND_OPERAND: OPERAND, KIND_BINARY: OPERATOR, KIND_UNARY: SCALAR, KIND_OPEN: OPEN, KIND_CLOSE: CLOSE}
+
+
+def _class_table(notation):
+    """Build the 256-entry character class lookup table for a notation from TOKEN_KINDS."""
+    table = np.full(256, INVALID, dtype=np.uint8)
+    for code in range(128):
+        char = chr(code)
+        kind = TOKEN_KINDS.get(char)
+        if char.isspace():
+            table[code] = SKIP
+        elif kind in _KIND_CLASSES:
+            table[code] = _KIND_CLASSES[kind]
+        elif 'a' <= char <= 'z' or '0' <= char <= '9' or char in '_.':
+            table[code] = WORD
+        elif notation != 'infix':
+            # tokenize() drops quotes and other stray characters.
+            table[code] = SKIP
+    if notation != 'infix':
+        # Parentheses are not allowed in prefix or postfix expressions.
+        table[ord('(')] = table[ord(')')] = INVALID
+    table[NON_ASCII] = SCALAR
+    return table
+
+# (registry snapshot, tables) of the last call to class_tables
+_tables = (None, None)
+
+def class_tables():
+    """The character class lookup table of each notation, for the operators registered now."""
+    global _tables
+    key = tuple(sorted((symbol, op.arity) for symbol, op in REGISTRY.items()))
+    snapshot, tables = _tables
+    if snapshot != key:
+        tables = {notation: _class_table(notation) for notation in ('infix', 'prefix', 'postfix')}
+        _tables = (key, tables)
+    return tables
+
+# Unicode whitespace is removed like ASCII whitespace; prefix and postfix
+# expressions also read en and em dashes as minus signs.
+_WHITESPACE = {code: ' ' for code in range(0x80, 0x3001) if chr(code).isspace()}
+_TRANSLATIONS = {
+    'infix': str.maketrans(_WHITESPACE),
+    'prefix': str.maketrans({**_WHITESPACE, '–': '-', '—': '-'}),
+    'postfix': str.maketrans({**_WHITESPACE, '–': '-', '—': '-'}),
+}
+
+
+def pack_expressions(expressions, notation='infix'):
+    """
+    Pack a batch of expressions into one uint8 buffer.
+
+    Returns:
+        tuple: (buffer, offsets, is_string) where expression i occupies
+        buffer[offsets[i]:offsets[i + 1]] and is_string marks the entries
+        that were strings (anything else is packed as an empty expression)
+    """
+    if notation not in _TRANSLATIONS:
+        raise ValueError(f"Unknown expression type: {notation}")
+    is_string = np.fromiter((isinstance(e, str) for e in expressions), dtype=bool, count=len(expressions))
+    texts = [e if isinstance(e, str) else '' for e in expressions]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    # One byte per character (NON_ASCII for other non-ASCII characters), so
+    # character offsets are byte offsets.
+    data = "".join(texts).translate(_TRANSLATIONS[notation])
+    if data.isascii():
+        buffer = np.frombuffer(data.encode('ascii'), dtype=np.uint8)
+    else:
+        codes = np.frombuffer(data.encode('utf-32-le'), dtype=np.uint32)
+        buffer = np.where(codes < 0x80, codes, NON_ASCII).astype(np.uint8)
+    return buffer, offsets, is_string
+
+
+def _first_per_segment(segments, values, count, fill):
+    """For sorted segment ids, return the first value of each segment (fill where absent)."""
+    first = np.full(count, fill, dtype=np.int64)
+    present, index = np.unique(segments, return_index=True)
+    first[present] = values[index]
+    return first
+
+
+def tokenize_batch(expressions, notation='infix'):
+    """
+    Classify the characters of a batch of expressions and keep the tokens.
+
+    Returns:
+        tuple: (classes, segments, positions, token_offsets) with one entry
+        per token: its character class, the index of its expression and its
+        character position in that expression. The tokens of expression i
+        are at token_offsets[i]:token_offsets[i + 1].
+    """
+    buffer, offsets, _ = pack_expressions(expressions, notation)
+    return _tokenize_packed(buffer, offsets, notation)
+
+
+def _tokenize_packed(buffer, offsets, notation):
+    count = len(offsets) - 1
+    classes = class_tables()[notation][buffer]
+    token_index = np.flatnonzero(classes != SKIP)
+    segments = np.repeat(np.arange(count), np.diff(offsets))[token_index]
+    positions = token_index - offsets[segments]
+    token_offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(segments, minlength=count), out=token_offsets[1:])
+    return classes[token_index], segments, positions, token_offsets
+
+
+def _segment_cumsum(delta, segments, token_offsets):
+    """Running sum of delta that restarts at the first token of every expression."""
+    totals = np.cumsum(delta)
+    before = np.concatenate(([0], totals))
+    return totals - before[token_offsets[:-1]][segments]
+
+
+def validate_batch(expressions, notation='infix'):
+    """
+    Validate a batch of expressions of one notation at once.
+
+    Args:
+        expressions (sequence): The expressions to validate
+        notation (str): 'infix', 'prefix', or 'postfix'
+    Returns:
+        tuple: (valid, error_positions) NumPy arrays. valid[i] is True when
+        the converters accept expression i. error_positions[i] is the
+        character position of its first error (the length of the expression
+        for errors found at its end) or -1 when it is valid.
+    """
+    buffer, offsets, is_string = pack_expressions(expressions, notation)
+    classes, segments, positions, token_offsets = _tokenize_packed(buffer, offsets, notation)
+    count = len(token_offsets) - 1
+    lengths = np.diff(offsets)
+    token_counts = np.diff(token_offsets)
+    is_operator = classes == OPERATOR
+    operator_counts = np.bincount(segments[is_operator], minlength=count)
+    has_tokens = token_counts > 0
+    last = token_offsets[1:][has_tokens] - 1
+
+    scalar = (classes == WORD) | (classes == SCALAR)
+    bad = (classes == INVALID) | scalar
+    end_ok = has_tokens & (operator_counts > 0)
+    if notation == 'infix':
+        previous = np.empty_like(classes)
+        previous[1:] = classes[:-1]
+        previous[token_offsets[:-1][has_tokens]] = _START
+        expecting_operand = (previous == _START) | (previous == OPERATOR) | (previous == OPEN)
+        takes_operand = (classes == OPERAND) | (classes == OPEN)
+        bad |= takes_operand & ~expecting_operand
+        bad |= ~takes_operand & (classes != INVALID) & expecting_operand
+        delta = (classes == OPEN).astype(np.int64) - (classes == CLOSE)
+        depth = _segment_cumsum(delta, segments, token_offsets)
+        bad |= depth < 0
+        final_ok = np.zeros(count, dtype=bool)
+        final_ok[has_tokens] = (depth[last] == 0) & ((classes[last] == OPERAND) | (classes[last] == CLOSE))
+        end_ok &= final_ok
+    elif notation == 'prefix':
+        # needed: operands still missing. A prefix expression is complete
+        # exactly when needed drops to 0, which must happen at its last token.
+        delta = is_operator.astype(np.int64) - (classes == OPERAND)
+        needed = 1 + _segment_cumsum(delta, segments, token_offsets)
+        bad |= (needed - delta) <= 0
+        final_ok = np.zeros(count, dtype=bool)
+        final_ok[has_tokens] = needed[last] == 0
+        end_ok &= final_ok
+    else:
+        # depth: values on the stack. Every operator needs two, leaving one.
+        delta = (classes == OPERAND).astype(np.int64) - is_operator
+        depth = _segment_cumsum(delta, segments, token_offsets)
+        bad |= depth < 1
+        final_ok = np.zeros(count, dtype=bool)
+        final_ok[has_tokens] = depth[last] == 1
+        end_ok &= final_ok
+
+    bad_index = np.flatnonzero(bad)
+    first_bad = _first_per_segment(segments[bad_index], positions[bad_index], count, -1)
+    error_positions = np.where(first_bad >= 0, first_bad, np.where(end_ok, -1, lengths))
+    error_positions[~is_string] = 0
+    # Names, numbers, unary operators and other characters are left to the scalar check.
+    for index in np.unique(segments[scalar]):
+        error_positions[index] = check_expression(expressions[index], notation)[1]
+    return error_positions < 0, error_positions
@@ -0,0 +1,353 @@
+"""This module contains the writers that save conversion results to output files.
+
+A writer receives (expression, expr_type, result) records one at a time, in
+input order, where result is a record like those of src.batch.convert_batch.
+Every writer has the same interface: write, offsets (flush and return the
+size of each file, for src.checkpoint) and close, and is a context manager.
+
+The writers, selected by name with open_writers:
+
+    human     the human-readable report (HumanReportWriter)
+    jsonl     one JSON object per expression (JsonlWriter)
+    tsv       a header line, then one tab-separated line per expression (TsvWriter)
+    columnar  one file per column plus its offsets (ColumnarWriter)
+
+The machine formats hold the FIELDS of every expression. Records are
+collected in memory and written WRITE_BATCH records at a time to files with
+large buffers, so small expressions do not cost a write call each.
+"""
+
+import json
+import shutil
+import tempfile
+from array import array
+from pathlib import Path
+from src.checkpoint import open_output, sync_output
+from src.converters import standardize_expression, validate_infix, validate_postfix, validate_prefix
+
+NOTATIONS = ('infix', 'prefix', 'postfix')
+VALIDATORS = {'infix': validate_infix, 'prefix': validate_prefix, 'postfix': validate_postfix}
+# Fields of the machine formats, in column order
+FIELDS = ('expression', 'type') + NOTATIONS + ('error', 'error_code', 'error_position')
+FORMATS = ('human', 'jsonl', 'tsv', 'columnar')
+# Output file suffix of each format (the human report keeps the input's name)
+SUFFIXES = {'human': '', 'jsonl': '.jsonl', 'tsv': '.tsv', 'columnar': '.columns'}
+# Write buffer of the spooled stacks
+WRITE_BUFFER_SIZE = 1 << 16
+# Write buffer of the output files, and records formatted before they are written out
+BULK_BUFFER_SIZE = 1 << 20
+WRITE_BATCH = 4096
+RULE = "=" * 50
+# Labels of the converted forms, padded so the expressions line up
+_LABELS = {'infix': "To Infix:   ", 'prefix': "To Prefix:  ", 'postfix': "To Postfix: "}
+# Characters escaped in TSV values
+_TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+class BatchedWriter:
+    """
+    Base of the writers of one text file. Subclasses turn a record into text
+    with format; the text of WRITE_BATCH records is written out at once.
+    A writer created with offsets cuts its file back to them and carries on.
+    """
+    def __init__(self, path, offsets=None):
+        self.path = Path(path)
+        self._file = open_output(self.path, None if offsets is None else offsets['output'],
+                                 mode='w', buffering=BULK_BUFFER_SIZE)
+        self._batch = []
+        if offsets is None:
+            self._batch.append(self.header())
+
+    def header(self):
+        """Text at the start of the file."""
+        return ""
+
+    def format(self, expression, expr_type, result):
+        raise NotImplementedError
+
+    def write(self, expression, expr_type, result):
+        self._batch.append(self.format(expression, expr_type, result))
+        if len(self._batch) >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        """Write out the records collected so far."""
+        self._file.write("".join(self._batch))
+        self._batch.clear()
+
+    def offsets(self):
+        """Flush everything written so far and return the size of the file."""
+        self.flush()
+        return {'output': sync_output(self._file)}
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HumanReportWriter(BatchedWriter):
+    """
+    Writes the human-readable report of one input file.
+
+    The report has one block per expression, then the stacks of the
+    expressions that were converted in each notation (originals as
+    standardize_expression writes them) and whether each of them validates.
+    The blocks are written as records arrive; the stacks are spooled to
+    temporary files and appended when the writer is closed, so memory use
+    stays flat.
+
+    For a run that can be resumed (see src.checkpoint), the stacks are
+    spooled to named files in spool_dir instead, and offsets returns the
+    sizes of all the files written so far. A writer created with those
+    offsets cuts its files back to them and carries on from there.
+    """
+    def __init__(self, path, title, spool_dir=None, offsets=None):
+        self.title = title
+        super().__init__(path, offsets)
+        if spool_dir is None:
+            self._stacks = {
+                notation: tempfile.TemporaryFile('w+', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+                for notation in NOTATIONS
+            }
+        else:
+            self._stacks = {
+                notation: open_output(Path(spool_dir) / f"{self.path.name}.{notation}",
+                                      None if offsets is None else offsets[notation])
+                for notation in NOTATIONS
+            }
+
+    def header(self):
+        return f"Results for {self.title}\n{RULE}\n\n"
+
+    def offsets(self):
+        offsets = super().offsets()
+        for notation, spool in self._stacks.items():
+            offsets[notation] = sync_output(spool)
+        return offsets
+
+    def format(self, expression, expr_type, result):
+        lines = [f"Original Expression: {expression}", f"Detected Type: {expr_type}"]
+        if result['error'] is not None:
+            lines.append(f"Error processing expression: {result['error']} at position {result['error_position']}")
+        else:
+            lines.extend(_LABELS[notation] + result[notation] for notation in NOTATIONS if notation != expr_type)
+        return "\n".join(lines) + "\n\n"
+
+    def write(self, expression, expr_type, result):
+        if result['error'] is None:
+            for notation in NOTATIONS:
+                if notation == expr_type:
+                    self._stacks[notation].write(standardize_expression(expression) + '\n')
+                else:
+                    self._stacks[notation].write(result[notation] + '\n')
+        super().write(expression, expr_type, result)
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        write = self._file.write
+        write(f"Expression Stacks:\n{RULE}\n")
+        for notation in NOTATIONS:
+            write(f"\n{notation.capitalize()} Stack:\n")
+            spool = self._stacks[notation]
+            spool.seek(0)
+            for line in spool:
+                write("  " + line)
+        write(f"\nVerifying Expression Stacks:\n{RULE}\n")
+        for notation in NOTATIONS:
+            write(f"\n{notation.capitalize()} Stack Verification:\n")
+            validate = VALIDATORS[notation]
+            spool = self._stacks[notation]
+            spool.seek(0)
+            for line in spool:
+                expression = line.rstrip('\n')
+                write(f"  {expression}: {validate(expression)}\n")
+            spool.close()
+        super().close()
+
+
+class JsonlWriter(BatchedWriter):
+    """Writes one JSON object per expression, with the FIELDS as keys (null where missing)."""
+    def format(self, expression, expr_type, result):
+        return json.dumps(dict(zip(FIELDS, _values(expression, expr_type, result))), ensure_ascii=False) + "\n"
+
+
+class TsvWriter(BatchedWriter):
+    """
+    Writes a header line of FIELDS, then one line per expression. Missing
+    values are empty; backslashes, tabs and line breaks in values are
+    escaped as \\\\, \\t, \\n and \\r.
+    """
+    def header(self):
+        return "\t".join(FIELDS) + "\n"
+
+    def format(self, expression, expr_type, result):
+        return "\t".join("" if value is None else str(value).translate(_TSV_ESCAPES)
+                         for value in _values(expression, expr_type, result)) + "\n"
+
+
+class ColumnarWriter:
+    """
+    Writes the results of one input file as columns, in a directory.
+
+    Every field in FIELDS is a column of two files: <field>.data holds the
+    UTF-8 values back to back, and <field>.offsets an array('Q') (native
+    byte order, like src.mapped_file) of where each value starts, followed
+    by the size of the data. Value i of a column is data[offsets[i]:offsets[i + 1]];
+    missing values are empty. read_columns reads them back.
+    """
+    def __init__(self, path, offsets=None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._data = {}
+        self._offsets = {}
+        self._ends = {}
+        for field in FIELDS:
+            data = self.path / f"{field}.data"
+            ends = self.path / f"{field}.offsets"
+            if offsets is None:
+                self._data[field] = open_output(data, mode='wb', buffering=BULK_BUFFER_SIZE)
+                self._offsets[field] = open_output(ends, mode='wb', buffering=BULK_BUFFER_SIZE)
+                self._offsets[field].write(array('Q', [0]).tobytes())
+                self._ends[field] = 0
+            else:
+                self._data[field] = open_output(data, offsets[data.name], mode='wb', buffering=BULK_BUFFER_SIZE)
+                self._offsets[field] = open_output(ends, offsets[ends.name], mode='wb', buffering=BULK_BUFFER_SIZE)
+                self._ends[field] = offsets[data.name]
+        self._values = {field: [] for field in FIELDS}
+
+    def write(self, expression, expr_type, result):
+        for field, value in zip(FIELDS, _values(expression, expr_type, result)):
+            self._values[field].append("" if value is None else str(value))
+        if len(self._values['expression']) >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        """Write out the records collected so far."""
+        for field, values in self._values.items():
+            if not values:
+                continue
+            encoded = [value.encode('utf-8') for value in values]
+            ends = array('Q')
+            end = self._ends[field]
+            for value in encoded:
+                end += len(value)
+                ends.append(end)
+            self._ends[field] = end
+            self._data[field].write(b"".join(encoded))
+            self._offsets[field].write(ends.tobytes())
+            values.clear()
+
+    def offsets(self):
+        """Flush everything written so far and return the size of each file."""
+        self.flush()
+        offsets = {}
+        for field in FIELDS:
+            offsets[f"{field}.data"] = sync_output(self._data[field])
+            offsets[f"{field}.offsets"] = sync_output(self._offsets[field])
+        return offsets
+
+    def close(self):
+        if not self._data:
+            return
+        self.flush()
+        for file in [*self._data.values(), *self._offsets.values()]:
+            file.close()
+        self._data = {}
+        self._offsets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+WRITERS = {'human': HumanReportWriter, 'jsonl': JsonlWriter, 'tsv': TsvWriter, 'columnar': ColumnarWriter}
+
+
+class WriterGroup:
+    """Sends every record to several writers, keyed by format; offsets are keyed the same way."""
+    def __init__(self, writers):
+        self.writers = writers
+
+    def write(self, expression, expr_type, result):
+        for writer in self.writers.values():
+            writer.write(expression, expr_type, result)
+
+    def offsets(self):
+        return {name: writer.offsets() for name, writer in self.writers.items()}
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_writers(formats, input_path, output_dir, spool_dir=None, offsets=None):
+    """
+    Open a writer of each of formats for an input file, writing to
+    output_path(input_path, output_dir, format). spool_dir and offsets are
+    passed on as for HumanReportWriter (offsets as returned by the group).
+    """
+    writers = {}
+    for name in formats:
+        path = output_path(input_path, output_dir, name)
+        saved = None if offsets is None else offsets[name]
+        if name == 'human':
+            writers[name] = HumanReportWriter(path, Path(input_path).name, spool_dir=spool_dir, offsets=saved)
+        else:
+            writers[name] = WRITERS[name](path, offsets=saved)
+    return WriterGroup(writers)
+
+
+def output_path(input_path, output_dir, format='human'):
+    """
+    The output of an input file in a format: output_dir/converted_<input file name>
+    for the human report, with the extension replaced by the format's suffix otherwise.
+    """
+    name = f"converted_{Path(input_path).name}"
+    if format != 'human':
+        name = Path(name).stem + SUFFIXES[format]
+    return Path(output_dir) / name
+
+
+def remove_output(path):
+    """Delete an output file, or the directory of a columnar output."""
+    path = Path(path)
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def read_columns(path):
+    """Read the output of a ColumnarWriter back as {field: [value, ...]}."""
+    path = Path(path)
+    columns = {}
+    for field in FIELDS:
+        data = (path / f"{field}.data").read_bytes()
+        ends = array('Q')
+        ends.frombytes((path / f"{field}.offsets").read_bytes())
+        columns[field] = [data[ends[i]:ends[i + 1]].decode('utf-8') for i in range(len(ends) - 1)]
+    return columns
+
+
+def _values(expression, expr_type, result):
+    """The values of the FIELDS of a record."""
+    return (expression, expr_type, *(result[field] for field in FIELDS[2:]))
@@ -1,7 +1,10 @@
 """This module contains fixtures for testing the converters.
 """
 
+import operator
+
 import pytest
+from src.converters import register_operator, unregister_operator
 
 # a 3-tuple with infix, prefix, and postfix expressions that are equivalent to each other for testing
 EXAMPLE_DATA_TUPLES = [
@@ -137,4 +140,13 @@ def invalid_prefix_expressions():
 @pytest.fixture
 def invalid_postfix_expressions():
     """Simple test cases for invalid postfix expressions."""
-    return INVALID_POSTFIX_EXPRESSIONS
\ No newline at end of file
+    return INVALID_POSTFIX_EXPRESSIONS
+
+@pytest.fixture
+def custom_operators():
+    """Registers unary minus as '~' and a modulo operator '%' for one test."""
+    register_operator('~', 5, arity=1, function=operator.neg)
+    register_operator('%', 3, 'left', function=operator.mod)
+    yield
+    unregister_operator('~')
+    unregister_operator('%')
@@ -0,0 +1,40 @@
+"""This module contains tests for the batch conversion module."""
+
+import pytest
+from src.batch import convert_batch
+
+
+def test_convert_batch(prefix_postfix_cases):
+    prefixes = [prefix for prefix, _ in prefix_postfix_cases]
+    results = convert_batch(prefixes, 'prefix', ['postfix'])
+    assert [result['postfix'] for result in results] == [postfix for _, postfix in prefix_postfix_cases]
+    assert all(result['error'] is None for result in results)
+
+def test_convert_batch_workers_keep_order(infix_postfix_cases, invalid_infix_expressions):
+    expressions = [infix for infix, _ in infix_postfix_cases] + invalid_infix_expressions
+    sequential = convert_batch(expressions, 'infix', workers=1)
+    parallel = convert_batch(expressions, 'infix', workers=2, chunksize=3)
+    assert parallel == sequential
+    assert [result['postfix'] for result in parallel[:len(infix_postfix_cases)]] == \
+        [postfix for _, postfix in infix_postfix_cases]
+
+def test_convert_batch_reports_errors_per_item(invalid_postfix_expressions):
+    results = convert_batch(["AB+"] + invalid_postfix_expressions, 'postfix', ['infix'])
+    assert results[0] == {'infix': "(A + B)", 'error': None, 'error_code': None, 'error_position': None}
+    for result in results[1:]:
+        assert result['infix'] is None
+        assert result['error']
+        assert result['error_code'] and result['error_position'] is not None
+
+def test_convert_batch_trusted_reports_the_same_errors(invalid_infix_expressions):
+    expressions = ["A + B"] + invalid_infix_expressions
+    assert convert_batch(expressions, 'infix', validation='trusted')[1:] == \
+        convert_batch(expressions, 'infix')[1:]
+
+def test_convert_batch_bad_arguments():
+    with pytest.raises(ValueError):
+        convert_batch(["A + B"], 'rpn')
+    with pytest.raises(ValueError):
+        convert_batch(["A + B"], 'infix', ['rpn'])
+    with pytest.raises(ValueError):
+        convert_batch(["A + B"], 'infix', workers=0)
@@ -0,0 +1,65 @@
+"""This module contains tests for the benchmark expression generator and the scaling benchmark."""
+
+import json
+import pytest
+from benchmarks import bench_lexer
+from benchmarks.bench_scaling import CONVERTERS, compare, fit_exponent, run_benchmarks
+from benchmarks.generate import SHAPES, emit_infix_minimal, generate_expression, generate_tree
+from src.converters import convert_all, emit_postfix, infix_to_postfix, lex
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_generated_expressions_are_valid(shape):
+    for seed in range(20):
+        tree = generate_tree(31, seed=seed, shape=shape)
+        assert len(tree) == 31
+        postfix = emit_postfix(tree)
+        for paren_rate in (0.0, 0.5, 1.0):
+            assert infix_to_postfix(emit_infix_minimal(tree, paren_rate, seed)) == postfix
+        assert convert_all(generate_expression(31, 'prefix', seed=seed, shape=shape), 'prefix')['postfix'] == postfix
+
+def test_generator_is_seeded():
+    assert generate_expression(101, seed=3) == generate_expression(101, seed=3)
+    assert generate_expression(101, seed=3) != generate_expression(101, seed=4)
+    assert len(lex(generate_expression(101, 'postfix', operators={'+': 1}))) == 101
+    assert set(generate_expression(101, 'postfix', operators={'*': 1})) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZ*")
+    assert "(" in generate_expression(101, paren_rate=1.0)
+    with pytest.raises(ValueError):
+        generate_tree(2)
+
+def test_fit_exponent():
+    assert fit_exponent([(10, 1.0), (100, 10.0), (1000, 100.0)]) == pytest.approx(1.0)
+    assert fit_exponent([(10, 1.0), (100, 100.0)]) == pytest.approx(2.0)
+    assert fit_exponent([(10, 1.0)]) is None
+
+def test_run_and_compare():
+    report = run_benchmarks([11, 21], repeats=1, names=CONVERTERS[:2], tokens_per_size=200)
+    assert set(report['results']) == set(CONVERTERS[:2])
+    entry = report['results']['infix_to_postfix']['11']
+    assert entry['expressions'] == 18 and entry['tokens'] >= 11 * 18
+    assert report['scaling']['infix_to_postfix'] == {'exponent': None, 'superlinear': False}
+    assert compare(report, report) == []
+    slower = {**report, 'results': {name: {size: {**entry, 'tokens_per_second': entry['tokens_per_second'] / 2}
+                                          for size, entry in sizes.items()}
+                                   for name, sizes in report['results'].items()}}
+    assert len(compare(report, slower, threshold=0.1)) == 4
+    assert compare(report, slower, threshold=0.6) == []
+    superlinear = {**report, 'scaling': {name: {'exponent': 1.5, 'superlinear': True} for name in report['scaling']}}
+    assert len(compare(report, superlinear)) == 2
+
+def test_bench_lexer_compare(tmp_path, capsys):
+    report = bench_lexer.time_converters(repeats=2)
+    assert set(report['results']) == set(bench_lexer.CONVERTERS)
+    assert compare(report, report) == []
+    output = tmp_path / "lexer.json"
+    assert bench_lexer.main(['2', '--output', str(output)]) == 0
+    saved = json.loads(output.read_text(encoding='utf-8'))
+    assert set(saved['results']) == set(bench_lexer.CONVERTERS)
+    # A baseline ten times as fast: every converter regressed.
+    faster = {**saved, 'results': {name: {size: {**entry, 'tokens_per_second': entry['tokens_per_second'] * 10}
+                                          for size, entry in sizes.items()}
+                                   for name, sizes in saved['results'].items()}}
+    output.write_text(json.dumps(faster), encoding='utf-8')
+    assert bench_lexer.main(['2', '--compare', str(output)]) == 1
+    assert f"{len(bench_lexer.CONVERTERS)} regressions against" in capsys.readouterr().out
+    assert bench_lexer.baseline_tokens("A + (B)") == ['A', '+', '(', 'B', ')']
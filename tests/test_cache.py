@@ -0,0 +1,76 @@
+"""This module contains tests for the conversion cache."""
+
+import threading
+
+import pytest
+from src.cache import ConversionCache
+from src.converters import convert
+
+
+def test_cache_hits_on_normalized_expression():
+    cache = ConversionCache(maxsize=8)
+    assert cache.convert("A + B", 'infix', 'postfix') == "AB+"
+    assert cache.convert(" A+B ", 'infix', 'postfix') == "AB+"
+    assert cache.convert("A * B", 'infix', 'prefix') == "*AB"
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
+
+def test_cache_matches_convert():
+    # The cache must neither accept nor reject anything convert does not.
+    expressions = ["A + B", " A+B ", "A + B &", '"A+B"', "A + B;", "A – B", "rate * 2", "A +"]
+    cache = ConversionCache()
+    for _ in range(2):
+        for expression in expressions:
+            try:
+                expected = convert(expression, 'infix', 'postfix')
+            except ValueError:
+                with pytest.raises(ValueError):
+                    cache.convert(expression, 'infix', 'postfix')
+            else:
+                assert cache.convert(expression, 'infix', 'postfix') == expected
+
+def test_cache_evicts_least_recently_used():
+    cache = ConversionCache(maxsize=2)
+    cache.convert("AB+", 'postfix', 'infix')
+    cache.convert("AB-", 'postfix', 'infix')
+    cache.convert("AB+", 'postfix', 'infix')  # AB+ is now the most recent
+    cache.convert("AB*", 'postfix', 'infix')  # evicts AB-
+    cache.convert("AB+", 'postfix', 'infix')
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (2, 3, 1, 2)
+
+def test_cache_clear():
+    cache = ConversionCache()
+    cache.convert("+AB", 'prefix', 'postfix')
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 0, cache.maxsize, 0)
+
+def test_cache_does_not_store_errors(invalid_prefix_expressions):
+    cache = ConversionCache()
+    for expression in invalid_prefix_expressions:
+        with pytest.raises(ValueError):
+            cache.convert(expression, 'prefix', 'infix')
+    assert len(cache) == 0
+
+def test_cache_is_thread_safe():
+    cache = ConversionCache(maxsize=4)
+    expressions = ["A + B", "A * B", "A - B", "A / B", "A ^ B", "(A + B) * C"]
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(200):
+                for expression in expressions:
+                    assert cache.convert(expression, 'infix', 'postfix')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    info = cache.cache_info()
+    assert not errors
+    assert info.hits + info.misses == 4 * 200 * len(expressions)
+    assert info.currsize <= 4
@@ -0,0 +1,72 @@
+"""This module contains tests for canonical forms and fingerprints."""
+
+import operator
+
+import pytest
+from src.canonical import canonicalize, fingerprint, tree_fingerprints
+from src.converters import emit_infix, emit_prefix, parse_infix, register_operator
+
+
+def test_commutative_operands_are_sorted():
+    assert emit_infix(canonicalize("B + A")) == "(A + B)"
+    assert emit_infix(canonicalize("A * B")) == emit_infix(canonicalize("B * A"))
+    assert emit_infix(canonicalize("(C - D) * A")) == "(A * (C - D))"
+
+def test_associative_chains_are_regrouped():
+    for expression in ["(A * B) * C", "A * (B * C)", "C * (B * A)", "B * C * A"]:
+        assert emit_infix(canonicalize(expression)) == "((A * B) * C)"
+    assert emit_prefix(canonicalize("D + (C + (B + A))")) == "+++ABCD"
+
+def test_non_associative_operators_keep_their_order():
+    for expression in ["A - B", "B - A", "A - (B - C)", "(A - B) - C", "A ^ B ^ C", "A / B / C"]:
+        assert emit_infix(canonicalize(expression)) == emit_infix(parse_infix(expression))
+    # Only chains of the same operator are flattened
+    assert emit_infix(canonicalize("C + A * B")) == "(C + (A * B))"
+    assert emit_infix(canonicalize("B * (A + C) * A")) == "((A * B) * (A + C))"
+
+def test_equivalent_expressions_share_a_fingerprint():
+    assert fingerprint("A + B") == fingerprint("B + A")
+    assert fingerprint("(A*B)*C") == fingerprint("A*(B*C)")
+    assert fingerprint("(B - C) * (D + E)") == fingerprint("*+ED-BC", 'prefix')
+    assert fingerprint("AB+C*", 'postfix') == fingerprint("C * (B + A)")
+    assert 0 <= fingerprint("A + B") < 1 << 64
+
+def test_different_expressions_have_different_fingerprints():
+    expressions = ["A + B", "A - B", "B - A", "A * B", "A + C", "(A + B) * C",
+                   "A + B * C", "A - B - C", "A - (B - C)", "A ^ B ^ C", "(A ^ B) ^ C"]
+    assert len({fingerprint(expression) for expression in expressions}) == len(expressions)
+
+def test_tree_fingerprints_are_structural():
+    tree = parse_infix("(A + B) * (A + B) - (B + A)")
+    fingerprints = tree_fingerprints(tree)
+    product = tree.left[tree.root]
+    assert fingerprints[tree.left[product]] == fingerprints[tree.right[product]]
+    assert fingerprints[tree.left[product]] != fingerprints[tree.right[tree.root]]
+
+def test_deep_chains_canonicalize():
+    expression = " + ".join(reversed([chr(ord('A') + i % 26) for i in range(5000)]))
+    tree = canonicalize(expression)
+    assert len(tree) == 9999
+    assert emit_prefix(tree).startswith("+" * 4999 + "AAA")
+
+def test_invalid_expressions_raise(invalid_infix_expressions):
+    for expression in invalid_infix_expressions:
+        with pytest.raises(ValueError):
+            fingerprint(expression)
+    with pytest.raises(ValueError):
+        canonicalize("A + B", 'reverse')
+
+def test_unary_operators_canonicalize(custom_operators):
+    assert emit_infix(canonicalize("~B * ~A")) == emit_infix(canonicalize("~A * ~B"))
+    assert fingerprint("~(B + A)") == fingerprint("BA+~", 'postfix')
+    assert fingerprint("~A + B") != fingerprint("~(A + B)")
+
+def test_associativity_follows_the_registry():
+    assert fingerprint("(A * B) * C") == fingerprint("A * (B * C)")
+    register_operator('*', 3, 'right', function=operator.mul)
+    try:
+        # A right-associative '*' is no longer regrouped.
+        assert fingerprint("(A * B) * C") != fingerprint("A * (B * C)")
+    finally:
+        register_operator('*', 3, 'left', function=operator.mul)
+    assert fingerprint("(A * B) * C") == fingerprint("A * (B * C)")
@@ -0,0 +1,121 @@
+"""This module contains tests for checkpointing and resuming a run."""
+
+import json
+
+import pytest
+from src.batch import BatchConverter
+from src.checkpoint import Checkpoint, open_output, write_atomic
+from src.main import main, process_file
+from src.writers import HumanReportWriter
+
+EXPRESSIONS = ["A + B", "", "A +", "(A + B) * C", "A – B", "A ^ B ^ C", "", "rate * 2", "(A"]
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "data" / "some_infix.txt"
+    path.parent.mkdir()
+    path.write_text("\n".join(EXPRESSIONS) + "\n", encoding='utf-8')
+    return path
+
+def read_stacks(stacks):
+    contents = {}
+    for typ, spool in stacks.stacks.items():
+        spool.seek(0)
+        contents[typ] = spool.read()
+    stacks.close()
+    return contents
+
+def run_until_crash(data_file, output_dir, checkpoint_path, monkeypatch):
+    """Process data_file with a checkpoint every two records, killed while writing the sixth."""
+    write = HumanReportWriter.write
+    calls = []
+
+    def crashing_write(self, *args):
+        calls.append(args)
+        if len(calls) == 6:
+            raise RuntimeError("killed")
+        write(self, *args)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(HumanReportWriter, 'write', crashing_write)
+        with BatchConverter() as converter, pytest.raises(RuntimeError):
+            process_file(data_file, 'infix', converter, output_dir, checkpoint=Checkpoint(checkpoint_path),
+                         checkpoint_every=2)
+
+def test_open_output_and_write_atomic(tmp_path):
+    path = tmp_path / "out.txt"
+    with open_output(path) as file:
+        file.write("first\nsecond\n")
+    with open_output(path, 6) as file:
+        file.write("third\n")
+    assert path.read_text() == "first\nthird\n"
+    write_atomic(tmp_path / "state.json", "{}")
+    assert (tmp_path / "state.json").read_text() == "{}"
+    # The temporary file was renamed into place.
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.txt", "state.json"]
+
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path, data_file, monkeypatch):
+    (tmp_path / "reference").mkdir()
+    with BatchConverter() as converter:
+        stacks, errors = process_file(data_file, 'infix', converter, tmp_path / "reference")
+    reference = (tmp_path / "reference" / "converted_some_infix.txt").read_text()
+    reference_stacks = read_stacks(stacks)
+
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    run_until_crash(data_file, output_dir, tmp_path / "checkpoint.json", monkeypatch)
+    state = json.loads((tmp_path / "checkpoint.json").read_text())['files'][str(data_file)]
+    # Four expressions (on lines 0 to 4) were covered by the last checkpoint.
+    assert state['line'] == 5 and not state['done']
+
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json", resume=True)
+    with BatchConverter() as converter:
+        stacks, resumed_errors = process_file(data_file, 'infix', converter, output_dir,
+                                              checkpoint=checkpoint, checkpoint_every=2)
+    assert (output_dir / "converted_some_infix.txt").read_text() == reference
+    assert read_stacks(stacks) == reference_stacks
+    assert resumed_errors.to_dict() == errors.to_dict()
+    assert checkpoint.get(data_file)['done']
+
+    # A finished file is not converted again.
+    stacks, _ = process_file(data_file, 'infix', None, output_dir, checkpoint=checkpoint)
+    assert read_stacks(stacks) == reference_stacks
+
+def test_changed_input_starts_over(tmp_path, data_file):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+    checkpoint.update(data_file, {'line': 3, 'done': False})
+    assert checkpoint.get(data_file)['line'] == 3
+    data_file.write_text("A + B\n")
+    assert Checkpoint(tmp_path / "checkpoint.json", resume=True).get(data_file) is None
+
+def test_main_resume(tmp_path, data_file, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "resources").mkdir()
+    data_file.parent.rename(tmp_path / "resources" / "data")
+    main([])
+    expected = capsys.readouterr().out
+    main(['--checkpoint', 'run.json', '--checkpoint-every', '1'])
+    assert capsys.readouterr().out == expected
+    # A finished run removes its checkpoint, so resuming starts over.
+    assert not (tmp_path / "run.json").exists()
+    main(['--resume', '--checkpoint', 'run.json'])
+    assert capsys.readouterr().out == expected
+
+def test_resume_with_other_formats_starts_over(tmp_path, data_file, monkeypatch):
+    (tmp_path / "reference").mkdir()
+    with BatchConverter() as converter:
+        process_file(data_file, 'infix', converter, tmp_path / "reference")[0].close()
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    run_until_crash(data_file, output_dir, tmp_path / "checkpoint.json", monkeypatch)
+
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json", resume=True)
+    with BatchConverter() as converter:
+        stacks, _ = process_file(data_file, 'infix', converter, output_dir, checkpoint=checkpoint,
+                                 formats=('human', 'jsonl'))
+    stacks.close()
+    assert (output_dir / "converted_some_infix.txt").read_text() == \
+        (tmp_path / "reference" / "converted_some_infix.txt").read_text()
+    lines = (output_dir / "converted_some_infix.jsonl").read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['expression'] for line in lines] == [e for e in EXPRESSIONS if e]
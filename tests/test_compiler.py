@@ -0,0 +1,60 @@
+"""This module contains tests for compiling expressions to Python functions."""
+
+import pytest
+from src.compiler import compile_expression, interpret_postfix
+from src.converters import infix_to_postfix, tokenize
+
+VALUES = {'A': 2.0, 'B': 3.0, 'C': 5.0, 'D': 7.0, 'E': 11.0}
+
+
+def test_compiled_matches_interpreter(infix_prefix_cases):
+    for infix, prefix in infix_prefix_cases + [("A - B - C", "--ABC"), ("A ^ B ^ C", "^A^BC")]:
+        expected = interpret_postfix(tokenize(infix_to_postfix(infix)), VALUES)
+        for expression, notation in [(infix, 'infix'), (prefix, 'prefix')]:
+            function = compile_expression(expression, notation)
+            assert function(*[VALUES[name] for name in function.variables]) == pytest.approx(expected)
+            assert function(**{name: VALUES[name] for name in function.variables}) == pytest.approx(expected)
+
+def test_compiled_functions_are_cached():
+    compile_expression.cache_clear()
+    first = compile_expression("A + B * C")
+    assert compile_expression(" A+B*C ") is first
+    assert compile_expression.cache_info().hits == 1
+    assert first.variables == ('A', 'B', 'C')
+
+def test_compile_deeply_nested_expression():
+    function = compile_expression("A" + "B+" * 5000, 'postfix')
+    assert function(1, 2) == 10001
+
+def test_compile_invalid(invalid_infix_expressions):
+    for expression in invalid_infix_expressions:
+        with pytest.raises(ValueError):
+            compile_expression(expression)
+    with pytest.raises(ValueError):
+        compile_expression("A + B", 'rpn')
+    # Rejected by infix_to_postfix, so not compiled either.
+    for expression in ["A – B & ", "A + B;", '"A+B"']:
+        with pytest.raises(ValueError):
+            infix_to_postfix(expression)
+        with pytest.raises(ValueError):
+            compile_expression(expression)
+
+def test_compiled_shared_subexpressions_are_computed_once():
+    function = compile_expression("(A + B) * (A + B) - (A + B)")
+    assert function.source.count(" + ") == 1
+    assert function(1, 2) == 6
+
+def test_custom_operators_compile(custom_operators):
+    compile_expression.cache_clear()
+    function = compile_expression("~A % B + C")
+    assert function(7, 3, 10) == (-7 % 3) + 10
+    assert interpret_postfix(tokenize(infix_to_postfix("~A % B + C")), {'A': 7, 'B': 3, 'C': 10}) == 12
+    compile_expression.cache_clear()
+
+
+def test_compile_names_and_numbers():
+    function = compile_expression("rate * (lambda + 2.5) - _x")
+    assert function.variables == ('_x', 'lambda', 'rate')
+    assert function(1.0, 2.0, 4.0) == 4.0 * (2.0 + 2.5) - 1.0
+    tokens = tokenize(infix_to_postfix("rate * (lambda + 2.5) - _x"))
+    assert interpret_postfix(tokens, {'rate': 4.0, 'lambda': 2.0, '_x': 1.0}) == 17.0
@@ -9,8 +9,13 @@ public API of a module. The helper functions are not meant to be
 used independently, so they are not tested.
 """
 
+import io
+import itertools
+import time
+
 import pytest
-from converters import *
+from src.converters import *
+from src.converters import _lex_characters, _lex_pattern
 
 def test_prefix_to_infix(prefix_infix_cases):
     for prefix, infix in prefix_infix_cases:
@@ -64,4 +69,279 @@ def test_infix_to_postfix(infix_postfix_cases):
 def test_infix_to_postfix_invalid(invalid_infix_expressions):
     for expression in invalid_infix_expressions:
         with pytest.raises(ValueError):
-            infix_to_postfix(expression)
\ No newline at end of file
+            infix_to_postfix(expression)
+
+def test_prefix_postfix_adjacent_minus_operators():
+    # Adjacent minus signs in the output used to trip the infix round-trip.
+    assert prefix_to_postfix("-A-BC") == "ABC--"
+    assert postfix_to_prefix("AB-C-") == "--ABC"
+
+def test_infix_to_prefix_respects_associativity():
+    assert infix_to_prefix("A - B - C") == "--ABC"
+    assert infix_to_prefix("A ^ B ^ C") == "^A^BC"
+    assert infix_to_prefix("A + B * C - D / E ^ F") == "-+A*BC/D^EF"
+
+def test_parsed_tree_emits_every_notation():
+    for infix, prefix, postfix in [("(A + B)", "+AB", "AB+"), ("((A - B) - C)", "--ABC", "AB-C-")]:
+        for tree in (parse_infix(infix), parse_prefix(prefix), parse_postfix(postfix)):
+            assert emit_infix(tree) == infix
+            assert emit_prefix(tree) == prefix
+            assert emit_postfix(tree) == postfix
+
+def test_convert_all(infix_prefix_cases, infix_postfix_cases):
+    for (infix, prefix), (_, postfix) in zip(infix_prefix_cases, infix_postfix_cases):
+        expected = {'infix': infix, 'prefix': prefix, 'postfix': postfix}
+        for source_type in expected:
+            assert convert_all(expected[source_type], source_type) == expected
+
+def test_convert_all_invalid(invalid_postfix_expressions):
+    for expression in invalid_postfix_expressions:
+        with pytest.raises(ValueError):
+            convert_all(expression, 'postfix')
+    with pytest.raises(ValueError):
+        convert_all("A + B", 'rpn')
+
+def test_deeply_nested_infix_output():
+    left_deep = right_deep = "A"
+    for _ in range(2000):
+        left_deep = f"({left_deep} + A)"
+        right_deep = f"(A + {right_deep})"
+    assert postfix_to_infix("A" + "A+" * 2000) == left_deep
+    assert prefix_to_infix("+" * 2000 + "A" * 2001) == left_deep
+    assert prefix_to_infix("+A" * 2000 + "A") == right_deep
+
+@pytest.mark.benchmark
+def test_infix_emission_scales_linearly():
+    def best_time(tree):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            emit_infix(tree)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    small = parse_postfix("A" + "A+" * 20000)
+    large = parse_postfix("A" + "A+" * 160000)
+    # Eight times the tokens should cost about eight times as much;
+    # rebuilding the string at every level would cost about 64 times as much.
+    assert best_time(large) < 20 * best_time(small)
+
+@pytest.mark.parametrize("validation", VALIDATION_LEVELS)
+def test_validation_levels_convert(validation, prefix_postfix_cases, infix_prefix_cases):
+    for prefix, postfix in prefix_postfix_cases:
+        assert prefix_to_postfix(prefix, validation=validation) == postfix
+        assert postfix_to_prefix(postfix, validation=validation) == prefix
+    for infix, prefix in infix_prefix_cases:
+        assert infix_to_prefix(infix, validation=validation) == prefix
+        assert prefix_to_infix(prefix, validation=validation) == infix
+
+@pytest.mark.parametrize("validation", VALIDATION_LEVELS)
+def test_validation_levels_reject_invalid(validation, invalid_infix_expressions,
+                                          invalid_prefix_expressions, invalid_postfix_expressions):
+    # Structural errors are caught while parsing, even without a validation pass.
+    for expressions, converter in [(invalid_infix_expressions, infix_to_postfix),
+                                   (invalid_prefix_expressions, prefix_to_postfix),
+                                   (invalid_postfix_expressions, postfix_to_infix)]:
+        for expression in expressions:
+            with pytest.raises(ValueError):
+                converter(expression, validation=validation)
+    with pytest.raises(ValueError):
+        infix_to_postfix("A(B + C)", validation=validation)
+
+def test_unknown_validation_level():
+    with pytest.raises(ValueError):
+        infix_to_postfix("A + B", validation="lenient")
+
+def test_convert(prefix_postfix_cases):
+    for prefix, postfix in prefix_postfix_cases:
+        assert convert(prefix, 'prefix', 'postfix') == postfix
+        assert convert(postfix, 'postfix', 'prefix') == prefix
+    with pytest.raises(ValueError):
+        convert("+AB", 'prefix', 'rpn')
+
+def test_iter_tokens_matches_tokenize():
+    for expression in ["(A + B) * (C ^(D-E) + F) – G", 'ABCDE -+ ^*EF*-"', "A & 1B"]:
+        assert list(iter_tokens(expression)) == tokenize(expression)
+        assert list(iter_tokens([expression[:5], expression[5:]])) == tokenize(expression)
+
+def test_iter_infix_to_postfix(infix_postfix_cases):
+    for infix, postfix in infix_postfix_cases + [("A - B - C", "AB-C-"), ("A ^ B ^ C", "ABC^^")]:
+        assert "".join(iter_infix_to_postfix(io.StringIO(infix))) == postfix
+        assert "".join(iter_infix_to_postfix(iter_chunks(io.StringIO(infix), 3))) == postfix
+
+def test_iter_infix_to_postfix_is_lazy():
+    # Tokens come out before the (endless) input has been read.
+    tokens = iter_infix_to_postfix(itertools.cycle("A + "))
+    assert list(itertools.islice(tokens, 5)) == ["A", "A", "+", "A", "+"]
+
+def test_iter_infix_to_postfix_invalid(invalid_infix_expressions):
+    for expression in invalid_infix_expressions:
+        if isinstance(expression, str):
+            with pytest.raises(ValueError):
+                list(iter_infix_to_postfix(expression))
+
+def test_expression_dag_shares_subexpressions():
+    dag = ExpressionDAG()
+    first = dag.add_expression("(B - C) * (D - E) + (B - C) * (D - E)")
+    assert len(dag) == 8  # B, C, B-C, D, E, D-E, product, sum
+    second = dag.add_expression("-BC", 'prefix')
+    assert second == dag.left[dag.left[first]]
+    assert len(dag) == 8
+    assert dag.requested == 18
+    assert dag.sharing_ratio() == 18 / 8
+    dag.root = first
+    assert emit_infix(dag) == "(((B - C) * (D - E)) + ((B - C) * (D - E)))"
+    assert emit_postfix(dag) == "BC-DE-*BC-DE-*+"
+
+def test_try_convert_matches_convert(infix_prefix_cases, infix_postfix_cases):
+    for infix, prefix in infix_prefix_cases:
+        assert try_convert(infix, 'infix', 'prefix') == ConversionResult(prefix)
+    for infix, postfix in infix_postfix_cases:
+        result = try_convert_all(infix, 'infix')
+        assert result and result.error is None
+        assert result.output == convert_all(infix, 'infix')
+
+def test_try_convert_reports_code_and_position():
+    cases = [
+        ("A + * B", 'infix', ERR_EXPECTED_OPERAND, 4),
+        ("A B", 'infix', ERR_EXPECTED_OPERATOR, 2),
+        ("A(B+C)", 'infix', ERR_EXPECTED_OPERATOR, 1),
+        ("(A + B))", 'infix', ERR_PARENTHESES, 7),
+        ("(A + B", 'infix', ERR_PARENTHESES, 6),
+        ("A + &", 'infix', ERR_CHARACTER, 4),
+        ("A +", 'infix', ERR_EXPECTED_OPERAND, 3),
+        ("A", 'infix', ERR_NO_OPERATOR, 1),
+        ("", 'infix', ERR_EXPECTED_OPERAND, 0),
+        ("+AB C", 'prefix', ERR_EXTRA_TOKEN, 4),
+        ("+A", 'prefix', ERR_EXPECTED_OPERAND, 2),
+        ("+(AB)", 'prefix', ERR_CHARACTER, 1),
+        ("A+", 'postfix', ERR_EXPECTED_OPERAND, 1),
+        ("ABC+", 'postfix', ERR_EXPECTED_OPERATOR, 4),
+        (123, 'postfix', ERR_NOT_A_STRING, 0),
+    ]
+    for expression, notation, code, position in cases:
+        result = try_convert(expression, notation, 'infix')
+        assert not result.ok
+        assert (result.output, result.error_code, result.error_position) == (None, code, position)
+        assert result.error == ERROR_MESSAGES[code]
+        assert check_expression(expression, notation) == (code, position)
+
+def test_try_convert_never_raises_for_invalid_input(invalid_infix_expressions, invalid_prefix_expressions,
+                                                    invalid_postfix_expressions):
+    for notation, expressions in [('infix', invalid_infix_expressions), ('prefix', invalid_prefix_expressions),
+                                  ('postfix', invalid_postfix_expressions)]:
+        for expression in expressions:
+            result = try_convert_all(expression, notation)
+            assert not result and result.output is None
+            with pytest.raises(ValueError):
+                convert_all(expression, notation)
+    with pytest.raises(ValueError):
+        try_convert("A + B", 'rpn', 'infix')
+
+def test_check_expression_agrees_with_strict_conversion():
+    # Every short string over a small alphabet, in every notation
+    alphabet = "AB()+-* –a1"
+    for length in range(5):
+        for chars in itertools.product(alphabet, repeat=length):
+            expression = "".join(chars)
+            for notation in ('infix', 'prefix', 'postfix'):
+                try:
+                    convert_all(expression, notation)
+                    valid = True
+                except ValueError:
+                    valid = False
+                assert (check_expression(expression, notation)[0] == ERR_NONE) == valid
+
+def test_registry_tables():
+    assert REGISTRY['^'] == Operator('^', 4, 'right', 2, REGISTRY['^'].function)
+    assert OPERATORS == {'+', '-', '*', '/', '^'}
+    assert TOKEN_KINDS['A'] == KIND_OPERAND and TOKEN_KINDS['*'] == KIND_BINARY
+    assert token_kind('&') == KIND_INVALID and token_kind('(') == KIND_OPEN
+    # A right-associative operator only pops operators that bind tighter.
+    assert BINDING['^'] == PRECEDENCE['^'] + 1 and BINDING['-'] == PRECEDENCE['-']
+
+def test_custom_operators(custom_operators):
+    cases = [
+        ("~A + B", "+~AB", "A~B+", "((~A) + B)"),
+        ("A * ~(B - C)", "*A~-BC", "ABC-~*", "(A * (~(B - C)))"),
+        ("~~A", "~~A", "A~~", "(~(~A))"),
+        ("A % B * C", "*%ABC", "AB%C*", "((A % B) * C)"),
+        ("A ^ ~B", "^A~B", "AB~^", "(A ^ (~B))"),
+    ]
+    for infix, prefix, postfix, parenthesized in cases:
+        assert infix_to_prefix(infix) == prefix
+        assert infix_to_postfix(infix) == postfix
+        assert prefix_to_postfix(prefix) == postfix
+        assert postfix_to_prefix(postfix) == prefix
+        assert prefix_to_infix(prefix) == parenthesized
+        assert postfix_to_infix(postfix) == parenthesized
+        assert "".join(iter_infix_to_postfix(infix)) == postfix
+        for expression, notation in [(infix, 'infix'), (prefix, 'prefix'), (postfix, 'postfix')]:
+            assert check_expression(expression, notation) == (ERR_NONE, -1)
+    for expression, notation in [("A ~ B", 'infix'), ("A~", 'infix'), ("~", 'prefix'), ("~A", 'postfix')]:
+        assert check_expression(expression, notation)[0] != ERR_NONE
+        with pytest.raises(ValueError):
+            convert(expression, notation, 'infix')
+
+def test_custom_operator_precedence():
+    register_operator('~', 1, arity=1)
+    try:
+        # Binds more loosely than '+', like a low-precedence prefix operator.
+        assert infix_to_prefix("~A + B") == "~+AB"
+    finally:
+        unregister_operator('~')
+    assert '~' not in OPERATORS and '~' not in TOKEN_KINDS
+    with pytest.raises(ValueError):
+        infix_to_prefix("~A + B")
+
+def test_register_operator_rejects_bad_definitions():
+    for symbol in ["A", "1", "_", ".", "(", " ", "**", "–"]:
+        with pytest.raises(ValueError):
+            register_operator(symbol, 3)
+        assert symbol not in OPERATORS
+    with pytest.raises(ValueError):
+        register_operator('%', 3, 'both')
+    with pytest.raises(ValueError):
+        register_operator('%', 3, arity=3)
+    with pytest.raises(ValueError):
+        register_operator('%', -1)
+    with pytest.raises(ValueError):
+        unregister_operator('%')
+
+def test_lex_spans():
+    expression = "rate_2024 + 3.14 * AB"
+    spans = lex(expression)
+    assert [expression[start:end] for _, start, end in spans] == ['rate_2024', '+', '3.14', '*', 'A', 'B']
+    assert [kind for kind, _, _ in spans] == [KIND_OPERAND, KIND_BINARY, KIND_OPERAND, KIND_BINARY,
+                                             KIND_OPERAND, KIND_OPERAND]
+    assert lex("A $ B")[1] == (KIND_INVALID, 2, 3)
+
+def test_lex_single_characters_matches_pattern():
+    # Expressions without names or numbers take the one-lookup-per-character path.
+    expressions = ["A + (((B-C) * (D-E) + F)/G) ^ (H-J)", "+AB", " AB+\t", "A – B", '"A+B"', "A $ B", "Ä + é",
+                   "", "  ", "A\u2003+ B"]
+    for expression in expressions:
+        for lenient in (False, True):
+            assert _lex_characters(expression, lenient) == _lex_pattern(expression, lenient)
+
+def test_names_and_numbers_convert():
+    infix = "rate_2024 * (x + 3.14)"
+    converted = convert_all(infix, 'infix')
+    assert converted['prefix'] == "* rate_2024 + x 3.14"
+    assert converted['postfix'] == "rate_2024 x 3.14 + *"
+    assert converted['infix'] == "(rate_2024 * (x + 3.14))"
+    assert prefix_to_postfix(converted['prefix']) == converted['postfix']
+    assert postfix_to_prefix(converted['postfix']) == converted['prefix']
+    assert postfix_to_infix(converted['postfix']) == converted['infix']
+    # Single-letter expressions keep their compact output
+    assert infix_to_postfix("A + B * C") == "ABC*+"
+    with pytest.raises(ValueError):
+        infix_to_postfix("x y + z")
+
+def test_iter_infix_to_postfix_joins_names_across_chunks():
+    chunks = ["alpha_", "1 + be", "ta * 2", "0"]
+    assert list(iter_infix_to_postfix(chunks)) == ['alpha_1', 'beta', '20', '*', '+']
+
+def test_compact_whitespace():
+    assert compact_whitespace("  total  +\t  tax ") == "total+tax"
+    assert compact_whitespace("old rate") == "old rate"
@@ -0,0 +1,59 @@
+"""This module contains tests for the on-disk conversion cache."""
+
+from src import disk_cache
+from src.batch import convert_batch
+from src.disk_cache import DiskCache
+
+
+def test_disk_cache_persists_between_runs(tmp_path, infix_prefix_cases):
+    path = tmp_path / "cache.sqlite3"
+    expressions = [infix for infix, _ in infix_prefix_cases] + ["A +"]
+    with DiskCache(path) as cache:
+        for expression, record in zip(expressions, convert_batch(expressions, 'infix')):
+            assert cache.get(expression, 'infix') is None
+            cache.put(expression, 'infix', record)
+    with DiskCache(path) as cache:
+        for infix, prefix in infix_prefix_cases:
+            # Whitespace does not matter to the converters, so it does not matter to the cache.
+            assert cache.get(infix.replace(" ", ""), 'infix')['prefix'] == prefix
+        assert cache.get("A +", 'infix')['error_position'] == 3
+        assert cache.get("+AB", 'prefix') is None
+        assert (cache.hits, cache.misses) == (len(expressions), 1)
+
+def test_disk_cache_version_change_discards_entries(tmp_path, monkeypatch):
+    path = tmp_path / "cache.sqlite3"
+    with DiskCache(path) as cache:
+        cache.put("AB+", 'postfix', convert_batch(["AB+"], 'postfix')[0])
+    monkeypatch.setattr(disk_cache, 'CACHE_VERSION', disk_cache.CACHE_VERSION + 1)
+    with DiskCache(path) as cache:
+        assert len(cache) == 0
+
+def test_info_does_not_change_the_cache(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "cache.sqlite3"
+    with DiskCache(path) as cache:
+        cache.put("AB+", 'postfix', convert_batch(["AB+"], 'postfix')[0])
+    before = path.read_bytes()
+    monkeypatch.setattr(disk_cache, 'CACHE_VERSION', disk_cache.CACHE_VERSION + 1)
+    assert disk_cache.main(['info', str(path)]) == 0
+    assert capsys.readouterr().out.startswith(f"1 entries in {path} (cache version {disk_cache.CACHE_VERSION - 1};")
+    # Neither the generation nor the entries of the other version were touched.
+    assert path.read_bytes() == before
+    assert disk_cache.read_info(path) == (1, disk_cache.CACHE_VERSION - 1)
+    assert disk_cache.main(['info', str(tmp_path / "missing.sqlite3")]) == 1
+
+def test_disk_cache_size_cap_keeps_recent_entries(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    expressions = ["AB+", "AB-", "AB*", "AB/"]
+    records = convert_batch(expressions, 'postfix')
+    with DiskCache(path) as cache:
+        for expression, record in zip(expressions, records):
+            cache.put(expression, 'postfix', record)
+    with DiskCache(path, max_entries=2) as cache:
+        # Using entries in this run makes them the most recent.
+        assert cache.get("AB-", 'postfix') is not None
+        assert cache.get("AB/", 'postfix') is not None
+        assert cache.compact() == 2
+    with DiskCache(path) as cache:
+        assert len(cache) == 2
+        assert cache.get("AB-", 'postfix')['infix'] == "(A - B)"
+        assert cache.get("AB+", 'postfix') is None
@@ -0,0 +1,80 @@
+"""This module contains tests for the vectorized expression evaluator."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.converters import ExpressionDAG
+from src.evaluate import EvaluationStats, evaluate, evaluate_postfix, evaluate_tree
+
+
+@pytest.fixture
+def columns():
+    rng = np.random.default_rng(0)
+    return {name: rng.uniform(1.0, 2.0, size=1000) for name in "ABCDEFGHIJ"}
+
+def test_evaluate_follows_precedence_and_associativity(columns):
+    A, B, C, D = columns['A'], columns['B'], columns['C'], columns['D']
+    np.testing.assert_allclose(evaluate("A + B * C", columns), A + B * C)
+    np.testing.assert_allclose(evaluate("A - B - C", columns), (A - B) - C)
+    np.testing.assert_allclose(evaluate("A ^ B ^ C", columns), A ** (B ** C))
+    np.testing.assert_allclose(evaluate("(A + B) / (C - D)", columns), (A + B) / (C - D))
+    np.testing.assert_allclose(evaluate("-+A*BC/DA", columns, notation='prefix'), A + B * C - D / A)
+
+def test_evaluate_reuses_buffers(columns):
+    # A long left-deep chain only ever needs one temporary buffer.
+    stats = EvaluationStats()
+    evaluate_postfix("AB+" + "C+D*" * 50, columns, stats=stats)
+    assert stats.operations == 101
+    assert (stats.temporaries, stats.peak_temporaries) == (1, 1)
+    assert stats.peak_bytes == columns['A'].nbytes
+    # (A+B)*(C+D) needs two at once.
+    stats = EvaluationStats()
+    evaluate_postfix("AB+CD+*", columns, stats=stats)
+    assert stats.peak_temporaries == 2
+
+def test_evaluate_into_out(columns):
+    out = np.empty(1000)
+    result = evaluate("A * B", columns, out=out)
+    assert result is out
+    np.testing.assert_allclose(out, columns['A'] * columns['B'])
+
+def test_evaluate_integer_columns_use_float_arithmetic():
+    bindings = {'A': np.array([1, 2]), 'B': np.array([-1, 2])}
+    np.testing.assert_allclose(evaluate("A ^ B / B", bindings), [-1.0, 2.0])
+
+def test_evaluate_errors(columns):
+    with pytest.raises(ValueError):
+        evaluate("A + Z", columns)
+    with pytest.raises(ValueError):
+        evaluate("A +", columns)
+
+def test_evaluate_tree_computes_shared_subexpressions_once(columns):
+    A, B, C, D, E = (columns[name] for name in "ABCDE")
+    dag = ExpressionDAG()
+    roots = [dag.add_expression("(B - C) * (D - E) + (B - C)"),
+             dag.add_expression("(D - E) / A"),
+             dag.add_expression("ABC-*", 'postfix')]
+    stats = EvaluationStats()
+    first, second, third = evaluate_tree(dag, columns, roots, stats=stats)
+    np.testing.assert_allclose(first, (B - C) * (D - E) + (B - C))
+    np.testing.assert_allclose(second, (D - E) / A)
+    np.testing.assert_allclose(third, A * (B - C))
+    # B-C, D-E, the product, the sum, the quotient and A*(B-C)
+    assert stats.operations == 6
+
+def test_evaluate_custom_operators(columns, custom_operators):
+    A, B = columns['A'], columns['B']
+    np.testing.assert_allclose(evaluate("~A * B + ~B", columns), -A * B - B)
+    np.testing.assert_allclose(evaluate("A B % ~", columns, notation='postfix'), -(A % B))
+    dag = ExpressionDAG()
+    roots = [dag.add_expression("~(A % B)"), dag.add_expression("~(A % B) * A")]
+    first, second = evaluate_tree(dag, columns, roots)
+    np.testing.assert_allclose(first, -(A % B))
+    np.testing.assert_allclose(second, -(A % B) * A)
+
+
+def test_evaluate_names_and_numbers():
+    price = np.array([1.0, 2.0, 3.0])
+    result = evaluate("price * 2 + tax_rate", {'price': price, 'tax_rate': 0.5})
+    np.testing.assert_allclose(result, price * 2 + 0.5)
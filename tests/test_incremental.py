@@ -0,0 +1,110 @@
+"""This module contains tests for the incremental and watch modes."""
+
+import functools
+import os
+
+import pytest
+from src import incremental
+from src.batch import BatchConverter
+from src.disk_cache import DiskCache
+from src.incremental import Manifest, file_digest, update_outputs, watch
+from src.main import main, process_file
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    path.mkdir()
+    (path / "some_infix.txt").write_text("A + B\n(A + B) * C\n", encoding='utf-8')
+    (path / "some_prefix.txt").write_text("+AB\n*+ABC\n", encoding='utf-8')
+    return path
+
+def run_update(data_dir, output_dir, manifest, cache):
+    with BatchConverter() as converter:
+        process = functools.partial(process_file, converter=converter, output_dir=output_dir, cache=cache)
+        return update_outputs(data_dir, output_dir, process, manifest)
+
+def test_manifest_check_detects_changes(tmp_path, data_dir):
+    path = data_dir / "some_infix.txt"
+    output = tmp_path / "report.txt"
+    manifest = Manifest(tmp_path / "manifest.json")
+    entry = manifest.check(path, [output])
+    assert entry['sha256'] == file_digest(path)
+    manifest.files[str(path)] = entry
+    # Not up to date while its report is missing.
+    assert manifest.check(path, [output]) is not None
+    output.write_text("report")
+    assert manifest.check(path, [output]) is None
+    # Touched but unchanged: the new time is recorded, nothing is regenerated.
+    os.utime(path, ns=(0, 0))
+    assert manifest.check(path, [output]) is None
+    assert manifest.files[str(path)]['mtime_ns'] == 0
+    path.write_text("A * B\n", encoding='utf-8')
+    assert manifest.check(path, [output])['sha256'] == file_digest(path)
+
+def test_update_outputs_regenerates_only_changed_files(tmp_path, data_dir):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    manifest = Manifest(tmp_path / "manifest.json")
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        updated, removed = run_update(data_dir, output_dir, manifest, cache)
+    assert [path.name for path, _ in updated] == ["some_infix.txt", "some_prefix.txt"]
+    assert removed == []
+    prefix_report = output_dir / "converted_some_prefix.txt"
+    before = prefix_report.stat().st_mtime_ns
+
+    with open(data_dir / "some_infix.txt", 'a', encoding='utf-8') as file:
+        file.write("A ^ B\n")
+    # A new manifest, as in a later run, reads back what the last one saved.
+    manifest = Manifest(tmp_path / "manifest.json")
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        updated, removed = run_update(data_dir, output_dir, manifest, cache)
+        # Only the new line was converted; the two others came from the cache.
+        assert (cache.hits, cache.misses) == (2, 1)
+    assert [path.name for path, _ in updated] == ["some_infix.txt"]
+    assert prefix_report.stat().st_mtime_ns == before
+    assert "Original Expression: A ^ B" in (output_dir / "converted_some_infix.txt").read_text(encoding='utf-8')
+
+    (data_dir / "some_prefix.txt").unlink()
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        updated, removed = run_update(data_dir, output_dir, manifest, cache)
+    assert updated == []
+    assert removed == [prefix_report]
+    assert not prefix_report.exists()
+    assert list(Manifest(tmp_path / "manifest.json").files) == [str(data_dir / "some_infix.txt")]
+
+def test_watch_polls_until_done_or_interrupted():
+    calls, sleeps = [], []
+    assert watch(lambda: calls.append(1), 0.5, polls=3, sleep=sleeps.append) == 3
+    assert len(calls) == 3 and sleeps == [0.5, 0.5]
+
+    def interrupt(seconds):
+        raise KeyboardInterrupt
+    assert watch(lambda: None, sleep=interrupt) == 1
+
+def test_main_incremental(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "resources" / "data").mkdir(parents=True)
+    (tmp_path / "resources" / "data" / "some_postfix.txt").write_text("AB+\nA+\n", encoding='utf-8')
+    main(['--incremental'])
+    assert capsys.readouterr().out == "Updated outputs/converted_some_postfix.txt (1 failed to convert)\n"
+    assert (tmp_path / "outputs" / "manifest.json").exists()
+    main(['--incremental'])
+    assert capsys.readouterr().out == ""
+    with pytest.raises(SystemExit):
+        main(['--watch', '--checkpoint'])
+
+def test_converter_version_change_regenerates_everything(tmp_path, data_dir, monkeypatch):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        run_update(data_dir, output_dir, Manifest(tmp_path / "manifest.json"), cache)
+    monkeypatch.setattr(incremental, 'CACHE_VERSION', incremental.CACHE_VERSION + 1)
+    (data_dir / "some_prefix.txt").unlink()
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        updated, removed = run_update(data_dir, output_dir, Manifest(tmp_path / "manifest.json"), cache)
+    # The unchanged input is converted again, and the removed one is still cleaned up.
+    assert [path.name for path, _ in updated] == ["some_infix.txt"]
+    assert removed == [output_dir / "converted_some_prefix.txt"]
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        assert run_update(data_dir, output_dir, Manifest(tmp_path / "manifest.json"), cache) == ([], [])
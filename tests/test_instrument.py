@@ -0,0 +1,75 @@
+"""This module contains tests for the conversion instrumentation."""
+
+import pytest
+from src import converters
+from src import main as main_module
+from src.batch import convert_batch
+from src.disk_cache import DiskCache
+from src.instrument import Instrumentation
+
+
+def test_instrumentation_records_stages():
+    with Instrumentation() as instrumentation:
+        assert converters.convert_all("A + B * C", 'infix') == {
+            'infix': "(A + (B * C))", 'prefix': "+A*BC", 'postfix': "ABC*+"}
+        converters.infix_to_postfix("A + B")
+        with pytest.raises(ValueError):
+            converters.infix_to_postfix("A +")
+    stats = instrumentation.stats
+    assert stats['convert_all', 'convert_all'].calls == 1
+    assert stats['convert_all', 'parse_infix'].tokens == 5
+    assert stats['convert_all', 'convert_all'].tokens == 5
+    assert stats['convert_all', 'emit_prefix'].calls == 1
+    # Input validation (on the parser's tokens) and the re-validation of the output are separate stages.
+    assert stats['infix_to_postfix', '_valid_infix'].calls == 2
+    assert stats['infix_to_postfix', 'validate_postfix'].calls == 1
+    assert stats['infix_to_postfix', 'infix_to_postfix'].errors == 1
+    total = stats['convert_all', 'convert_all'].seconds
+    self_times = sum(entry.self_seconds for (converter, _), entry in stats.items() if converter == 'convert_all')
+    assert self_times == pytest.approx(total)
+    table = instrumentation.format()
+    assert "parse_infix" in table and "(total)" in table
+    assert instrumentation.to_dict()[0]['stages'][0]['stage'] in ('convert_all', 'infix_to_postfix')
+
+def test_disabled_instrumentation_restores_functions():
+    parse_infix = converters.parse_infix
+    lex = converters.lex
+    with Instrumentation() as instrumentation:
+        assert converters.parse_infix is not parse_infix
+        assert converters.PARSERS['infix'] is converters.parse_infix
+        with pytest.raises(RuntimeError):
+            Instrumentation().enable()
+    assert not instrumentation.enabled
+    assert converters.parse_infix is parse_infix and converters.lex is lex
+    assert converters.PARSERS['infix'] is parse_infix
+    converters.infix_to_postfix("A + B")
+    assert ('infix_to_postfix', 'infix_to_postfix') not in instrumentation.stats
+
+def test_instrumented_batch(prefix_postfix_cases):
+    with Instrumentation() as instrumentation:
+        convert_batch([prefix for prefix, _ in prefix_postfix_cases] + ["+A"], 'prefix')
+    stats = instrumentation.stats
+    assert stats['try_convert_all', 'try_convert_all'].calls == len(prefix_postfix_cases) + 1
+    assert stats['try_convert_all', 'parse_prefix'].calls == len(prefix_postfix_cases)
+
+def test_main_cleans_up_when_a_file_fails(tmp_path, monkeypatch):
+    data = tmp_path / "resources" / "data"
+    data.mkdir(parents=True)
+    (data / "a_postfix.txt").write_text("AB+\n")
+    (data / "b_postfix.txt").write_text("AB-\n")
+    monkeypatch.chdir(tmp_path)
+    process_file = main_module.process_file
+
+    def failing_process_file(file_path, *args, **kwargs):
+        if file_path.name == "b_postfix.txt":
+            raise RuntimeError("disk full")
+        return process_file(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(main_module, 'process_file', failing_process_file)
+    parse_postfix = converters.parse_postfix
+    with pytest.raises(RuntimeError):
+        main_module.main(['--instrument', '--cache', 'cache.sqlite3'])
+    # The converters are no longer patched, and the first file's result was saved.
+    assert converters.parse_postfix is parse_postfix
+    with DiskCache(tmp_path / "cache.sqlite3") as cache:
+        assert len(cache) == 1
@@ -0,0 +1,76 @@
+"""This module contains tests for the memory-mapped input reader."""
+
+import os
+from array import array
+
+import pytest
+from src import mapped_file
+from src.mapped_file import MappedFile, build_index, index_path
+from src.main import read_expressions
+from src.pipeline import find_input_files
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "big_infix.txt"
+    path.write_bytes("A + B\n\nC – D\r\nrate * 2\nE".encode('utf-8'))
+    return path
+
+def test_build_index():
+    assert build_index(b"") == array('Q', [0])
+    assert build_index(b"AB\nC\n") == array('Q', [0, 3, 5])
+    assert build_index(b"AB\nC") == array('Q', [0, 3, 4])
+
+def test_random_access(data_file):
+    with MappedFile(data_file) as file:
+        assert len(file) == 5
+        assert list(file.iter_lines()) == [(0, "A + B"), (1, ""), (2, "C – D"), (3, "rate * 2"), (4, "E")]
+        assert file.line(2) == "C – D"
+        assert list(file.iter_lines(3)) == [(3, "rate * 2"), (4, "E")]
+        with pytest.raises(IndexError):
+            file.line(5)
+        view = file.view(3, 5)
+        assert bytes(view) == b"rate * 2\nE"
+        view.release()
+        begin, end = file.byte_range(2, 4)
+        assert file.line_range(begin, end) == (2, 4)
+        # A byte range takes the lines that start inside it.
+        assert file.line_range(begin + 1, file.size) == (3, 5)
+
+def test_iter_lines_in_small_blocks(data_file, monkeypatch):
+    with MappedFile(data_file) as file:
+        expected = list(file.iter_lines())
+        for block_size in (1, 3, 7):
+            monkeypatch.setattr(mapped_file, 'READ_BLOCK_SIZE', block_size)
+            assert list(file.iter_lines()) == expected
+            assert list(file.iter_lines(1, 4)) == expected[1:4]
+
+def test_split_covers_every_line_once(data_file):
+    with MappedFile(data_file) as file:
+        for parts in (1, 2, 3, 10):
+            ranges = file.split(parts)
+            assert ranges[0][0] == 0 and ranges[-1][1] == len(file)
+            assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+            assert len(ranges) <= parts
+
+def test_sidecar_index(data_file):
+    with MappedFile(data_file) as file:
+        offsets = file.offsets
+        path = file.save_index()
+    assert path == index_path(data_file) and path.exists()
+    with MappedFile(data_file) as file:
+        assert file._load_index() == offsets
+    # A changed file makes the sidecar stale.
+    data_file.write_bytes(b"A + B\n")
+    os.utime(data_file, ns=(0, 0))
+    with MappedFile(data_file) as file:
+        assert file._load_index() is None
+        assert len(file) == 1
+    assert [path.name for path, _ in find_input_files(data_file.parent)] == ["big_infix.txt"]
+
+def test_read_expressions(data_file):
+    assert read_expressions(data_file) == ["A + B", "C – D", "rate * 2", "E"]
+    assert read_expressions(data_file, 1, 3) == ["C – D"]
+    empty = data_file.with_name("empty_infix.txt")
+    empty.write_text("")
+    assert read_expressions(empty) == []
@@ -0,0 +1,121 @@
+"""This module contains tests for the streaming pipeline."""
+
+import itertools
+import json
+import threading
+import time
+
+from src.batch import BatchConverter
+from src.converters import ERR_EXPECTED_OPERAND
+from src.main import ExpressionStacks, main, write_results
+from src.pipeline import (ErrorReport, classify_file, convert_expressions, find_input_files, map_files, read_records,
+                          windows)
+
+
+def test_windows():
+    assert list(windows(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(windows([], 2)) == []
+
+def test_reader_and_classifier(tmp_path):
+    (tmp_path / "some_prefix_strings.txt").write_text("+AB\n\n  -AB  \n")
+    (tmp_path / "notes.txt").write_text("not expressions\n")
+    files = list(find_input_files(tmp_path))
+    assert [(path.name, expr_type) for path, expr_type in files] == [("some_prefix_strings.txt", 'prefix')]
+    assert list(read_records(files)) == [("+AB", 'prefix'), ("-AB", 'prefix')]
+    assert classify_file(tmp_path / "x_postfix.txt") == 'postfix'
+
+def test_converter_stage_streams():
+    # An endless input must still produce results one window at a time.
+    endless = itertools.cycle([("AB+", 'postfix'), ("A +", 'infix')])
+    with BatchConverter() as converter:
+        results = list(itertools.islice(convert_expressions(endless, converter, window=3), 4))
+    assert [result['infix'] for _, _, result in results] == ["(A + B)", None, "(A + B)", None]
+    assert results[1][2]['error']
+
+def test_writer_stage(capsys):
+    stacks = ExpressionStacks()
+    errors = ErrorReport()
+    with BatchConverter() as converter:
+        records = [("A + B", 'infix'), ("+A", 'prefix'), ("AB*", 'postfix')]
+        write_results(convert_expressions(records, converter), stacks, errors)
+    stacks.print_all()
+    stacks.close()
+    assert errors.to_dict()['errors'] == [{'notation': 'prefix', 'code': ERR_EXPECTED_OPERAND,
+                                           'message': "Expected an operand", 'count': 1,
+                                           'examples': [{'expression': "+A", 'position': 2}]}]
+    assert capsys.readouterr().out == (
+        "\nContents of Expression Stacks:\n"
+        "\nInfix Stack:\nA + B\n(A * B)\n"
+        "\nPrefix Stack:\n+AB\n+A\n*AB\n"
+        "\nPostfix Stack:\nAB+\nAB*\n"
+    )
+
+def test_error_report_keeps_counts_and_a_few_examples(tmp_path):
+    errors = ErrorReport(max_examples=2)
+    with BatchConverter() as converter:
+        records = [("A +", 'infix')] * 5 + [("A + &", 'infix'), ("AB+", 'postfix')]
+        for expr, expr_type, result in convert_expressions(records, converter):
+            errors.add_result(expr, expr_type, result)
+    assert len(errors) == 6
+    report = errors.to_dict()
+    assert [(entry['message'], entry['count'], len(entry['examples'])) for entry in report['errors']] == \
+        [("Expected an operand", 5, 2), ("Unexpected character", 1, 1)]
+    assert "6 expressions could not be converted" in errors.format()
+    path = tmp_path / "errors.json"
+    errors.write_json(path)
+    assert json.loads(path.read_text()) == report
+
+def test_error_reports_merge():
+    first, second = ErrorReport(max_examples=2), ErrorReport(max_examples=2)
+    first.add("A +", 'infix', ERR_EXPECTED_OPERAND, 3)
+    for _ in range(3):
+        second.add("B +", 'infix', ERR_EXPECTED_OPERAND, 3)
+    first.merge(second)
+    assert len(first) == 4
+    assert first.examples['infix', ERR_EXPECTED_OPERAND] == [("A +", 3), ("B +", 3)]
+
+def test_map_files_keeps_input_order():
+    running = set()
+    overlapped = threading.Event()
+
+    def slow_name(file_path, expr_type):
+        running.add(file_path)
+        if len(running) > 1:
+            overlapped.set()
+        # Earlier files take longer, so they finish last.
+        time.sleep(0.02 * (5 - int(file_path)))
+        running.discard(file_path)
+        return file_path, expr_type
+
+    files = [(str(i), 'infix') for i in range(5)]
+    assert list(map_files(slow_name, files, io_workers=3)) == files
+    assert overlapped.is_set()
+
+def test_main_writes_one_report_per_file(tmp_path, monkeypatch, capsys):
+    data = tmp_path / "resources" / "data"
+    data.mkdir(parents=True)
+    (data / "b_postfix.txt").write_text("AB+\nA+\n")
+    (data / "a_infix.txt").write_text("A + B * C\n")
+    monkeypatch.chdir(tmp_path)
+    main(['--io-workers', '2', '--output-dir', 'reports'])
+    out = capsys.readouterr().out
+    # Files are merged in name order, so a_infix comes first on every run.
+    assert out.startswith("\nContents of Expression Stacks:\n\nInfix Stack:\nA + B * C\n(A + B)\n")
+    assert "1 expressions could not be converted" in out
+    reports = sorted(path.name for path in (tmp_path / "reports").iterdir())
+    assert reports == ["converted_a_infix.txt", "converted_b_postfix.txt"]
+    report = (tmp_path / "reports" / "converted_a_infix.txt").read_text()
+    assert report.startswith("Results for a_infix.txt\n")
+    assert "To Postfix: ABC*+\n" in report
+
+def test_main_writes_selected_formats(tmp_path, monkeypatch, capsys):
+    data = tmp_path / "resources" / "data"
+    data.mkdir(parents=True)
+    (data / "b_postfix.txt").write_text("AB+\nA+\n")
+    monkeypatch.chdir(tmp_path)
+    main(['--format', 'jsonl', 'tsv', 'columnar'])
+    outputs = sorted(path.name for path in (tmp_path / "outputs").iterdir())
+    assert outputs == ["converted_b_postfix.columns", "converted_b_postfix.jsonl", "converted_b_postfix.tsv"]
+    assert len((tmp_path / "outputs" / "converted_b_postfix.jsonl").read_text().splitlines()) == 2
+    # The stacks are printed whatever the formats.
+    assert "\nPrefix Stack:\n+AB\n" in capsys.readouterr().out
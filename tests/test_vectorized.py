@@ -0,0 +1,65 @@
+"""This module contains tests for the vectorized batch validation."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.converters import PARSERS
+from src.vectorized import pack_expressions, tokenize_batch, validate_batch, OPERAND, OPERATOR
+
+
+def accepted(expression, notation):
+    try:
+        PARSERS[notation](expression)
+    except ValueError:
+        return False
+    return True
+
+@pytest.mark.parametrize("notation", ['infix', 'prefix', 'postfix'])
+def test_validate_batch_matches_converters(notation, infix_prefix_cases, postfix_prefix_cases,
+                                           invalid_infix_expressions, invalid_prefix_expressions,
+                                           invalid_postfix_expressions):
+    expressions = ([infix for infix, _ in infix_prefix_cases] +
+                   [prefix for _, prefix in infix_prefix_cases] +
+                   [postfix for postfix, _ in postfix_prefix_cases] +
+                   invalid_infix_expressions + invalid_prefix_expressions + invalid_postfix_expressions +
+                   ["A(B + C)", "()", "A – B", "--ABC", "AB-C-", "+AB+C", "a + b", '"AB+"', "A1 + B",
+                    "rate * 2", "x y", "A + b c"])
+    valid, positions = validate_batch(expressions, notation)
+    assert list(valid) == [accepted(expression, notation) for expression in expressions]
+    assert list(positions[valid]) == [-1] * int(valid.sum())
+
+def test_validate_batch_error_positions():
+    valid, positions = validate_batch(["A + B", "A + ", "(A + B", "A B +", "A + & B", "", "A"], 'infix')
+    assert list(valid) == [True, False, False, False, False, False, False]
+    assert list(positions) == [-1, 4, 6, 2, 4, 0, 1]
+    _, positions = validate_batch(["+AB", "+A", "+AB+C", "+(B"], 'prefix')
+    assert list(positions) == [-1, 2, 3, 1]
+    _, positions = validate_batch(["AB+", "A+", "AB+C+D"], 'postfix')
+    assert list(positions) == [-1, 1, 6]
+
+def test_pack_and_tokenize_batch():
+    buffer, offsets, is_string = pack_expressions(["A+B", 7, "C – D"], 'prefix')
+    assert bytes(buffer) == b"A+BC - D"
+    assert list(offsets) == [0, 3, 3, 8]
+    assert list(is_string) == [True, False, True]
+    classes, segments, positions, token_offsets = tokenize_batch(["A+B", "C – D"], 'prefix')
+    assert list(classes) == [OPERAND, OPERATOR, OPERAND, OPERAND, OPERATOR, OPERAND]
+    assert list(segments) == [0, 0, 0, 1, 1, 1]
+    assert list(positions) == [0, 1, 2, 0, 2, 4]
+    assert list(token_offsets) == [0, 3, 6]
+
+def test_validate_batch_follows_the_registry(custom_operators):
+    # '%' was registered after this module was imported; '~' is unary.
+    expressions = ["A % B", "~A + B", "A ~ B", "A * ~(B - C)", "A ~", "AB~", "A~B+", "~A"]
+    for notation in ['infix', 'prefix', 'postfix']:
+        valid, _ = validate_batch(expressions, notation)
+        assert list(valid) == [accepted(expression, notation) for expression in expressions]
+    assert list(validate_batch(["A % B", "~A + B", "A ~ B"], 'infix')[0]) == [True, True, False]
+    assert list(validate_batch(["AB~", "A~B+"], 'postfix')[0]) == [False, True]
+
+def test_validate_batch_non_ascii_characters():
+    expressions = ["A × B", "A – B", "×AB", "AB–"]
+    for notation in ['infix', 'prefix', 'postfix']:
+        valid, _ = validate_batch(expressions, notation)
+        assert list(valid) == [accepted(expression, notation) for expression in expressions]
@@ -0,0 +1,97 @@
+"""This module contains tests for the output writers."""
+
+import json
+
+from src.batch import convert_batch
+from src.writers import (ColumnarWriter, FIELDS, HumanReportWriter, JsonlWriter, TsvWriter, open_writers,
+                         output_path, read_columns)
+
+EXPRESSIONS = ["AB+", "A+", "AB\t+"]
+
+
+def write_all(writer, expressions=EXPRESSIONS):
+    with writer:
+        for expression, result in zip(expressions, convert_batch(expressions, 'postfix')):
+            writer.write(expression, 'postfix', result)
+
+
+def test_human_report(tmp_path):
+    expressions = ["AB+", "A+", "AB – C +"]
+    path = output_path("data/some_postfix.txt", tmp_path)
+    assert path == tmp_path / "converted_some_postfix.txt"
+    with HumanReportWriter(path, "some_postfix.txt") as writer:
+        for expression, result in zip(expressions, convert_batch(expressions, 'postfix')):
+            writer.write(expression, 'postfix', result)
+    assert path.read_text() == (
+        "Results for some_postfix.txt\n"
+        "==================================================\n\n"
+        "Original Expression: AB+\nDetected Type: postfix\n"
+        "To Infix:   (A + B)\nTo Prefix:  +AB\n\n"
+        "Original Expression: A+\nDetected Type: postfix\n"
+        "Error processing expression: Expected an operand at position 1\n\n"
+        "Original Expression: AB – C +\nDetected Type: postfix\n"
+        "To Infix:   ((A - B) + C)\nTo Prefix:  +-ABC\n\n"
+        "Expression Stacks:\n"
+        "==================================================\n"
+        "\nInfix Stack:\n  (A + B)\n  ((A - B) + C)\n"
+        "\nPrefix Stack:\n  +AB\n  +-ABC\n"
+        "\nPostfix Stack:\n  AB+\n  AB-C+\n"
+        "\nVerifying Expression Stacks:\n"
+        "==================================================\n"
+        "\nInfix Stack Verification:\n  (A + B): True\n  ((A - B) + C): True\n"
+        "\nPrefix Stack Verification:\n  +AB: True\n  +-ABC: True\n"
+        "\nPostfix Stack Verification:\n  AB+: True\n  AB-C+: True\n"
+    )
+
+def test_output_paths(tmp_path):
+    assert output_path("data/some_postfix.txt", tmp_path, 'jsonl') == tmp_path / "converted_some_postfix.jsonl"
+    assert output_path("data/some_postfix.txt", tmp_path, 'tsv') == tmp_path / "converted_some_postfix.tsv"
+    assert output_path("data/some_postfix.txt", tmp_path, 'columnar') == tmp_path / "converted_some_postfix.columns"
+
+def test_jsonl(tmp_path):
+    write_all(JsonlWriter(tmp_path / "out.jsonl"))
+    records = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding='utf-8').splitlines()]
+    assert records[0] == {'expression': "AB+", 'type': 'postfix', 'infix': "(A + B)", 'prefix': "+AB",
+                          'postfix': "AB+", 'error': None, 'error_code': None, 'error_position': None}
+    assert records[1]['error'] == "Expected an operand" and records[1]['error_position'] == 1
+    assert records[2]['expression'] == "AB\t+"
+
+def test_tsv(tmp_path):
+    write_all(TsvWriter(tmp_path / "out.tsv"))
+    lines = (tmp_path / "out.tsv").read_text(encoding='utf-8').splitlines()
+    assert lines[0].split("\t") == list(FIELDS)
+    assert lines[1].split("\t") == ["AB+", "postfix", "(A + B)", "+AB", "AB+", "", "", ""]
+    assert lines[2].split("\t")[5:] == ["Expected an operand", "3", "1"]
+    # The tab in the expression is escaped, so every line has one value per field.
+    assert lines[3].split("\t")[0] == "AB\\t+"
+
+def test_columnar(tmp_path):
+    write_all(ColumnarWriter(tmp_path / "out.columns"))
+    columns = read_columns(tmp_path / "out.columns")
+    assert columns['expression'] == EXPRESSIONS
+    assert columns['prefix'] == ["+AB", "", "+AB"]
+    assert columns['error_position'] == ["", "1", ""]
+
+def test_resume_from_offsets(tmp_path):
+    results = convert_batch(EXPRESSIONS, 'postfix')
+    formats = ['human', 'jsonl', 'tsv', 'columnar']
+    for name in ["whole", "cut", "spool"]:
+        (tmp_path / name).mkdir()
+    with open_writers(formats, "some_postfix.txt", tmp_path / "whole") as writers:
+        for expression, result in zip(EXPRESSIONS, results):
+            writers.write(expression, 'postfix', result)
+
+    writers = open_writers(formats, "some_postfix.txt", tmp_path / "cut", tmp_path / "spool")
+    writers.write(EXPRESSIONS[0], 'postfix', results[0])
+    offsets = writers.offsets()
+    # Written after the offsets were taken, then lost in a crash.
+    writers.write(EXPRESSIONS[1], 'postfix', results[1])
+    writers.close()
+    with open_writers(formats, "some_postfix.txt", tmp_path / "cut", tmp_path / "spool", offsets) as writers:
+        for expression, result in zip(EXPRESSIONS[1:], results[1:]):
+            writers.write(expression, 'postfix', result)
+
+    for name in ["converted_some_postfix.txt", "converted_some_postfix.jsonl", "converted_some_postfix.tsv"]:
+        assert (tmp_path / "cut" / name).read_bytes() == (tmp_path / "whole" / name).read_bytes()
+    assert read_columns(tmp_path / "cut" / "converted_some_postfix.columns") == \
+        read_columns(tmp_path / "whole" / "converted_some_postfix.columns")